@@ -1,6 +1,11 @@
-from dash import Dash, dcc
+from dash import Dash, dcc, Input, Output, State, callback, no_update
 import dash_bootstrap_components as dbc
 import dash
+from flask import Response, abort, jsonify, request
+
+from pxs import api, export, http, qc, warmup
+from pxs.store import stations, SHARED_DIR
+from pxs.views import FIGURE_SETS, figure_set_json
 
 app = Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.LUX, dbc.icons.FONT_AWESOME],
 	   suppress_callback_exceptions=True, prevent_initial_callbacks=True)
@@ -21,9 +26,68 @@ app.layout = dbc.Container([
             dbc.Row([dash.page_container])
 	    ], width = 12),
     ]),
-     dcc.Store(id='browser-memo', data=dict(), storage_type='session')
+     dcc.Store(id='browser-memo', data=dict(), storage_type='session'),
+     # Datensatz-Version: steigt, sobald neue Zeilen an eine Stations-CSV angehängt wurden
+     dcc.Store(id='dataset-version', data=stations.version),
+     dcc.Interval(id='dataset-poll', interval=30 * 1000)
 ], fluid=True)
 
+############################################################################################
+# Dataset Version
+
+@callback(
+    Output('dataset-version', 'data'),
+    Input('dataset-poll', 'n_intervals'),
+    State('dataset-version', 'data')
+)
+def poll_dataset_version(_, version):
+    """Only pushes a new version (and thereby refreshes the pages) if the data changed"""
+    if version == stations.version:
+        return no_update
+    return stations.version
+
+# Stationsspalten als Memory-Maps öffnen; geparst wird nur, was noch nicht in SHARED_DIR liegt.
+# Unter gunicorn hat der Master das bereits erledigt (gunicorn.conf.py)
+stations.open(SHARED_DIR)
+
+# Neue Zeilen in data/*.csv im Hintergrund einlesen
+stations.start_watcher()
+
+############################################################################################
+# Warm-up
+
+@server.route('/ready')
+def ready():
+    """Warm-up progress; 503 until done, so the load balancer waits before routing traffic"""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+# Stationen und die häufigsten Ansichten der Seiten im Hintergrund vorberechnen
+warmup.start()
+
+############################################################################################
+# HTTP: Kompression, ETags und Figurensätze
+
+# gzip/brotli ab PXS_COMPRESS_MIN_SIZE Bytes, ETag + 304 für GET-Antworten
+http.install(server)
+
+@server.route('/figures/<name>')
+def figure_set(name):
+    """Figures that only depend on the dataset version; revalidated by ETag on every load"""
+    if name not in FIGURE_SETS:
+        abort(404)
+    try:
+        quality = qc.quality_level(request.args.get('quality'))
+    except ValueError:
+        abort(400)
+    return Response(figure_set_json(name, quality), mimetype='application/json', headers={'Cache-Control': 'no-cache'})
+
+# Lesende REST-Schnittstelle /api/v1 auf die Stationsdaten (siehe pxs/api.py)
+api.install(server)
+
+# Gestreamter CSV-/Parquet-Export der Dashboard-Auswahl (siehe pxs/export.py)
+export.install(server)
+
 ############################################################################################
 # Run App
 if __name__ == '__main__':
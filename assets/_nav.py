@@ -1,7 +1,9 @@
-from dash import html
+from dash import html, dcc
 import dash_bootstrap_components as dbc
 import dash
 
+from pxs.qc import QUALITY_LEVELS
+
 _nav = dbc.Container([
     dbc.Row([
         dbc.Col([
@@ -25,6 +27,19 @@ _nav = dbc.Container([
                 pills=True,
                 class_name="my-nav ms-auto"  # <-- schiebt nach rechts
             )
-        ], className="d-flex justify-content-end", width=True)  # <-- rechts im Grid
+        ], className="d-flex justify-content-end", width=True),  # <-- rechts im Grid
+
+        dbc.Col([
+            # Globaler Filter: Werte aus Zeilen unter diesem QUALITAETS_NIVEAU gelten auf allen Seiten als fehlend
+            dcc.Dropdown(
+                id='min-quality',
+                options=[{'label': label, 'value': level} for level, label in QUALITY_LEVELS.items()],
+                value=0,
+                clearable=False,
+                persistence=True,
+                persistence_type='session',
+                style={'width': '260px'}
+            )
+        ], width="auto", className="d-flex align-items-center")
     ], className="nav-bar")
 ], fluid=True)
\ No newline at end of file
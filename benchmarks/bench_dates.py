@@ -0,0 +1,61 @@
+"""Benchmark: Datumsdekodierung per String-Parsing vs. arithmetisch aus MESS_DATUM.
+
+    python benchmarks/bench_dates.py [--repeat-rows 20]
+
+Alle Stationen aus data/ werden zusammengehängt (optional vervielfacht) und
+mit jeder Methode dekodiert; ausgegeben wird die beste von mehreren Laufzeiten.
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pxs.dates import decode_days, days_from_ddmmyyyy, days_from_yyyymmdd  # noqa: E402
+
+
+def load_columns(repeat_rows):
+    frames = [pd.read_csv(f, skipinitialspace=True, usecols=[0, 1]) for f in sorted(Path("data").glob("*.csv"))]
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = ["DATE", "MESS_DATUM"]
+    df = pd.concat([df] * repeat_rows, ignore_index=True)
+    return df["DATE"].to_numpy(), df["MESS_DATUM"].to_numpy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat-rows", type=int, default=1, help="Daten so oft vervielfachen")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    date_strings, mess_datum = load_columns(args.repeat_rows)
+    iso_strings = pd.to_datetime(date_strings, format="%d.%m.%Y").strftime("%Y-%m-%d").to_numpy()
+
+    candidates = {
+        # bisheriger Weg der Loader
+        "pd.to_datetime(DATE, format='%d.%m.%Y')": lambda: pd.to_datetime(date_strings, format="%d.%m.%Y", errors="coerce"),
+        # bisheriger Weg in Dashboard.update_plot (ISO-Strings aus dem dcc.Store)
+        "pd.to_datetime(ISO-Strings)": lambda: pd.to_datetime(iso_strings, errors="coerce"),
+        "days_from_ddmmyyyy(DATE)": lambda: days_from_ddmmyyyy(date_strings.astype(str)),
+        "days_from_yyyymmdd(MESS_DATUM)": lambda: days_from_yyyymmdd(mess_datum),
+        "decode_days (mit Fallback)": lambda: decode_days(mess_datum, lambda: date_strings),
+    }
+
+    expected = (pd.to_datetime(date_strings, format="%d.%m.%Y").to_numpy().astype("datetime64[D]")
+                - np.datetime64("1970-01-01", "D")).astype(np.int32)
+    assert (decode_days(mess_datum, lambda: date_strings) == expected).all()
+
+    print(f"{len(date_strings)} Zeilen, davon {(mess_datum == -999).sum()} ohne MESS_DATUM")
+    baseline = None
+    for label, func in candidates.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=args.runs))
+        baseline = baseline or seconds
+        print(f"{label:45s} {seconds * 1000:9.2f} ms   {baseline / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: Größe und Kodierzeit einer Tages-Figur (Standard: Straubing, ~24k Punkte).
+
+    python benchmarks/bench_figures.py [--station Straubing] [--column LUFTTEMPERATUR]
+
+Verglichen werden JSON-Listen (Floats und ISO-Daten), die Standardkodierung von
+plotly (Werte als typisierte Arrays, Daten als ISO-Strings) und
+`pxs.serialize.compact_figure` (auch die Daten als Epoch-Millisekunden), jeweils
+mit dem json-Modul und, falls installiert, mit orjson.
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pxs.serialize import compact_figure  # noqa: E402
+from pxs.store import stations  # noqa: E402
+
+
+def build(station, column):
+    return go.Figure(go.Scatter(x=station.dates(), y=station.series(column), mode="lines"),
+                     layout={"xaxis": {"type": "date"}})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--station", default="Straubing")
+    parser.add_argument("--column", default="LUFTTEMPERATUR")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    station = stations.get(args.station)
+    dates = [str(d) for d in station.dates()]
+    values = [None if v != v else float(v) for v in station.series(args.column)]
+
+    engines = ["json"]
+    try:
+        import orjson  # noqa: F401
+        engines.append("orjson")
+    except ImportError:
+        print("orjson nicht installiert, nur json-Modul")
+
+    candidates = {
+        "JSON-Listen (Floats, ISO-Daten)": lambda engine: json.dumps({"data": [{"x": dates, "y": values}]}),
+    }
+    for engine in engines:
+        candidates[f"plotly Standard [{engine}]"] = lambda engine: pio.to_json(build(station, args.column), engine=engine)
+        candidates[f"compact_figure [{engine}]"] = \
+            lambda engine: pio.to_json(compact_figure(build(station, args.column)), engine=engine)
+
+    print(f"{args.station}/{args.column}: {len(station)} Punkte")
+    baseline = None
+    for label, func in candidates.items():
+        engine = label[label.rfind("[") + 1:-1] if "[" in label else "json"
+        size = len(func(engine))
+        seconds = min(timeit.repeat(lambda: func(engine), number=1, repeat=args.runs))
+        baseline = baseline or (size, seconds)
+        print(f"{label:35s} {size / 1024:8.0f} KiB {baseline[0] / size:5.1f}x   "
+              f"{seconds * 1000:7.1f} ms {baseline[1] / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
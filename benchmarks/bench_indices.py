@@ -0,0 +1,38 @@
+"""Benchmark: Klimaindizes aller Stationen und Jahreszeiten (pxs.indices.compute).
+
+    python benchmarks/bench_indices.py [--runs 5]
+
+Berechnet alle Indizes für jede Station in data/ und jeden Zeitraum ohne Cache
+und gibt die beste Laufzeit sowie die Zahl der Stations-Jahrzehnte aus.
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pxs.indices import SEASONS, compute  # noqa: E402
+from pxs.store import stations  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    loaded = list(stations.load(stations.names()).values())
+    decades = sum(len(station) / 3652.5 for station in loaded)
+
+    def run():
+        for station in loaded:
+            for season in SEASONS:
+                compute(station, season)
+
+    seconds = min(timeit.repeat(run, number=1, repeat=args.runs))
+    print(f"{len(loaded)} Stationen, {decades:.1f} Stations-Jahrzehnte, {len(SEASONS)} Zeiträume")
+    print(f"alle Indizes: {seconds * 1000:9.2f} ms   ({seconds / decades * 1000:.2f} ms je Stations-Jahrzehnt)")
+
+
+if __name__ == "__main__":
+    main()
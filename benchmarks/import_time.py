@@ -0,0 +1,66 @@
+"""Importzeit von app.py (Start eines Workers), aufgeschlüsselt nach Paketen.
+
+    python benchmarks/import_time.py [--top 15] [--runs 3]
+
+Startet ``python -X importtime -c "import app"`` in einem frischen Prozess
+(ohne Warm-up und Watcher) und gibt die Wandzeit sowie die teuersten
+Top-Level-Pakete aus. Zusätzlich wird angezeigt, ob die schweren Bibliotheken
+(statsmodels, sklearn, scipy, plotly.express) schon beim Start geladen werden.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ["statsmodels", "sklearn", "scipy", "plotly.express"]
+
+
+def import_app():
+    """Imports app in a fresh interpreter; returns (seconds, {module: (self_us, cumulative_us, depth)})."""
+    env = dict(os.environ, PXS_WARMUP="0", PXS_WATCH_INTERVAL="0")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    seconds = time.perf_counter() - start
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return seconds, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="so viele Pakete anzeigen")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    runs = [import_app() for _ in range(args.runs)]
+    seconds, modules = min(runs, key=lambda run: run[0])
+
+    print(f"import app: {seconds * 1000:.0f} ms (beste von {args.runs}), {len(modules)} Module")
+    print()
+    # Eigenzeit aller Untermodule dem Top-Level-Paket zurechnen
+    packages = {}
+    for name, (self_us, _, _) in modules.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"{'Paket':30s} {'Eigenzeit':>12s}")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:30s} {self_us / 1000:9.1f} ms")
+    print()
+    for name in HEAVY:
+        loaded = name in modules
+        print(f"{name:30s} {'beim Start geladen' if loaded else 'aufgeschoben'}")
+
+
+if __name__ == "__main__":
+    main()
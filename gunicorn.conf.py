@@ -0,0 +1,24 @@
+# Start: gunicorn -c gunicorn.conf.py app:server
+#
+# Der Master parst alle Stationen genau einmal und legt die Spalten als .npy-Dateien
+# in PXS_SHARED_DIR ab. Jeder Worker mappt sie beim Import von app.py nur lesend,
+# dadurch bleibt der Speicherverbrauch auch mit mehr Workern flach.
+import os
+import tempfile
+
+bind = os.environ.get("PXS_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+
+_default_dir = "/dev/shm/pxs" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "pxs")
+os.environ.setdefault("PXS_SHARED_DIR", _default_dir)
+# Callback-Ergebnisse (pxs.memo) als Dateien neben den Spalten, damit alle Worker sie teilen
+os.environ.setdefault("PXS_MEMO", "filesystem")
+
+
+def on_starting(server):
+    from pxs.store import stations
+
+    # Parst nur, wenn die Spalten noch nicht (oder veraltet) veröffentlicht sind;
+    # auch der Master behält danach nur die Mappings, nicht die geparsten Kopien
+    stations.open(os.environ["PXS_SHARED_DIR"])
+    server.log.info("Stationsdaten veröffentlicht in %s", os.environ["PXS_SHARED_DIR"])
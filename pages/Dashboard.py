@@ -7,26 +7,64 @@
 # Alles wird in Python definiert, und Dash erzeugt daraus automatisch die Web-Oberfläche.
 
 import dash
-from dash import html, dcc, dash_table, Input, Output, State, callback
+from dash import html, dcc, dash_table, Input, Output, State, Patch, callback, ctx, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 import base64
 import io
 import os
-from pathlib import Path
+
+from pxs import climatology, executor, gapfill, warmup
+from pxs.export import export_url, parquet_available
+from pxs.figures import trace_type, webgl_figure
+from pxs.selection import column_xy, common_range, filled_rows, window_days
+from pxs.serialize import compact_figure, date_attributes, typed_array
+from pxs.store import stations, DATE_COLUMN, day_years, year_start
 
 # ----- Seitendefinition ------------------------------------------------------------------
 dash.register_page(__name__, path="/")
 
-# Funktion um CSV-Dateien aus dem data-Ordner zu laden
-def get_csv_files_from_data_folder():
-    """Liest alle CSV-Dateien aus dem 'data' Ordner"""
-    data_folder = Path("data")
-    if not data_folder.exists():
-        return []
-    csv_files = [f.stem for f in data_folder.glob("*.csv")]
-    return csv_files
+def table_records(station):
+    """Zeilen und Spalten der Datentabelle (Rohwerte inkl. -999), bis neue Zeilen kommen im Cache"""
+    def build():
+        df = station.frame(clean=False)
+        df[DATE_COLUMN] = df[DATE_COLUMN].dt.strftime('%Y-%m-%d')
+        return df.to_dict("records"), [{"name": i, "id": i} for i in df.columns]
+    return station.cached("table-records", build)
+
+# Tabellen der vorgeladenen Stationen schon beim Start aufbereiten
+warmup.register("table-records", lambda: [table_records(stations.get(name)) for name in warmup.warmup_stations()])
+
+def station_table(filename):
+    """(Name, Spalten, Tabelle) einer Station; Spalten None, wenn sie nicht geladen werden konnte"""
+    try:
+        # Die Spalten liegen als Arrays im Stationsspeicher, im Browser-Store
+        # reicht der Stationsname
+        station = stations.get(filename)
+        
+        # Tabelle für Tab 2 erstellen (Rohwerte inkl. -999)
+        records, columns = table_records(station)
+        return filename, station.names, html.Div([
+            html.H5(filename, className="mt-3"),
+            dash_table.DataTable(
+                data=records,
+                columns=columns,
+                fixed_rows={"headers": True},
+                style_table={
+                    "height": "400px",
+                    "overflowY": "auto",
+                    "overflowX": "auto"
+                },
+                style_cell={"textAlign": "left"},
+            )
+        ])
+    except Exception as e:
+        return filename, None, html.Div([
+            html.H5(filename, style={"color": "red"}),
+            html.P(f"Fehler beim Laden: {str(e)}")
+        ])
+
 
 # == LAYOUT ============================================================================
 layout = dbc.Container([
@@ -80,6 +118,31 @@ layout = dbc.Container([
                                 value=[],
                                 style={"margin": "10px 0"}
                             ),
+                            dcc.Checklist(
+                                id="gap-fill",
+                                options=["Fill Gaps"],
+                                value=[],
+                                style={"margin": "10px 0"}
+                            ),
+                            dcc.Dropdown(
+                                id="gap-fill-method",
+                                options=[{"label": label, "value": method} for method, label in gapfill.METHODS.items()],
+                                value="linear",
+                                clearable=False,
+                            ),
+                            dcc.Checklist(
+                                id="anomalies",
+                                options=["Anomalies"],
+                                value=[],
+                                style={"margin": "10px 0"}
+                            ),
+                            dcc.Dropdown(
+                                id="anomaly-reference",
+                                options=[{"label": label, "value": key}
+                                         for key, (label, _, _) in climatology.REFERENCE_PERIODS.items()],
+                                value="all",
+                                clearable=False,
+                            ),
                         ], width=6),
                         dbc.Col([ 
                             html.Label("Moving Average (Years)"),
@@ -110,6 +173,16 @@ layout = dbc.Container([
                     ),
                 ], width=12),
             ]),
+
+            # Export der aktuellen Auswahl, gestreamt vom Server (pxs/export.py)
+            dbc.Row([
+                dbc.Col([
+                    dbc.Button("Export CSV", id="export-csv", href="", external_link=True, download="selection.csv",
+                               disabled=True, color="secondary", className="me-2"),
+                    dbc.Button("Export Parquet", id="export-parquet", href="", external_link=True,
+                               download="selection.parquet", disabled=True, color="secondary"),
+                ], width=12, style={"margin": "0 15px 15px"}),
+            ]),
         ]),
         
         # Tab 2: Tabellen-Ansicht
@@ -123,11 +196,12 @@ layout = dbc.Container([
 # == CALLBACK: CSV-Dateien aus Ordner laden ============================================
 @callback(
     Output("csv-file-selector", "options"),
-    Input("tabs", "value")  # Lädt beim Start/Tab-Wechsel
+    Input("tabs", "value"),  # Lädt beim Start/Tab-Wechsel
+    Input("dataset-version", "data"),
 )
-def load_csv_options(_):
+def load_csv_options(_, version):
     """Füllt die Checkbox-Liste mit verfügbaren CSV-Dateien"""
-    csv_files = get_csv_files_from_data_folder()
+    csv_files = stations.names()
     return [{"label": f, "value": f} for f in csv_files]
 
 
@@ -137,74 +211,63 @@ def load_csv_options(_):
     Output("columns", "options"),
     Output("output-data-upload", "children"),
     Input("csv-file-selector", "value"),
+    Input("dataset-version", "data"),
 )
-def load_selected_csvs(selected_files):
+def load_selected_csvs(selected_files, version):
     """Lädt alle ausgewählten CSV-Dateien"""
     if not selected_files:
         return None, [], html.Div("No Data choiced")
     
-    data_folder = Path("data")
-    all_data = {}
-    all_columns = set()
-    tables = []
-    
-    for filename in selected_files:
-        filepath = data_folder / f"{filename}.csv"
-        try:
-            df = pd.read_csv(filepath)
-            
-            # Erste Spalte als Datetime behandeln und sortieren
-            x_column = df.columns[0]
-            try:
-                # Versuche verschiedene Datumsformate
-                if df[x_column].dtype == 'object':
-                    # Format DD.MM.YYYY (z.B. 10.06.2011)
-                    if '.' in str(df[x_column].iloc[0]):
-                        df[x_column] = pd.to_datetime(df[x_column], format='%d.%m.%Y', errors='coerce')
-                    # Format YYYYMMDD (z.B. 20110610)
-                    elif len(str(df[x_column].iloc[0])) == 8:
-                        df[x_column] = pd.to_datetime(df[x_column], format='%Y%m%d', errors='coerce')
-                    else:
-                        df[x_column] = pd.to_datetime(df[x_column], errors='coerce')
-                else:
-                    df[x_column] = pd.to_datetime(df[x_column], errors='coerce')
-                
-                df = df.sort_values(by=x_column).reset_index(drop=True)
-                # Als String speichern für JSON-Kompatibilität
-                df[x_column] = df[x_column].dt.strftime('%Y-%m-%d')
-            except:
-                pass
-            
-            all_data[filename] = df.to_dict("records")
-            all_columns.update(df.columns.tolist())
-            
-            # Tabelle für Tab 2 erstellen
-            tables.append(html.Div([
-                html.H5(filename, className="mt-3"),
-                dash_table.DataTable(
-                    data=df.to_dict("records"),
-                    columns=[{"name": i, "id": i} for i in df.columns],
-                    fixed_rows={"headers": True},
-                    style_table={
-                        "height": "400px",
-                        "overflowY": "auto",
-                        "overflowX": "auto"
-                    },
-                    style_cell={"textAlign": "left"},
-                )
-            ]))
-        except Exception as e:
-            tables.append(html.Div([
-                html.H5(filename, style={"color": "red"}),
-                html.P(f"Fehler beim Laden: {str(e)}")
-            ]))
-    
-    # Spaltenoptionen für Dropdown (ohne erste Spalte = X-Achse)
+    # Fehlende Stationen parallel parsen, danach die Tabellen parallel aufbereiten
+    stations.load(selected_files)
+    results = executor.map_stations(station_table, selected_files)
+
+    loaded = [filename for filename, names, _ in results if names is not None]
+    all_columns = set().union(*(names for _, names, _ in results if names is not None))
+    tables = [table for _, _, table in results]
+
+    # Spaltenoptionen für Dropdown
     column_options = sorted(list(all_columns))
     
-    return all_data, column_options, html.Div(tables)
+    return loaded, column_options, html.Div(tables)
 
     
+# Einstellungen, die nur die Werte der vorhandenen Traces ändern
+SETTINGS_INPUTS = {"missing-data", "moving-average-window", "yearly-mean", "min-quality", "anomalies",
+                   "anomaly-reference"}
+
+
+def patch_traces(selected, selected_columns, common_start, common_end, missing_data, window, yearly_mean, min_quality,
+                 anomaly_reference, update_x):
+    """Patch mit neuen y-Werten (und bei Bedarf x) für alle Traces in der Reihenfolge von update_plot"""
+    def station_values(station):
+        rows = station.rows(common_start, common_end)
+        return [column_xy(station, col, rows, missing_data, window, yearly_mean, min_quality,
+                          anomaly_reference=anomaly_reference)
+                for col in selected_columns if col in station.masks]
+
+    values = [xy for station_xy in executor.map_stations(station_values, selected.values()) for xy in station_xy]
+    # Jahresmittel oder fehlende Werte ändern die Punktzahl -> SVG/WebGL wie in der vollen Figur
+    kind = trace_type(sum(len(y) for _, y in values))
+
+    patch = Patch()
+    for index, (x, y) in enumerate(values):
+        # Als typisierte Arrays wie in der vollen Figur, sonst wäre der Patch größer als sie
+        if update_x:
+            for key, value in date_attributes(x).items():
+                patch["data"][index][key] = value
+        patch["data"][index]["type"] = kind
+        patch["data"][index]["y"] = typed_array(y)
+    return patch
+
+
+def value_title(anomaly_reference):
+    """Beschriftung der y-Achse"""
+    if not anomaly_reference:
+        return "Wert"
+    return f"Abweichung vom Normalwert ({climatology.REFERENCE_PERIODS[anomaly_reference][0]})"
+
+
 # == CALLBACK: Plot zeichnen ============================================================
 @callback(
     Output("line-plot", "figure"),
@@ -216,10 +279,16 @@ def load_selected_csvs(selected_files):
     Input("common-timerange","value"),
     Input("plots","value"),
     Input("yearly-mean","value"),
-    Input("snowdays","value")
+    Input("snowdays","value"),
+    Input("min-quality", "value"),
+    Input("gap-fill", "value"),
+    Input("gap-fill-method", "value"),
+    Input("anomalies", "value"),
+    Input("anomaly-reference", "value")
 )   
-def update_plot(all_data, selected_columns, missing_data, window_years,common_timerange,plot_type,yearly_mean,snowdays):
-    if not all_data or not selected_columns and not snowdays:
+def update_plot(selected_files, selected_columns, missing_data, window_years,common_timerange,plot_type,yearly_mean,snowdays,
+                min_quality, gap_fill, fill_method, anomalies, anomaly_reference):
+    if not selected_files or not selected_columns and not snowdays:
         return {
             "data": [],
             "layout": {
@@ -229,90 +298,122 @@ def update_plot(all_data, selected_columns, missing_data, window_years,common_ti
             }
         }
 
-    common_start=None
-    common_end=None
-    if common_timerange:
-        for filename, data in all_data.items():
-            df = pd.DataFrame(data)
-            x_col = df.columns[0]
-            df[x_col] = pd.to_datetime(df[x_col], errors='coerce')
-            df = df.sort_values(by=x_col).reset_index(drop=True)
-            if missing_data:
-                df = df.replace(-999, float('nan'))
+    selected = stations.load(selected_files)
 
-            if common_end is None and common_end is None:
-                common_start = df[x_col].min() 
-                common_end = df[x_col].max() 
-            common_start = df[x_col].min()  if common_start < df[x_col].min()  else common_start
-            common_end = df[x_col].max()  if common_end > df[x_col].max()  else common_end
+    # Gemeinsamer Zeitraum: spätester Beginn bis frühestes Ende (als Tagesnummern)
+    common_start, common_end = common_range(selected) if common_timerange else (None, None)
 
+    window = window_days(window_years)
+    fill_method = fill_method if gap_fill else None
+    # Abweichung vom Normalwert des Kalendertags (pxs/climatology.py)
+    anomaly_reference = anomaly_reference if anomalies else None
 
-    window_days = int(window_years * 365) if window_years > 0 else 0
-     
+    # Nur eine Einstellung geändert -> gleiche Traces, nur x/y neu (Patch statt ganzer Figur).
+    # Mit Lückenfüllung hängt die Zahl der Traces (gefüllte Punkte) von den Werten ab
+    # Schneetage hängen nur vom Qualitätsfilter ab -> dann volle Figur unten
+    patchable = SETTINGS_INPUTS - {"min-quality"} if snowdays else SETTINGS_INPUTS
+    if set(ctx.triggered_prop_ids.values()) <= patchable and plot_type == "line-plot" and not fill_method:
+        if snowdays or (ctx.triggered_id == "moving-average-window" and yearly_mean):
+            # Schneetage und Jahresmittel hängen nicht vom gleitenden Mittel ab
+            return no_update
+        if ctx.triggered_id == "anomaly-reference" and not anomalies:
+            return no_update
+        patch = patch_traces(selected, selected_columns, common_start, common_end,
+                             missing_data, window, yearly_mean, min_quality, anomaly_reference,
+                             update_x=bool(yearly_mean) or ctx.triggered_id == "yearly-mean")
+        if ctx.triggered_id in ("anomalies", "anomaly-reference"):
+            patch["layout"]["yaxis"]["title"]["text"] = value_title(anomaly_reference)
+        return patch
 
-    fig = go.Figure()
-
-    for filename, data in all_data.items():
-        df = pd.DataFrame(data)
-        x_column = df.columns[0]
-        df[x_column] = pd.to_datetime(df[x_column], errors='coerce')
-        df = df.sort_values(by=x_column).reset_index(drop=True)
-
-        if missing_data:
-            df = df.replace(-999, float('nan'))
-
-        if common_timerange and common_start is not None and common_end is not None:
-            df = df[(df[x_column] >= common_start) & (df[x_column] <= common_end)]
-    
+    def station_traces(item):
+        filename, station = item
+        # Zeilenbereich als Slice -> alle Spalten sind Views ohne Kopie
+        rows = station.rows(common_start, common_end)
+        days = station.day[rows]
+        years = day_years(days)
 
         if  snowdays:
-            df["year"] = df[x_column].dt.year
-            snow_days=df[" SCHNEEHOEHE"].gt(0).groupby(df["year"]).sum()
-            return  fig.add_trace(go.Scatter(
-                        x=snow_days.index,
-                        y=snow_days,
-                        mode="lines"
-                    ))
-
-
+            snow_days = pd.Series(station.series("SCHNEEHOEHE", min_quality=min_quality)[rows] > 0).groupby(years).sum()
+            return [go.Scatter(
+                x=year_start(snow_days.index),
+                y=snow_days.to_numpy(),
+                name=f"{filename} - Snow days",
+                mode="lines"
+            )]
 
+        traces = []
         # Spalten durchgehen
         for col in selected_columns:
             
-            if col in df.columns and col != x_column:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-                df["year"] = df[x_column].dt.year
-                annual_mean = df.groupby("year")[col].mean()
-
-
-                # x = Jahre, y = Mittelwerte
-                x_mean = annual_mean.index
-                y_mean = annual_mean.values
-
-                y = df[col].rolling(window=window_days, center=True, min_periods=1).mean() \
-                    if window_days > 0 else df[col]
-
+            if col in station.masks:
                 if plot_type == "line-plot":
-                    if yearly_mean:
-                        x=x_mean
-                        y=y_mean
-                    else:
-                        x=df[x_column]
-
-                    fig.add_trace(go.Scatter(
+                    x, y = column_xy(station, col, rows, missing_data, window, yearly_mean, min_quality, fill_method,
+                                     anomaly_reference)
+                    traces.append(go.Scatter(
                         x=x,
                         y=y,
                         name=f"{filename} - {col}",
+                        legendgroup=f"{filename} - {col}",
                         mode="lines"
                     ))
+                    if fill_method and not yearly_mean:
+                        # Gefüllte Tageswerte als eigene Punkte markieren
+                        filled = filled_rows(station, col, rows, fill_method, min_quality)
+                        traces.append(go.Scatter(
+                            x=x[filled],
+                            y=y[filled],
+                            name=f"{filename} - {col} (gefüllt)",
+                            legendgroup=f"{filename} - {col}",
+                            mode="markers",
+                            marker={"symbol": "x", "size": 4, "color": "rgba(0, 0, 0, 0.6)"}
+                        ))
+        return traces
+
+    fig = go.Figure()
+
+    # Stationen parallel auswerten, Reihenfolge der Traces bleibt die der Auswahl
+    for traces in executor.map_stations(station_traces, selected.items()):
+        fig.add_traces(traces)
 
 
     fig.update_layout(
         xaxis={"type": "date", "title": "Datum"},
-        yaxis={"title": "Wert"},
+        yaxis={"title": value_title(anomaly_reference)},
         legend={"orientation": "h", "yanchor": "bottom", "y": 1.05, "xanchor": "center", "x": 0.5},
         margin={"l": 40, "r": 40, "t": 80, "b": 120}
     )
 
-    return fig
\ No newline at end of file
+    # Ab PXS_WEBGL_THRESHOLD Punkten WebGL; Daten als typisierte Arrays, Datumsachse als Millisekunden
+    return compact_figure(webgl_figure(fig))
+
+# == CALLBACK: Export-Links ============================================================
+@callback(
+    Output("export-csv", "href"),
+    Output("export-csv", "disabled"),
+    Output("export-parquet", "href"),
+    Output("export-parquet", "disabled"),
+
+    Input("csv-files-data", "data"),
+    Input("columns", "value"),
+    Input("missing-data", "value"),
+    Input("moving-average-window", "value"),
+    Input("common-timerange", "value"),
+    Input("yearly-mean", "value"),
+    Input("min-quality", "value"),
+    Input("gap-fill", "value"),
+    Input("gap-fill-method", "value"),
+    Input("anomalies", "value"),
+    Input("anomaly-reference", "value"),
+)
+def update_export_links(selected_files, selected_columns, missing_data, window_years, common_timerange, yearly_mean,
+                        min_quality, gap_fill, fill_method, anomalies, anomaly_reference):
+    """Links mit den aktuellen Einstellungen; die Daten selbst fließen nicht durch den Callback"""
+    columns = [col for col in selected_columns or [] if col != DATE_COLUMN]
+    if not selected_files or not columns:
+        return "", True, "", True
+    csv, parquet = (dash.get_relative_path(export_url(fmt, selected_files, columns, missing_data,
+                                                      window_years, common_timerange, yearly_mean, min_quality,
+                                                      fill_method if gap_fill else None,
+                                                      anomaly_reference if anomalies else None))
+                    for fmt in ("csv", "parquet"))
+    return csv, False, parquet, not parquet_available()
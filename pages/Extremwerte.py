@@ -0,0 +1,139 @@
+import dash
+from dash import html, dcc, dash_table, Input, Output, callback
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+import numpy as np
+
+from pxs import memo
+from pxs.extremes import COLUMNS, CONFIDENCE, DISTRIBUTIONS, MIN_YEARS, RETURN_PERIODS, analyse, return_levels
+from pxs.store import stations
+
+dash.register_page(__name__, path="/extremes")
+
+# Wiederkehrperioden der Kurve (logarithmisch von knapp 1 bis 200 Jahre)
+CURVE_PERIODS = np.logspace(np.log10(1.05), np.log10(200), 100)
+
+
+def empirical_periods(maxima):
+    """Return periods of the sorted maxima (Gringorten plotting positions)"""
+    n = len(maxima)
+    rank = np.arange(n, 0, -1)
+    return (n + 0.12) / (rank - 0.44)
+
+
+# == LAYOUT ============================================================================
+layout = dbc.Container([
+    dbc.Row([
+        dbc.Col([
+            html.H3(["Extremwerte und Wiederkehrwerte"])
+        ], className="row-titles")
+    ]),
+    dbc.Row([
+        dbc.Col([
+            dcc.Dropdown(id="extremes-station", options=[], placeholder="Station auswählen..."),
+        ], width=3),
+        dbc.Col([
+            dcc.Dropdown(
+                id="extremes-column",
+                options=[{"label": f"{label} ({unit})", "value": key} for key, (label, unit) in COLUMNS.items()],
+                value="NIEDERSCHLAGSHOEHE",
+                clearable=False
+            ),
+        ], width=3),
+        dbc.Col([
+            dcc.Dropdown(
+                id="extremes-distribution",
+                options=[{"label": label, "value": key} for key, label in DISTRIBUTIONS.items()],
+                value="gev",
+                clearable=False
+            ),
+        ], width=2),
+        dbc.Col([
+            dcc.Input(id="extremes-start", type="number", placeholder="von Jahr", debounce=True,
+                      style={"width": "45%", "marginRight": "5%"}),
+            dcc.Input(id="extremes-end", type="number", placeholder="bis Jahr", debounce=True,
+                      style={"width": "45%"}),
+        ], width=4),
+    ], className="mb-4"),
+    dcc.Loading([
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id="extremes-plot", style={"height": "550px"})
+            ], width=8),
+            dbc.Col([
+                html.H5("Wiederkehrwerte"),
+                dash_table.DataTable(
+                    id="extremes-table",
+                    columns=[{"name": "Jahre", "id": "period"}, {"name": "Wert", "id": "level"},
+                             {"name": "unten", "id": "lower"}, {"name": "oben", "id": "upper"}],
+                    data=[],
+                    style_cell={"textAlign": "left"},
+                ),
+                html.P(id="extremes-info", className="mt-3"),
+            ], width=4),
+        ]),
+    ]),
+], fluid=True)
+
+
+# == CALLBACK: Stationen ===============================================================
+@callback(
+    Output("extremes-station", "options"),
+    Input("dataset-version", "data"),
+)
+def load_station_options(version):
+    return [{"label": name, "value": name} for name in stations.names()]
+
+
+# == CALLBACK: Wiederkehrwerte =========================================================
+@callback(
+    Output("extremes-plot", "figure"),
+    Output("extremes-table", "data"),
+    Output("extremes-info", "children"),
+    Input("extremes-station", "value"),
+    Input("extremes-column", "value"),
+    Input("extremes-distribution", "value"),
+    Input("extremes-start", "value"),
+    Input("extremes-end", "value"),
+    Input("min-quality", "value"),
+)
+@memo.memoize()
+def update_return_levels(name, column, distribution, start_year, end_year, min_quality):
+    """Return level plot with bootstrap band and empirical annual maxima"""
+    if not name:
+        return {"data": [], "layout": {"title": "Bitte Station auswählen"}}, [], ""
+    station = stations.get(name)
+    label, unit = COLUMNS[column]
+    if column not in station.masks:
+        return {"data": [], "layout": {"title": f"{name}: keine Spalte {column}"}}, [], ""
+
+    # Fit und Bootstrap (Prozess-Pool) pro Station, Spalte, Verteilung und Zeitraum gecacht
+    result = analyse(station, column, distribution, start_year, end_year, min_quality)
+    if result is None:
+        return {"data": [], "layout": {"title": f"{name}: weniger als {MIN_YEARS} vollständige Jahre"}}, [], ""
+
+    maxima = np.sort(result["maxima"])
+    curve = return_levels(distribution, result["params"], CURVE_PERIODS)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=RETURN_PERIODS, y=result["upper"], mode="lines", line=dict(width=0),
+                             showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=RETURN_PERIODS, y=result["lower"], mode="lines", line=dict(width=0),
+                             fill="tonexty", fillcolor="rgba(31, 119, 180, 0.2)",
+                             name=f"{CONFIDENCE:.0%}-Konfidenzintervall"))
+    fig.add_trace(go.Scatter(x=CURVE_PERIODS, y=curve, mode="lines", name=f"{DISTRIBUTIONS[distribution]}-Anpassung"))
+    fig.add_trace(go.Scatter(x=empirical_periods(maxima), y=maxima, mode="markers", name="Jahresmaxima"))
+
+    years = result["years"]
+    fig.update_layout(
+        title=f"{name}: {label} – Wiederkehrwerte ({years[0]} - {years[-1]})",
+        xaxis={"title": "Wiederkehrperiode (Jahre)", "type": "log"},
+        yaxis={"title": unit},
+        template="plotly_white",
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.02}
+    )
+
+    table = [{"period": int(period), "level": round(float(level), 1), "lower": round(float(lower), 1),
+              "upper": round(float(upper), 1)}
+             for period, level, lower, upper in zip(RETURN_PERIODS, result["levels"], result["lower"], result["upper"])]
+    info = f"{len(years)} Jahresmaxima, Parameter: " + ", ".join(f"{value:.3g}" for value in result["params"])
+    return fig, table, info
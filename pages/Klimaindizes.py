@@ -0,0 +1,132 @@
+import dash
+from dash import html, dcc, dash_table, Input, Output, callback
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+import pandas as pd
+
+from pxs import executor, memo, warmup
+from pxs.indices import INDICES, SEASONS, indices
+from pxs.store import stations
+
+dash.register_page(__name__, path="/indices")
+
+# Jahreswerte aller Stationen vorberechnen
+warmup.register("climate-indices", lambda: [indices(stations.get(name))
+                                            for name in warmup.warmup_stations()])
+
+
+def decade_table(tables, index):
+    """Mittelwert des Index je Station und Jahrzehnt (Zeilen für die DataTable)"""
+    rows = []
+    for name, table in tables.items():
+        values = table[index].dropna()
+        decades = values.groupby(values.index // 10 * 10).agg(["mean", "count"])
+        for decade, (mean, count) in decades.iterrows():
+            rows.append({"station": name, "decade": f"{decade}er", "mean": round(float(mean), 1), "years": int(count)})
+    return rows
+
+
+# == LAYOUT ============================================================================
+layout = dbc.Container([
+    dbc.Row([
+        dbc.Col([
+            html.H3(["Klimaindizes"])
+        ], className="row-titles")
+    ]),
+    dbc.Row([
+        dbc.Col([
+            dcc.Dropdown(
+                id="indices-stations",
+                options=[],
+                value=[],
+                multi=True,
+                placeholder="Station(en) auswählen..."
+            ),
+        ], width=4),
+        dbc.Col([
+            dcc.Dropdown(
+                id="indices-index",
+                options=[{"label": f"{label} ({unit})", "value": key} for key, (label, unit, _) in INDICES.items()],
+                value="frost_days",
+                clearable=False
+            ),
+        ], width=4),
+        dbc.Col([
+            dcc.Dropdown(
+                id="indices-season",
+                options=[{"label": label, "value": key} for key, (label, _) in SEASONS.items()],
+                value="year",
+                clearable=False
+            ),
+        ], width=4),
+    ], className="mb-4"),
+    dbc.Row([
+        dbc.Col([
+            dcc.Graph(id="indices-plot", style={"height": "500px"})
+        ], width=8),
+        dbc.Col([
+            html.H5("Mittel je Jahrzehnt"),
+            dash_table.DataTable(
+                id="indices-decades",
+                columns=[{"name": "Station", "id": "station"}, {"name": "Jahrzehnt", "id": "decade"},
+                         {"name": "Mittel", "id": "mean"}, {"name": "Jahre", "id": "years"}],
+                data=[],
+                sort_action="native",
+                style_table={"height": "460px", "overflowY": "auto"},
+                style_cell={"textAlign": "left"},
+            )
+        ], width=4),
+    ]),
+], fluid=True)
+
+
+# == CALLBACK: Stationen ===============================================================
+@callback(
+    Output("indices-stations", "options"),
+    Output("indices-stations", "value"),
+    Input("dataset-version", "data"),
+)
+def load_station_options(version):
+    names = stations.names()
+    return [{"label": name, "value": name} for name in names], names
+
+
+# == CALLBACK: Index-Plot und Tabelle ==================================================
+@callback(
+    Output("indices-plot", "figure"),
+    Output("indices-decades", "data"),
+    Input("indices-stations", "value"),
+    Input("indices-index", "value"),
+    Input("indices-season", "value"),
+    Input("min-quality", "value"),
+)
+@memo.memoize()
+def update_indices(selected_files, index, season, min_quality):
+    """Index per year for the selected stations, with decade means"""
+    if not selected_files:
+        return {"data": [], "layout": {"title": "Bitte Station(en) auswählen"}}, []
+
+    selected = stations.load(selected_files)
+    # Indizes der Stationen parallel berechnen (bzw. aus dem Cache)
+    tables = dict(zip(selected, executor.map_stations(
+        lambda station: indices(station, season, min_quality), selected.values())))
+
+    label, unit, _ = INDICES[index]
+    fig = go.Figure()
+    for name, table in tables.items():
+        values = table[index]
+        fig.add_trace(go.Scatter(x=values.index, y=values.to_numpy(), mode="lines+markers", name=name))
+        # Gleitendes 10-Jahres-Mittel als Orientierung
+        smooth = pd.Series(values).rolling(10, center=True, min_periods=5).mean()
+        fig.add_trace(go.Scatter(x=smooth.index, y=smooth.to_numpy(), mode="lines", name=f"{name} (10 Jahre)",
+                                 line=dict(dash="dash")))
+
+    fig.update_layout(
+        title=f"{label} – {SEASONS[season][0]}",
+        xaxis={"title": "Jahr"},
+        yaxis={"title": unit},
+        template="plotly_white",
+        hovermode="x unified",
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.02}
+    )
+    return fig, decade_table(tables, index)
@@ -1,42 +1,14 @@
 import dash
 from dash import html, dcc, dash_table, Input, Output, callback
 import dash_bootstrap_components as dbc
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
-dash.register_page(__name__)
-
-#Dataframe vorbereiten
-df_A = pd.read_csv('data/Arber.csv', sep=r',\s*', engine='python')
-df_St = pd.read_csv('data/Straubing.csv', sep=r',\s*', engine='python')
-df_Sc = pd.read_csv('data/Schorndorf.csv', sep=r',\s*', engine='python')
+from pxs import gapfill, memo, warmup
+from pxs.views import CORRELATION_COLUMNS, heatmap_view
 
-df_A['DATE'] = pd.to_datetime(df_A['DATE'], errors='coerce')
-df_St['DATE'] = pd.to_datetime(df_St['DATE'], errors='coerce')
-df_Sc['DATE'] = pd.to_datetime(df_Sc['DATE'], errors='coerce')
-
-#Dataframe über 18 Jahre vorbereiten
-df_A = df_A[(df_A['DATE'].dt.year >= 1997) & (df_A['DATE'].dt.year <= 2015)]
-df_St = df_St[(df_St['DATE'].dt.year >= 1997) & (df_St['DATE'].dt.year <= 2015)]
-df_Sc = df_Sc[(df_Sc['DATE'].dt.year >= 1997) & (df_Sc['DATE'].dt.year <= 2015)]
+dash.register_page(__name__)
 
-# Dictionary mit allen verfügbaren Spalten für Korrelationen
-available_columns = {
-    'LUFTTEMPERATUR': 'Lufttemperatur',
-    'NIEDERSCHLAGSHOEHE': 'Niederschlagshöhe',
-    'LUFTTEMPERATUR_MAXIMUM': 'Lufttemperatur Maximum',
-    'LUFTTEMPERATUR_MINIMUM': 'Lufttemperatur Minimum',
-    'WINDSPITZE_MAXIMUM': 'Windspitze Maximum',
-    'SCHNEEHOEHE': 'Schneehöhe',
-    'DAMPFDRUCK': 'Dampfdruck',
-    'BEDECKUNGSGRAD': 'Bedeckungsgrad',
-    'WINDGESCHWINDIGKEIT': 'Windgeschwindigkeit',
-    'SONNENSCHEINDAUER': 'Sonnenscheindauer',
-    'LUFTDRUCK_STATIONSHOEHE': 'Luftdruck Stationshöhe',
-    'REL_FEUCHTE': 'Relative Feuchte',
-    'LUFTTEMP_AM_ERDB_MINIMUM': 'Lufttemperatur am Erdboden Minimum'
-}
+# Standardauswahl der Seite vorberechnen
+warmup.register('correlation-heatmap', lambda: heatmap_view('LUFTTEMPERATUR'))
 
 layout = dbc.Container([
     dbc.Row([
@@ -48,10 +20,23 @@ layout = dbc.Container([
         dbc.Col([
             dcc.Dropdown(
                 id='correlation-column-dropdown',
-                options=[{'label': v, 'value': k} for k, v in available_columns.items()],
+                options=[{'label': v, 'value': k} for k, v in CORRELATION_COLUMNS.items()],
                 value='LUFTTEMPERATUR',
                 clearable=False,
                 style={'width': '400px'}
+            ),
+            dcc.Checklist(
+                id='correlation-gap-fill',
+                options=[{'label': 'Lücken füllen', 'value': 'fill'}],
+                value=[],
+                style={'margin': '10px 0'}
+            ),
+            dcc.Dropdown(
+                id='correlation-gap-fill-method',
+                options=[{'label': label, 'value': method} for method, label in gapfill.METHODS.items()],
+                value='linear',
+                clearable=False,
+                style={'width': '400px'}
             )
         ], width=12)
     ]),
@@ -64,30 +49,13 @@ layout = dbc.Container([
 
 @callback(
     Output('correlation-heatmap', 'figure'),
-    Input('correlation-column-dropdown', 'value')
+    Input('correlation-column-dropdown', 'value'),
+    Input('dataset-version', 'data'),
+    Input('min-quality', 'value'),
+    Input('correlation-gap-fill', 'value'),
+    Input('correlation-gap-fill-method', 'value')
 )
-def update_heatmap(selected_column):
-    # Merge dataframes
-    df_merged = df_A[['DATE', selected_column]] \
-        .merge(df_St[['DATE', selected_column]], on='DATE', how='inner', suffixes=('_arber', '_straubing')) \
-        .merge(df_Sc[['DATE', selected_column]], on='DATE', how='inner')
-    
-    df_merged.rename(columns={selected_column: f'{selected_column}_schorndorf'}, inplace=True)
-    
-    # Calculate correlation matrix
-    corr_matrix = df_merged[[f'{selected_column}_arber',
-                              f'{selected_column}_straubing',
-                              f'{selected_column}_schorndorf']].corr()
-    
-    # Create heatmap
-    fig = px.imshow(
-        corr_matrix,
-        text_auto=True,
-        color_continuous_scale='RdBu_r',
-        zmin=-1,
-        zmax=1,
-        aspect="auto",
-        title=f'Korrelationsmatrix {available_columns[selected_column]}: 1997 - 2015'
-    )
-    
-    return fig
\ No newline at end of file
+@memo.memoize()
+def update_heatmap(selected_column, version, min_quality, gap_fill, fill_method):
+    # Bis neue Daten angehängt werden, bleibt die Heatmap im Cache
+    return heatmap_view(selected_column, min_quality, fill_method if gap_fill else None)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import dash
+from dash import html, dcc, dash_table, Input, Output, callback
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
+
+from pxs import memo
+from pxs.comparison import QUANTILES, compare
+from pxs.indices import SEASONS
+from pxs.store import stations, day_years
+from pxs.views import CORRELATION_COLUMNS
+
+dash.register_page(__name__, path="/compare")
+
+# Standard: die ältesten gegen die neuesten Jahre, je höchstens so viele
+DEFAULT_YEARS = 30
+COLORS = ("#2166ac", "#b2182b")
+
+
+def period_slider(id):
+    return dcc.RangeSlider(id=id, min=1950, max=2020, step=1, value=[1950, 1980], marks=None,
+                           tooltip={"placement": "bottom", "always_visible": True})
+
+
+# == LAYOUT ============================================================================
+layout = dbc.Container([
+    dbc.Row([
+        dbc.Col([
+            html.H3(["Zeiträume vergleichen"])
+        ], className="row-titles")
+    ]),
+    dbc.Row([
+        dbc.Col([
+            dcc.Dropdown(id="compare-station", options=[], placeholder="Station auswählen..."),
+        ], width=4),
+        dbc.Col([
+            dcc.Dropdown(
+                id="compare-column",
+                options=[{"label": label, "value": column} for column, label in CORRELATION_COLUMNS.items()],
+                value="LUFTTEMPERATUR",
+                clearable=False
+            ),
+        ], width=4),
+        dbc.Col([
+            dcc.Dropdown(
+                id="compare-season",
+                options=[{"label": label, "value": key} for key, (label, _) in SEASONS.items()],
+                value="year",
+                clearable=False
+            ),
+        ], width=4),
+    ], className="mb-3"),
+    dbc.Row([
+        dbc.Col([html.Label("Zeitraum A"), period_slider("compare-period-a")], width=6),
+        dbc.Col([html.Label("Zeitraum B"), period_slider("compare-period-b")], width=6),
+    ], className="mb-4"),
+    dbc.Row([
+        dbc.Col([
+            dcc.Graph(id="compare-distributions", style={"height": "500px"})
+        ], width=8),
+        dbc.Col([
+            html.H5("Tests"),
+            dash_table.DataTable(
+                id="compare-tests",
+                columns=[{"name": "Kennzahl", "id": "name"}, {"name": "Wert", "id": "value"}],
+                data=[],
+                style_cell={"textAlign": "left"},
+            ),
+            html.H5("Quantile", className="mt-3"),
+            dash_table.DataTable(
+                id="compare-quantiles",
+                columns=[{"name": "Quantil", "id": "q"}, {"name": "A", "id": "a"}, {"name": "B", "id": "b"},
+                         {"name": "B - A", "id": "shift"}],
+                data=[],
+                style_cell={"textAlign": "left"},
+            ),
+        ], width=4),
+    ]),
+], fluid=True)
+
+
+# == CALLBACK: Stationen ===============================================================
+@callback(
+    Output("compare-station", "options"),
+    Input("dataset-version", "data"),
+)
+def load_station_options(version):
+    return [{"label": name, "value": name} for name in stations.names()]
+
+
+# == CALLBACK: Jahre der Station =======================================================
+@callback(
+    Output("compare-period-a", "min"),
+    Output("compare-period-a", "max"),
+    Output("compare-period-a", "value"),
+    Output("compare-period-b", "min"),
+    Output("compare-period-b", "max"),
+    Output("compare-period-b", "value"),
+    Input("compare-station", "value"),
+)
+def update_period_sliders(name):
+    """Slider bounds = years of the station; A = oldest, B = newest years"""
+    if not name:
+        return (dash.no_update,) * 6
+    station = stations.get(name)
+    first, last = (int(year) for year in day_years(station.day[[0, -1]]))
+    length = min(DEFAULT_YEARS, (last - first + 1) // 2)
+    period_a = [first, first + length - 1]
+    period_b = [last - length + 1, last]
+    return first, last, period_a, first, last, period_b
+
+
+# == CALLBACK: Vergleich ===============================================================
+@callback(
+    Output("compare-distributions", "figure"),
+    Output("compare-tests", "data"),
+    Output("compare-quantiles", "data"),
+    Input("compare-station", "value"),
+    Input("compare-column", "value"),
+    Input("compare-season", "value"),
+    Input("compare-period-a", "value"),
+    Input("compare-period-b", "value"),
+    Input("min-quality", "value"),
+)
+@memo.memoize()
+def update_comparison(name, column, season, period_a, period_b, min_quality):
+    """Overlaid distributions, quantile shifts and KS/Mann-Whitney tests of two periods"""
+    if not name:
+        return {"data": [], "layout": {"title": "Bitte Station auswählen"}}, [], []
+    station = stations.get(name)
+    if column not in station.masks:
+        return {"data": [], "layout": {"title": f"{name}: keine Spalte {column}"}}, [], []
+
+    # Werte der Zeiträume aus den vorsortierten Jahresblöcken (pxs.comparison)
+    result = compare(station, column, tuple(period_a), tuple(period_b), season, min_quality)
+    if result is None:
+        return {"data": [], "layout": {"title": f"{name}: keine Werte in einem der Zeiträume"}}, [], []
+
+    labels = (f"A: {period_a[0]} - {period_a[1]}", f"B: {period_b[0]} - {period_b[1]}")
+    edges, density_a, density_b = result["histograms"]
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = make_subplots(rows=1, cols=2, subplot_titles=("Verteilung", "Quantilverschiebung B - A"),
+                        column_widths=[0.6, 0.4])
+    for label, density, color in zip(labels, (density_a, density_b), COLORS):
+        fig.add_trace(go.Bar(x=centers, y=density, width=np.diff(edges), name=label, marker_color=color,
+                             opacity=0.5), row=1, col=1)
+    quantiles = result["quantiles"]
+    fig.add_trace(go.Scatter(x=[f"{q:.0%}" for q in QUANTILES], y=quantiles["shift"], mode="lines+markers",
+                             name="B - A", line={"color": "black"}), row=1, col=2)
+    fig.add_hline(y=0, line={"color": "gray", "dash": "dash"}, row=1, col=2)
+    fig.update_layout(
+        title=f"{name}: {CORRELATION_COLUMNS.get(column, column)} – {SEASONS[season][0]}",
+        barmode="overlay",
+        bargap=0,
+        template="plotly_white",
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.08}
+    )
+    fig.update_yaxes(title_text="Dichte", row=1, col=1)
+
+    (mean_a, mean_b), (d, ks_p), (u, mw_p) = result["mean"], result["ks"], result["mann_whitney"]
+    tests = [
+        {"name": "Werte A / B", "value": f"{len(result['a'])} / {len(result['b'])}"},
+        {"name": "Mittel A / B", "value": f"{mean_a:.2f} / {mean_b:.2f}"},
+        {"name": "Differenz der Mittel", "value": f"{mean_b - mean_a:+.2f}"},
+        {"name": "Kolmogorov-Smirnov D", "value": f"{d:.3f} (p = {ks_p:.3g})"},
+        {"name": "Mann-Whitney U", "value": f"{u:.0f} (p = {mw_p:.3g})"},
+    ]
+    table = [{"q": f"{q:.0%}", "a": round(float(a), 2), "b": round(float(b), 2), "shift": round(float(shift), 2)}
+             for q, a, b, shift in zip(QUANTILES, quantiles["a"], quantiles["b"], quantiles["shift"])]
+    return fig, tests, table
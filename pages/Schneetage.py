@@ -2,89 +2,73 @@ import dash
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import pandas as pd
-from pathlib import Path
-from scipy import stats
-from statsmodels.formula.api import ols
 import numpy as np
 
+from pxs import executor, memo, snow, trends, warmup
+from pxs.figures import webgl_figure
+from pxs.serialize import compact_figure
+from pxs.store import stations, day_years, to_datetime
+
+SNOW_COLUMN = "SCHNEEHOEHE"
+
 # ----- Page Definition ------------------------------------------------------------------
 dash.register_page(__name__, path="/snow")
 
-# Funktion um CSV-Dateien aus dem data-Ordner zu laden
-def get_csv_files_from_data_folder():
-    """Reads all CSV files from 'data' folder"""
-    data_folder = Path("data")
-    if not data_folder.exists():
-        return []
-    csv_files = [f.stem for f in data_folder.glob("*.csv")]
-    return csv_files
-
-def load_and_clean_snow_data(filename):
-    """
-    Lädt CSV-Datei und bereinigt Schneehöhen-Daten
-    - Lädt nur Datum und Schneehöhe
-    - Ersetzt -999 mit NaN
-    - Konvertiert Datum
-    - Sortiert nach Datum
-    """
-    data_folder = Path("data")
-    filepath = data_folder / f"{filename}.csv"
+def snow_stations(selected_files):
+    """Returns the selected stations that have a snow depth column"""
+    selected = {}
+    # Noch nicht geladene Stationen werden parallel geparst
+    for filename, station in stations.load(selected_files).items():
+        if SNOW_COLUMN not in station.masks:
+            print(f"FEHLER: Keine Schneehöhen-Spalte gefunden in {station.names}")
+            continue
+        selected[filename] = station
+    return selected
 
-    
-    try:
-        # Erst alle Spalten laden um zu sehen welche verfügbar sind
-        df_test = pd.read_csv(filepath, nrows=1)
-        
-        # Erste Spalte (Datum)
-        x_column = df_test.columns[0]
-        
-        # Versuche mit verschiedenen möglichen Spaltennamen für Schnee
-        snow_column = None
-        for col_name in [" SCHNEEHOEHE", "SCHNEEHOEHE", "Schneehoehe", "schneehoehe"]:
-            if col_name in df_test.columns:
-                snow_column = col_name
-                break
-        
-        if snow_column is None:
-            print(f"FEHLER: Keine Schneehöhen-Spalte gefunden in {df_test.columns.tolist()}")
-            return None, None
-        
-        
-        # Jetzt richtig laden - mit Spaltennamen statt Index
-        df = pd.read_csv(filepath, usecols=[x_column, snow_column])
-        
-        # Datum konvertieren
-        if df[x_column].dtype == 'object':
-            if '.' in str(df[x_column].iloc[0]):
-                df[x_column] = pd.to_datetime(df[x_column], format='%d.%m.%Y', errors='coerce')
-            elif len(str(df[x_column].iloc[0])) == 8:
-                df[x_column] = pd.to_datetime(df[x_column], format='%Y%m%d', errors='coerce')
-            else:
-                df[x_column] = pd.to_datetime(df[x_column], errors='coerce')
-        else:
-            df[x_column] = pd.to_datetime(df[x_column], errors='coerce')
-        
-        # Nach Datum sortieren
-        df = df.sort_values(by=x_column).reset_index(drop=True)
-        
-        # -999 durch NaN ersetzen
-        df[snow_column] = df[snow_column].replace(-999, float('nan'))
-        
-        # Spalte umbenennen zu Standard-Name
-        df = df.rename(columns={snow_column: "SCHNEEHOEHE"})
-        
-        # Jahr und Monat als separate Spalten hinzufügen
-        df['year'] = df[x_column].dt.year
-        df['month'] = df[x_column].dt.month
-        
-        
-        return df, x_column
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+
+def common_timerange(selected, options):
+    """Largest start and smallest end day (overlap), or (None, None)"""
+    if "common_timerange" not in options:
         return None, None
+    return (max(station.day[0] for station in selected.values()),
+            min(station.day[-1] for station in selected.values()))
+
+
+def yearly_values(station, values, common_start, common_end):
+    """Yearly aggregate restricted to the (common) time range, first and last year removed"""
+    start_year = day_years(station.day[0] if common_start is None else common_start)
+    end_year = day_years(station.day[-1] if common_end is None else common_end)
+    values = values[(values.index >= start_year) & (values.index <= end_year)]
+    # Remove first and last year (incomplete data)
+    if len(values) > 2:
+        values = values.iloc[1:-1]
+    return values
+
+
+def snow_days_trend(station, common_start, common_end, min_quality=None):
+    """Snow days per year with OLS trend line and R² (None without trend), cached per time range and quality"""
+    def build():
+        # Count snow days (snow depth > 0), precomputed per year in the station store
+        snow_days_per_year = yearly_values(station, station.yearly_stats(min_quality).positive(SNOW_COLUMN),
+                                           common_start, common_end)
+        if len(snow_days_per_year) <= 1:
+            return snow_days_per_year, None, None
+
+        # Regression for snow days trend (pxs/trends.py)
+        years = snow_days_per_year.index.to_numpy()
+        slope, intercept, r_squared = trends.fit(years, snow_days_per_year.to_numpy())
+        return snow_days_per_year, intercept + slope * years, r_squared
+
+    key = ("snow-days", None if common_start is None else int(common_start), None if common_end is None else int(common_end),
+           int(min_quality or 0))
+    return station.cached(key, build)
+
+
+# Schneesaisons ohne gemeinsamen Zeitraum (Standardeinstellung der Seite)
+warmup.register("snow-seasons", lambda: [snow_days_trend(station, None, None)
+                                         for station in snow_stations(warmup.warmup_stations()).values()])
+warmup.register("snow-water", lambda: [snow.seasonal(station)
+                                       for station in snow_stations(warmup.warmup_stations()).values()])
 
 
 # == LAYOUT ============================================================================
@@ -143,6 +127,28 @@ layout = dbc.Container([
                 ], width=6),
             ]),
         ]),
+
+        # Tab 3: Snow water equivalent (pxs/snow.py)
+        dcc.Tab(label="SCHNEEMASSE", value="tab-water", children=[
+            dcc.Graph(
+                id="snow-water-timeseries",
+                style={"height": "500px", "margin": "15px"}
+            ),
+            dbc.Row([
+                dbc.Col([
+                    dcc.Graph(
+                        id="snow-water-total",
+                        style={"height": "500px", "margin": "15px"}
+                    ),
+                ], width=6),
+                dbc.Col([
+                    dcc.Graph(
+                        id="snow-water-peak",
+                        style={"height": "500px", "margin": "15px"}
+                    ),
+                ], width=6),
+            ]),
+        ]),
     ]),
     
 ], fluid=True)
@@ -151,11 +157,12 @@ layout = dbc.Container([
 # == CALLBACK: CSV-Optionen laden ======================================================
 @callback(
     Output("snow-csv-selector", "options"),
-    Input("snow-tabs", "value")
+    Input("snow-tabs", "value"),
+    Input("dataset-version", "data"),
 )
-def load_snow_csv_options(_):
+def load_snow_csv_options(_, version):
     """Loads available CSV files"""
-    csv_files = get_csv_files_from_data_folder()
+    csv_files = stations.names()
     return [{"label": f, "value": f} for f in csv_files]
 
 
@@ -163,9 +170,10 @@ def load_snow_csv_options(_):
 @callback(
     Output("snow-data-store", "data"),
     Input("snow-csv-selector", "value"),
+    Input("dataset-version", "data"),
 )
-def load_snow_data(selected_files):
-    """Loads selected CSV(s) and prepares data"""
+def load_snow_data(selected_files, version):
+    """Checks the selected CSV(s); the data itself stays in the station store"""
     if not selected_files:
         return None
     
@@ -173,21 +181,7 @@ def load_snow_data(selected_files):
     if isinstance(selected_files, str):
         selected_files = [selected_files]
     
-    all_data = {}
-    
-    for filename in selected_files:
-        df, x_column = load_and_clean_snow_data(filename)
-        
-        if df is not None:
-            all_data[filename] = {
-                "df": df.to_dict("records"),
-                "x_column": x_column
-            }
-    
-    if not all_data:
-        return None
-    
-    return all_data
+    return list(snow_stations(selected_files)) or None
 
 
 # == CALLBACK: Zeitreihen-Plot =========================================================
@@ -195,10 +189,11 @@ def load_snow_data(selected_files):
     Output("snow-timeseries-plot", "figure"),
     Input("snow-data-store", "data"),
     Input("snow-analysis-options", "value"),
+    Input("min-quality", "value"),
 )
-def update_timeseries_plot(all_data, options):
+def update_timeseries_plot(selected_files, options, min_quality):
     """Creates timeseries plot of snow depth"""
-    if not all_data:
+    if not selected_files:
         return {
             "data": [],
             "layout": {
@@ -208,46 +203,27 @@ def update_timeseries_plot(all_data, options):
             }
         }
     
-    # Determine common time range?
-    common_start = None
-    common_end = None
-    
-    if "common_timerange" in options:
-        for filename, data in all_data.items():
-            df = pd.DataFrame(data["df"])
-            x_col = data["x_column"]
-            df[x_col] = pd.to_datetime(df[x_col], errors='coerce')
-            
-            if common_start is None and common_end is None:
-                common_start = df[x_col].min()
-                common_end = df[x_col].max()
-            else:
-                # Largest minimum and smallest maximum = overlap
-                common_start = max(common_start, df[x_col].min())
-                common_end = min(common_end, df[x_col].max())
+    selected = snow_stations(selected_files)
+    common_start, common_end = common_timerange(selected, options)
     
-    fig = go.Figure()
-    
-    for filename, data in all_data.items():
-        df = pd.DataFrame(data["df"])
-        x_column = data["x_column"]
-        df[x_column] = pd.to_datetime(df[x_column])
-        
-        # Filter common time range
-        if common_start is not None and common_end is not None:
-            df = df[(df[x_column] >= common_start) & (df[x_column] <= common_end)]
-        
-        # Show all files in one plot
-        fig.add_trace(go.Scatter(
-            x=df[x_column],
-            y=df["SCHNEEHOEHE"],
+    def station_trace(item):
+        filename, station = item
+        # Filter common time range (slice -> views on the station arrays)
+        rows = station.rows(common_start, common_end)
+        return go.Scatter(
+            x=station.dates(rows),
+            y=station.series(SNOW_COLUMN, min_quality=min_quality)[rows],
             mode="lines",
             name=filename,
-        ))
+        )
+    
+    # Show all files in one plot
+    fig = go.Figure()
+    fig.add_traces(executor.map_stations(station_trace, selected.items()))
     
     title = "Schneehöhe"
-    if "common_timerange" in options and common_start and common_end:
-        title += f" (Zeitraum: {common_start.strftime('%d.%m.%Y')} - {common_end.strftime('%d.%m.%Y')})"
+    if common_start is not None and common_end is not None:
+        title += f" (Zeitraum: {to_datetime(common_start).item():%d.%m.%Y} - {to_datetime(common_end).item():%d.%m.%Y})"
     
     fig.update_layout(
         title=title,
@@ -258,7 +234,8 @@ def update_timeseries_plot(all_data, options):
         legend={"orientation": "h", "yanchor": "bottom", "y": 1.02}
     )
     
-    return fig
+    # Tageswerte mehrerer Stationen: ab PXS_WEBGL_THRESHOLD Punkten WebGL
+    return compact_figure(webgl_figure(fig))
 
 
 # == CALLBACK: Jährliche Schneetage ====================================================
@@ -266,64 +243,32 @@ def update_timeseries_plot(all_data, options):
     Output("snow-days-per-year", "figure"),
     Input("snow-data-store", "data"),
     Input("snow-analysis-options", "value"),
+    Input("min-quality", "value"),
 )
-def update_snow_days_per_year(all_data, options):
+def update_snow_days_per_year(selected_files, options, min_quality):
     """Shows number of snow days per year"""
-    if not all_data:
+    if not selected_files:
         return {"data": [], "layout": {"title": "Keine Daten"}}
     
-    common_start = None
-    common_end = None
-    
-    if "common_timerange" in options:
-        for filename, data in all_data.items():
-            df = pd.DataFrame(data["df"])
-            x_col = data["x_column"]
-            df[x_col] = pd.to_datetime(df[x_col], errors='coerce')
-            
-            if common_start is None and common_end is None:
-                common_start = df[x_col].min()
-                common_end = df[x_col].max()
-            else:
-                common_start = max(common_start, df[x_col].min())
-                common_end = min(common_end, df[x_col].max())
+    selected = snow_stations(selected_files)
+    common_start, common_end = common_timerange(selected, options)
     
     fig = go.Figure()
-    
-    for filename, data in all_data.items():
-        df = pd.DataFrame(data["df"])
-        x_column = data["x_column"]
-        df[x_column] = pd.to_datetime(df[x_column])
-        
-        # Filter common time range
-        if common_start is not None and common_end is not None:
-            df = df[(df[x_column] >= common_start) & (df[x_column] <= common_end)]
-        
-        # Count snow days (snow depth > 0)
-        snow_days_per_year = df[df["SCHNEEHOEHE"] > 0].groupby("year").size()
-
-        # Remove first and last year (incomplete data)
-        if len(snow_days_per_year) > 2:
-            snow_days_per_year = snow_days_per_year.iloc[1:-1]
 
+    # Regressionen der Stationen parallel berechnen
+    results = executor.map_stations(lambda station: snow_days_trend(station, common_start, common_end, min_quality),
+                                    selected.values())
+    
+    for filename, (snow_days_per_year, line, r_squared) in zip(selected, results):
         fig.add_trace(go.Bar(
             x=snow_days_per_year.index,
             y=snow_days_per_year.values,
             name=filename
         ))
 
-        # Regression for snow days trend
-        if len(snow_days_per_year) > 1:
-            regression_df = pd.DataFrame({
-                'year': snow_days_per_year.index,
-                'snow_days': snow_days_per_year.values
-            })
-            model = ols('snow_days ~ year', data=regression_df).fit()
-            line = model.predict(regression_df)
-            r_squared = model.rsquared
-
+        if line is not None:
             fig.add_trace(go.Scatter(
-                x=regression_df['year'],
+                x=snow_days_per_year.index,
                 y=line,
                 mode='lines',
                 name=f'{filename} Trend (R²={r_squared:.3f})',
@@ -331,8 +276,8 @@ def update_snow_days_per_year(all_data, options):
             ))
     
     title = "Anzahl Schneetage pro Jahr"
-    if "common_timerange" in options and common_start and common_end:
-        title += f" ({common_start.year} - {common_end.year})"
+    if common_start is not None and common_end is not None:
+        title += f" ({day_years(common_start)} - {day_years(common_end)})"
     
 
 
@@ -352,46 +297,23 @@ def update_snow_days_per_year(all_data, options):
     Output("snow-max-per-year", "figure"),
     Input("snow-data-store", "data"),
     Input("snow-analysis-options", "value"),
+    Input("min-quality", "value"),
 )
-def update_max_snow_per_year(all_data, options):
+@memo.memoize(unordered=(1,))
+def update_max_snow_per_year(selected_files, options, min_quality):
     """Shows maximum snow depth per year"""
-    if not all_data:
+    if not selected_files:
         return {"data": [], "layout": {"title": "Keine Daten"}}
     
-    # Determine common time range?
-    common_start = None
-    common_end = None
-    
-    if "common_timerange" in options:
-        for filename, data in all_data.items():
-            df = pd.DataFrame(data["df"])
-            x_col = data["x_column"]
-            df[x_col] = pd.to_datetime(df[x_col], errors='coerce')
-            
-            if common_start is None and common_end is None:
-                common_start = df[x_col].min()
-                common_end = df[x_col].max()
-            else:
-                common_start = max(common_start, df[x_col].min())
-                common_end = min(common_end, df[x_col].max())
+    selected = snow_stations(selected_files)
+    common_start, common_end = common_timerange(selected, options)
     
     fig = go.Figure()
     
-    for filename, data in all_data.items():
-        df = pd.DataFrame(data["df"])
-        x_column = data["x_column"]
-        df[x_column] = pd.to_datetime(df[x_column])
-        
-        # Filter common time range
-        if common_start is not None and common_end is not None:
-            df = df[(df[x_column] >= common_start) & (df[x_column] <= common_end)]
-        
-        # Maximum snow depth per year
-        max_snow_per_year = df.groupby("year")["SCHNEEHOEHE"].max()
-
-        # Remove first and last year (incomplete data)
-        if len(max_snow_per_year) > 2:
-            max_snow_per_year = max_snow_per_year.iloc[1:-1]
+    for filename, station in selected.items():
+        # Maximum snow depth per year, precomputed in the station store
+        max_snow_per_year = yearly_values(station, station.yearly_stats(min_quality).max(SNOW_COLUMN),
+                                          common_start, common_end)
 
         fig.add_trace(go.Bar(
             x=max_snow_per_year.index,
@@ -400,8 +322,8 @@ def update_max_snow_per_year(all_data, options):
         ))
     
     title = "Maximale Schneehöhe pro Jahr"
-    if "common_timerange" in options and common_start and common_end:
-        title += f" ({common_start.year} - {common_end.year})"
+    if common_start is not None and common_end is not None:
+        title += f" ({day_years(common_start)} - {day_years(common_end)})"
     
     fig.update_layout(
         title=title,
@@ -411,4 +333,84 @@ def update_max_snow_per_year(all_data, options):
         barmode='group'
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+# == CALLBACK: Schneewasseräquivalent ==================================================
+@callback(
+    Output("snow-water-timeseries", "figure"),
+    Input("snow-data-store", "data"),
+    Input("snow-analysis-options", "value"),
+    Input("min-quality", "value"),
+)
+def update_water_timeseries(selected_files, options, min_quality):
+    """Daily snow water equivalent (density/degree-day model, pxs/snow.py)"""
+    if not selected_files:
+        return {"data": [], "layout": {"title": "Keine Daten"}}
+
+    selected = snow_stations(selected_files)
+    common_start, common_end = common_timerange(selected, options)
+
+    def station_trace(item):
+        filename, station = item
+        rows = station.rows(common_start, common_end)
+        return go.Scatter(
+            x=station.dates(rows),
+            y=snow.swe(station, min_quality)[rows],
+            mode="lines",
+            name=filename,
+        )
+
+    fig = go.Figure()
+    fig.add_traces(executor.map_stations(station_trace, selected.items()))
+    fig.update_layout(
+        title="Schneewasseräquivalent (geschätzt aus Schneehöhe, Temperatur und Niederschlag)",
+        xaxis={"title": "Datum", "type": "date"},
+        yaxis={"title": "SWE (mm)"},
+        hovermode="x unified",
+        template="plotly_white",
+        legend={"orientation": "h", "yanchor": "bottom", "y": 1.02}
+    )
+    return compact_figure(webgl_figure(fig))
+
+
+@callback(
+    Output("snow-water-total", "figure"),
+    Output("snow-water-peak", "figure"),
+    Input("snow-data-store", "data"),
+    Input("snow-analysis-options", "value"),
+    Input("min-quality", "value"),
+)
+@memo.memoize(unordered=(1,))
+def update_water_per_season(selected_files, options, min_quality):
+    """Fallen snow mass (modelled snowfall) and peak SWE per snow season (July - June)"""
+    if not selected_files:
+        empty = {"data": [], "layout": {"title": "Keine Daten"}}
+        return empty, empty
+
+    selected = snow_stations(selected_files)
+    common_start, common_end = common_timerange(selected, options)
+
+    # Saisontabellen der Stationen parallel (gecacht pro Station)
+    tables = executor.map_stations(lambda station: snow.seasonal(station, min_quality), selected.values())
+
+    total, peak = go.Figure(), go.Figure()
+    for (filename, station), table in zip(selected.items(), tables):
+        # Saison = Jahr des Januars; erste und letzte Saison sind unvollständig
+        table = yearly_values(station, table, common_start, common_end)
+        total.add_trace(go.Bar(x=table.index, y=table["total"], name=filename))
+        peak.add_trace(go.Bar(x=table.index, y=table["peak"], name=filename))
+
+    period = ""
+    if common_start is not None and common_end is not None:
+        period = f" ({day_years(common_start)} - {day_years(common_end)})"
+
+    for fig, title in ((total, "Gefallene Schneemasse pro Saison (Schneefall aus Niederschlag und Temperatur)"), (peak, "Maximales Schneewasseräquivalent pro Saison")):
+        fig.update_layout(
+            title=title + period,
+            xaxis={"title": "Saison (Jahr des Januars)"},
+            yaxis={"title": "SWE (mm)"},
+            template="plotly_white",
+            barmode='group'
+        )
+    return total, peak
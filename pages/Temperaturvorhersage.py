@@ -2,44 +2,91 @@ import dash
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import pandas as pd
-from pathlib import Path
-import statsmodels.api as sm
-from sklearn.preprocessing import PolynomialFeatures
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
+
+from pxs import warmup
+from pxs.store import stations
 
 dash.register_page(__name__, path="/forecast")
 
-def get_csv_files_from_data_folder():
-    data_folder = Path("data")
-    if not data_folder.exists():
-        return []
-    return [f.stem for f in data_folder.glob("*.csv")]
+TEMP_COLUMN = "LUFTTEMPERATUR"
 
-def load_temperature_csv(filename):
-    data_folder = Path("data")
-    filepath = data_folder / f"{filename}.csv"
-    try:
-        df_preview = pd.read_csv(filepath, nrows=5)
-        date_col = df_preview.columns[0]
-        temp_col = " LUFTTEMPERATUR"
-        df = pd.read_csv(filepath, usecols=[date_col, temp_col])
+def forecast_features(filename, min_quality=None):
+    """Features straight from the station arrays: temperature today, in 1 and in 3 days"""
+    station = stations.get(filename)
+    temp = station.series(TEMP_COLUMN, min_quality=min_quality)
+    # Views statt shift(): Zeile i enthält T(i), T(i+1), T(i+3)
+    today, plus1, plus3 = temp[:-3], temp[1:-2], temp[3:]
+    valid = ~(np.isnan(today) | np.isnan(plus1) | np.isnan(plus3))
+    return station.dates(slice(0, len(today)))[valid], today[valid], plus1[valid], plus3[valid]
+
+def fit_forecasts(filename, min_quality=None):
+    """OLS and polynomial fits on the first 80 %, predictions and RMSE on the remaining 20 %"""
+    # statsmodels und sklearn erst laden, wenn jemand eine Vorhersage anfordert
+    import statsmodels.api as sm
+    from sklearn.preprocessing import PolynomialFeatures
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_squared_error
 
-        sample = str(df[date_col].iloc[0])
+    dates, temp, y1, y3 = forecast_features(filename, min_quality)
 
-        if "." in sample:
-            df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, format="%d.%m.%Y", errors="coerce")
-        else:
-            df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors="coerce")
+    X = temp.reshape(-1, 1).astype(float)
+    y1 = y1.astype(float)
+    y3 = y3.astype(float)
 
-        df = df.sort_values(date_col).reset_index(drop=True)
-        df[temp_col] = df[temp_col].replace(-999, pd.NA)
-        df = df.rename(columns={temp_col: "TEMP"})
-        return df, date_col
-    except:
-        return None, None
+    split = int(len(X) * 0.8)
+    X_train = X[:split]
+    X_test  = X[split:]
+    y1_train = y1[:split]
+    y1_test  = y1[split:]
+    y3_train = y3[:split]
+    y3_test  = y3[split:]
+
+    X_train_sm = sm.add_constant(X_train)
+    X_test_sm  = sm.add_constant(X_test)
+
+    olsmod_1 = sm.OLS(y1_train, X_train_sm)
+    olsres_1 = olsmod_1.fit()
+    olsmod_3 = sm.OLS(y3_train, X_train_sm)
+    olsres_3 = olsmod_3.fit()
+
+    y1_hat_te_ols = olsres_1.predict(X_test_sm)
+    y3_hat_te_ols = olsres_3.predict(X_test_sm)
+
+    poly = PolynomialFeatures(degree=2, include_bias=False)
+    X_train_poly = poly.fit_transform(X_train)
+    X_test_poly  = poly.transform(X_test)
+
+    linreg_1 = LinearRegression().fit(X_train_poly, y1_train)
+    linreg_3 = LinearRegression().fit(X_train_poly, y3_train)
+
+    y1_hat_te_poly = linreg_1.predict(X_test_poly)
+    y3_hat_te_poly = linreg_3.predict(X_test_poly)
+
+    rmse_ols_1 = mean_squared_error(y1_test, y1_hat_te_ols, squared=False)
+    rmse_ols_3 = mean_squared_error(y3_test, y3_hat_te_ols, squared=False)
+    rmse_poly_1 = mean_squared_error(y1_test, y1_hat_te_poly, squared=False)
+    rmse_poly_3 = mean_squared_error(y3_test, y3_hat_te_poly, squared=False)
+
+    return {
+        "dates": dates[split:],
+        "y1_test": y1_test,
+        "ols1": y1_hat_te_ols,
+        "ols3": y3_hat_te_ols,
+        "poly1": y1_hat_te_poly,
+        "poly3": y3_hat_te_poly,
+        "rmse": (rmse_ols_1, rmse_ols_3, rmse_poly_1, rmse_poly_3),
+    }
+
+def forecast_fits(filename, min_quality=None):
+    """Fits of a station per quality filter, kept until new rows are appended"""
+    return stations.get(filename).cached(("forecast-fits", int(min_quality or 0)),
+                                         lambda: fit_forecasts(filename, min_quality))
+
+# Standard-Vorhersage (alle Modelle) für die vorgeladenen Stationen; nur mit
+# PXS_WARMUP_OPTIONAL=forecast-fits, sonst würde statsmodels/sklearn doch beim Start geladen
+warmup.register("forecast-fits", lambda: [forecast_fits(name) for name in warmup.warmup_stations()
+                                          if TEMP_COLUMN in stations.get(name).masks], opt_in=True)
 
 layout = dbc.Container([
     dbc.Row([
@@ -75,84 +122,52 @@ layout = dbc.Container([
 
 @callback(
     Output("temp-csv-selector", "options"),
-    Input("temp-csv-selector", "id")
+    Input("temp-csv-selector", "id"),
+    Input("dataset-version", "data")
 )
-def load_temperature_options(_):
-    files = get_csv_files_from_data_folder()
+def load_temperature_options(_, version):
+    files = stations.names()
     return [{"label": f, "value": f} for f in files]
 
 @callback(
     Output("temp-data-store", "data"),
-    Input("temp-csv-selector", "value")
+    Input("temp-csv-selector", "value"),
+    Input("dataset-version", "data")
 )
-def load_temperature_data(filename):
+def load_temperature_data(filename, version):
     if not filename:
         return None
-    df, date_col = load_temperature_csv(filename)
-    if df is None:
+    try:
+        station = stations.get(filename)
+    except KeyError:
         return None
-    return {"df": df.to_dict("records"), "date_col": date_col}
+    if TEMP_COLUMN not in station.masks:
+        return None
+    return {"station": filename}
 
 @callback(
     Output("temp-forecast-plot", "figure"),
     Output("forecast-rmse-box", "children"),
     Input("temp-data-store", "data"),
-    Input("forecast-model-selector", "value")
+    Input("forecast-model-selector", "value"),
+    Input("min-quality", "value")
 )
-def forecast_temperature(data, model_selection):
+def forecast_temperature(data, model_selection, min_quality):
     if not data:
         return go.Figure(), "Keine Daten geladen."
 
-    df = pd.DataFrame(data["df"])
-    date_col = data["date_col"]
-
-    df["T_plus1"] = df["TEMP"].shift(-1)
-    df["T_plus3"] = df["TEMP"].shift(-3)
-    df = df.dropna()
-
-    X = df[["TEMP"]].values
-    y1 = df["T_plus1"].values
-    y3 = df["T_plus3"].values
-
-    split = int(len(df) * 0.8)
-    X_train = X[:split]
-    X_test  = X[split:]
-    y1_train = y1[:split]
-    y1_test  = y1[split:]
-    y3_train = y3[:split]
-    y3_test  = y3[split:]
-
-    X_train_sm = sm.add_constant(X_train)
-    X_test_sm  = sm.add_constant(X_test)
-
-    olsmod_1 = sm.OLS(y1_train, X_train_sm)
-    olsres_1 = olsmod_1.fit()
-    olsmod_3 = sm.OLS(y3_train, X_train_sm)
-    olsres_3 = olsmod_3.fit()
-
-    y1_hat_te_ols = olsres_1.predict(X_test_sm)
-    y3_hat_te_ols = olsres_3.predict(X_test_sm)
-
-    poly = PolynomialFeatures(degree=2, include_bias=False)
-    X_train_poly = poly.fit_transform(X_train)
-    X_test_poly  = poly.transform(X_test)
-
-    linreg_1 = LinearRegression().fit(X_train_poly, y1_train)
-    linreg_3 = LinearRegression().fit(X_train_poly, y3_train)
-
-    y1_hat_te_poly = linreg_1.predict(X_test_poly)
-    y3_hat_te_poly = linreg_3.predict(X_test_poly)
-
-    rmse_ols_1 = mean_squared_error(y1_test, y1_hat_te_ols, squared=False)
-    rmse_ols_3 = mean_squared_error(y3_test, y3_hat_te_ols, squared=False)
-    rmse_poly_1 = mean_squared_error(y1_test, y1_hat_te_poly, squared=False)
-    rmse_poly_3 = mean_squared_error(y3_test, y3_hat_te_poly, squared=False)
+    fits = forecast_fits(data["station"], min_quality)
+    dates = fits["dates"]
+    y1_hat_te_ols, y3_hat_te_ols = fits["ols1"], fits["ols3"]
+    y1_hat_te_poly, y3_hat_te_poly = fits["poly1"], fits["poly3"]
+    y1_test = fits["y1_test"]
+    rmse_ols_1, rmse_ols_3, rmse_poly_1, rmse_poly_3 = fits["rmse"]
 
     fig = go.Figure()
 
     if "ols1" in model_selection:
         fig.add_trace(go.Scatter(
-            x=df[date_col].iloc[split:], 
+            x=dates,
             y=y1_hat_te_ols,
             mode="lines",
             name="OLS Vorhersage (T+1)"
@@ -160,7 +175,7 @@ def forecast_temperature(data, model_selection):
 
     if "ols3" in model_selection:
         fig.add_trace(go.Scatter(
-            x=df[date_col].iloc[split:], 
+            x=dates,
             y=y3_hat_te_ols,
             mode="lines",
             name="OLS Vorhersage (T+3)"
@@ -168,7 +183,7 @@ def forecast_temperature(data, model_selection):
 
     if "poly1" in model_selection:
         fig.add_trace(go.Scatter(
-            x=df[date_col].iloc[split:], 
+            x=dates,
             y=y1_hat_te_poly,
             mode="lines",
             name="Poly Vorhersage (T+1)"
@@ -176,14 +191,14 @@ def forecast_temperature(data, model_selection):
 
     if "poly3" in model_selection:
         fig.add_trace(go.Scatter(
-            x=df[date_col].iloc[split:], 
+            x=dates,
             y=y3_hat_te_poly,
             mode="lines",
             name="Poly Vorhersage (T+3)"
         ))
 
     fig.add_trace(go.Scatter(
-        x=df[date_col].iloc[split:], 
+        x=dates,
         y=y1_test,
         mode="lines",
         name="Echte Temperatur (T+1)",
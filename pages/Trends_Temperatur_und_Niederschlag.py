@@ -1,708 +1,486 @@
 import dash
-from dash import html, dcc, dash_table, Input, Output
+from dash import html, dcc, dash_table, Input, Output, no_update
 import dash_bootstrap_components as dbc
-import pandas as pd
-import plotly.express as px
-from scipy import stats
-from statsmodels.formula.api import ols
 import numpy as np
 
-dash.register_page(__name__)
-
-# Read and prepare the data for Arber
-df_A = pd.read_csv('data/Arber.csv')  # handle spaces after comma
-df_A.columns = df_A.columns.str.strip()  # remove whitespace from column names
-df_A['DATE'] = pd.to_datetime(df_A['DATE'], format='%d.%m.%Y')
-df_A = df_A.replace(-999, pd.NA)
-#df_desc=df['DATE']
-#prepare table
-df_A_numeric=df_A.copy()
-for col in df_A.columns:
-    if col != 'DATE':
-        df_A_numeric[col] = pd.to_numeric(df_A[col], errors='raise')
-df_A_desc=df_A_numeric.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_A_desc_all = df_A_desc.describe(include='all')
-df_A_desc_all = df_A_desc_all.reset_index().rename(columns={'index': 'Statistik'})
-df_A_desc_all = df_A_desc_all[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 2015 
-df_A_2015=df_A_numeric[df_A_numeric['DATE'].dt.year == 2015]
-df_A_desc_2015=df_A_2015.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_A_desc_2015 = df_A_desc_2015.describe(include='all')
-df_A_desc_2015 = df_A_desc_2015.reset_index().rename(columns={'index': 'Statistik'})
-df_A_desc_2015 = df_A_desc_2015[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 1983 
-df_A_1983=df_A_numeric[df_A_numeric['DATE'].dt.year == 1983]
-df_A_desc_1983=df_A_1983.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_A_desc_1983 = df_A_desc_1983.describe(include='all')
-df_A_desc_1983 = df_A_desc_1983.reset_index().rename(columns={'index': 'Statistik'})
-df_A_desc_1983 = df_A_desc_1983[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-# prepare the data for the averages
-df_A_numeric['YEAR'] = df_A_numeric['DATE'].dt.year
-df_A_yearly_temp = df_A_numeric.groupby('YEAR')['LUFTTEMPERATUR'].mean().reset_index()
-df_A_yearly_rain = df_A_numeric.groupby('YEAR')['NIEDERSCHLAGSHOEHE'].sum().reset_index()
-
-# Read and prepare the data for Straubing
-df_St = pd.read_csv('data/Straubing.csv')  # handle spaces after comma
-df_St.columns = df_St.columns.str.strip()  # remove whitespace from column names
-df_St['DATE'] = pd.to_datetime(df_St['DATE'], format='%d.%m.%Y')
-df_St = df_St.replace(-999, pd.NA)
-#prepare table 
-df_St_numeric=df_St.copy()
-for col in df_St.columns:
-    if col != 'DATE':
-        df_St_numeric[col] = pd.to_numeric(df_St[col], errors='raise')
-df_St_desc=df_St_numeric.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_St_desc_all = df_St_desc.describe(include='all')
-df_St_desc_all = df_St_desc_all.reset_index().rename(columns={'index': 'Statistik'})
-df_St_desc_all = df_St_desc_all[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 2015 
-df_St_2015=df_St_numeric[df_St_numeric['DATE'].dt.year == 2015]
-df_St_desc_2015=df_St_2015.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_St_desc_2015 = df_St_desc_2015.describe(include='all')
-df_St_desc_2015 = df_St_desc_2015.reset_index().rename(columns={'index': 'Statistik'})
-df_St_desc_2015 = df_St_desc_2015[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 1951 
-df_St_1951=df_St_numeric[df_St_numeric['DATE'].dt.year == 1951]
-df_St_desc_1951=df_St_1951.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_St_desc_1951 = df_St_desc_1951.describe(include='all')
-df_St_desc_1951 = df_St_desc_1951.reset_index().rename(columns={'index': 'Statistik'})
-df_St_desc_1951 = df_St_desc_1951[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-# prepare the data for the averages
-df_St_numeric['YEAR'] = df_St_numeric['DATE'].dt.year
-df_St_yearly_temp = df_St_numeric.groupby('YEAR')['LUFTTEMPERATUR'].mean().reset_index()
-df_St_yearly_rain = df_St_numeric.groupby('YEAR')['NIEDERSCHLAGSHOEHE'].sum().reset_index()
-
-
-
-# Read and prepare the data for Schorndorf
-df_Sc = pd.read_csv('data/Schorndorf.csv')  # handle spaces after comma
-df_Sc.columns = df_Sc.columns.str.strip()  # remove whitespace from column names
-df_Sc['DATE'] = pd.to_datetime(df_Sc['DATE'], format='%d.%m.%Y')
-df_Sc = df_Sc.replace(-999, pd.NA)
-#prepare table
-df_Sc_numeric=df_Sc.copy()
-for col in df_Sc.columns:
-    if col != 'DATE':
-        df_Sc_numeric[col] = pd.to_numeric(df_Sc[col], errors='raise')
-df_Sc_desc=df_Sc_numeric.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_Sc_desc_all = df_Sc_desc.describe(include='all')
-df_Sc_desc_all = df_Sc_desc_all.reset_index().rename(columns={'index': 'Statistik'})
-df_Sc_desc_all = df_Sc_desc_all[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 2015 
-df_Sc_2015=df_Sc_numeric[df_Sc_numeric['DATE'].dt.year == 2015]
-df_Sc_desc_2015=df_Sc_2015.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_Sc_desc_2015 = df_Sc_desc_2015.describe(include='all')
-df_Sc_desc_2015 = df_Sc_desc_2015.reset_index().rename(columns={'index': 'Statistik'})
-df_Sc_desc_2015 = df_Sc_desc_2015[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-#prepare table for describe 1997 
-df_Sc_1997=df_Sc_numeric[df_Sc_numeric['DATE'].dt.year == 1997]
-df_Sc_desc_1997=df_Sc_1997.drop(columns=['DATE','MESS_DATUM','LUFTTEMP_AM_ERDB_MINIMUM','WINDSPITZE_MAXIMUM','SCHNEEHOEHE','QUALITAETS_NIVEAU','DAMPFDRUCK','BEDECKUNGSGRAD','WINDGESCHWINDIGKEIT','SONNENSCHEINDAUER','NIEDERSCHLAGSHOEHE_IND','LUFTDRUCK_STATIONSHOEHE','REL_FEUCHTE'])
-df_Sc_desc_1997 = df_Sc_desc_1997.describe(include='all')
-df_Sc_desc_1997 = df_Sc_desc_1997.reset_index().rename(columns={'index': 'Statistik'})
-df_Sc_desc_1997 = df_Sc_desc_1997[['Statistik', 'NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR','LUFTTEMPERATUR_MAXIMUM','LUFTTEMPERATUR_MINIMUM']]
-# prepare the data for the averages
-df_Sc_numeric['YEAR'] = df_Sc_numeric['DATE'].dt.year
-df_Sc_yearly_temp = df_Sc_numeric.groupby('YEAR')['LUFTTEMPERATUR'].mean().reset_index()
-df_Sc_yearly_rain = df_Sc_numeric.groupby('YEAR')['NIEDERSCHLAGSHOEHE'].sum().reset_index()
-
-# Careate the figure
-fig = px.line(  
-    df_A, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Arber',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig1 = px.line(  
-    df_St, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Straubing',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig2 = px.line(  
-    df_Sc, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Schorndorf',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig3 = px.line(  
-    df_A, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niederschlagshöhe Arber',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig4 = px.line(  
-    df_St, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title= 'Niederschlagshöhe Straubing',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig5 = px.line(  
-    df_Sc, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Schorndorf',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig6 = px.line(  
-    df_A_2015, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Arber 2015',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig7 = px.line(  
-    df_A_1983, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Arber 1983',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig8 = px.line(  
-    df_St_2015, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Straubing 2015',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig9 = px.line(  
-    df_St_1951, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Straubing 1951',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
+from pxs import memo, trends, warmup
+from pxs.indices import SEASONS
+from pxs.climatology import REFERENCE_PERIODS
+from pxs.views import CORRELATION_COLUMNS, LOCATIONS, anomaly_view, trends_view
 
-fig10 = px.line(  
-    df_Sc_2015, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Schorndorf 2015',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig11 = px.line(  
-    df_Sc_1997, 
-    x='DATE', 
-    y='NIEDERSCHLAGSHOEHE',
-    title='Niedrschlagshöhe Schorndorf 1997',
-    labels={'DATE': 'Datum', ' NIEDERSCHLAGSHOEHE': 'Liter'}
-)
-
-fig12 = px.line(df_A_yearly_temp, x='YEAR', y='LUFTTEMPERATUR', 
-               title='Jährlicher Durchschnitt Temperatur Arber',
-               labels={'YEAR': 'Jahr', 'LUFTTEMPERATUR': 'Temperatur (°C)'})
-
-
-# Regressionsgerade für Arber mit OLS
-model_A = ols('LUFTTEMPERATUR ~ YEAR', data=df_A_yearly_temp).fit()
-line_A = model_A.predict(df_A_yearly_temp)
-r_value_A_squared = model_A.rsquared
-
-fig12.add_scatter(x=df_A_yearly_temp['YEAR'], y=line_A, mode='lines', 
-                 name=f'Trend (R²={r_value_A_squared:.3f})',
-                 line=dict(color='red', dash='dash'))
-
-fig13 = px.line(df_St_yearly_temp, x='YEAR', y='LUFTTEMPERATUR',
-               title='Jährlicher Durchschnitt Temperatur Straubing',
-               labels={'YEAR': 'Jahr', 'LUFTTEMPERATUR': 'Temperatur (°C)'})
-
-fig14 = px.line(df_Sc_yearly_temp, x='YEAR', y='LUFTTEMPERATUR',
-               title='Jährlicher Durchschnitt Temperatur Schorndorf',
-               labels={'YEAR': 'Jahr', 'LUFTTEMPERATUR': 'Temperatur (°C)'})
-
-fig15 = px.bar(df_A_yearly_rain, x='YEAR', y='NIEDERSCHLAGSHOEHE',
-               title='Jährliche Gesamtniederschlagshöhe Arber',
-               labels={'YEAR': 'Jahr', 'NIEDERSCHLAGSHOEHE': 'Niederschlag (mm)'})
-
-fig16 = px.bar(df_St_yearly_rain, x='YEAR', y='NIEDERSCHLAGSHOEHE',
-               title='Jährliche Gesamtniederschlagshöhe Straubing',
-               labels={'YEAR': 'Jahr', 'NIEDERSCHLAGSHOEHE': 'Niederschlag (mm)'})
-
-fig17 = px.bar(df_Sc_yearly_rain, x='YEAR', y='NIEDERSCHLAGSHOEHE',
-               title='Jährliche Gesamtniederschlagshöhe Schorndorf',
-               labels={'YEAR': 'Jahr', 'NIEDERSCHLAGSHOEHE': 'Niederschlag (mm)'})
-
-fig18 = px.line(  
-    df_A_2015, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Arber 2015',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig19 = px.line(  
-    df_St_2015, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Straubing 2015',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig20 = px.line(  
-    df_Sc_2015, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Schorndorf 2015',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig21 = px.line(  
-    df_A_1983, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Arber 1983',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig22 = px.line(  
-    df_St_1951, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Straubing 1951',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
-
-fig23 = px.line(  
-    df_Sc_1997, 
-    x='DATE', 
-    y='LUFTTEMPERATUR',
-    title='Temperaturverlauf Schorndorf 1997',
-    labels={'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
-)
+dash.register_page(__name__)
 
-layout = dbc.Container(
-    dbc.Tabs([
-        dbc.Tab(label="Graphen", tab_id="tab-graphs", children=[
-            dbc.Row([
-                dbc.Col([
-                    html.H1(['Trends Temperatur und Niederschlag']),
-                    html.H3('Temperatur',className="text-muted")
-                ], className='row-titles')
+# Spalten der Trendübersicht (pxs.trends.trend_table)
+TREND_COLUMNS = {
+    'station': 'Station', 'column': 'Messgröße', 'season': 'Zeitraum', 'years': 'Jahre', 'first': 'von',
+    'last': 'bis', 'ols_decade': 'OLS / 10 J.', 'r2': 'R²', 'sen_decade': 'Sen / 10 J.', 'mk_z': 'MK Z',
+    'mk_p': 'MK p', 'significant': 'signifikant',
+}
+
+# Jahresmittel, Verläufe und Statistiken aller Stationen vorberechnen
+for _location in LOCATIONS:
+    warmup.register(f'trends-{_location}', lambda location=_location: trends_view(location))
+warmup.register('trend-table', trends.trend_table)
+warmup.register('anomalies', lambda: anomaly_view('straubing', 'LUFTTEMPERATUR', '1961-1990', 2015))
+
+def layout(**kwargs):
+    return dbc.Container([
+        # Figuren für die clientseitige Umschaltung (siehe SWITCHED_FIGURES)
+        dcc.Store(id='trends-figures'),
+        dbc.Tabs([
+            dbc.Tab(label="Graphen", tab_id="tab-graphs", children=[
+                dbc.Row([
+                    dbc.Col([
+                        html.H1(['Trends Temperatur und Niederschlag']),
+                        html.H3('Temperatur',className="text-muted")
+                    ], className='row-titles')
+                ]),
+                # Plot output
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(
+                            id='temp-location-dropdown',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="temperature-graph",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        html.H3('Niederschlag',className="text-muted"),
+                        dcc.Dropdown(
+                            id='rain-location-dropdown',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="rain-graph",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        html.H3('Temperatur - historischer Vergleich',className="text-muted"),
+                        dcc.Dropdown(
+                            id='temprature-location-dropdown-2015',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="temprature-graph-2015",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(
+                            id='temprature-location-dropdown-history',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="temprature-graph-history",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        html.H3('Niederschlag - historischer Vergleich',className="text-muted"),
+                        dcc.Dropdown(
+                            id='rain-location-dropdown-2015',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="rain-graph-2015",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(
+                            id='rain-location-dropdown-history',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Graph(id="rain-graph-history",style={'height': '500px'})
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        html.H3('Jährliche Durchschnitte', className='text-muted')
+                    ], className='row-titles')
+                ]),
+                dbc.Row([
+                    dbc.Col(dcc.Graph(id=f'yearly-temp-{location}'))
+                    for location in LOCATIONS
+                ]),
+                dbc.Row([
+                    dbc.Col([dcc.Graph(id=f'yearly-rain-{location}')])
+                    for location in LOCATIONS
+                ]),
             ]),
-            # Plot output
-            dbc.Row([
-                dbc.Col([
-                    dcc.Dropdown(
-                        id='temp-location-dropdown',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="temperature-graph",style={'height': '500px'})
-                ])
+            dbc.Tab(label="Tabellen", tab_id="tab-tables", children=[
+                dbc.Row([
+                    dbc.Col([
+                        html.H1("Deskriptive Statistik"),
+                        dcc.Dropdown(
+                            id='statistics-location-dropdown',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='arber',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Dropdown(
+                            id='statistics-year-dropdown',
+                            options=[
+                                {'label': 'Alle Jahre', 'value': 'all'},
+                                {'label': '2015', 'value': '2015'},
+                                {'label': 'Historisch', 'value': 'history'},
+                            ],
+                            value='all',
+                            clearable=False,
+                            style={'width': '300px', 'marginTop': '10px'}
+                        ),
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dash_table.DataTable(
+                            id='statistics-table',
+                            columns=[],
+                            data=[],
+                            style_table={'overflowX': 'auto'},
+                            page_size=10
+                        )
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(
+                            id='statistics-location-dropdown-2',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='straubing',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Dropdown(
+                            id='statistics-year-dropdown-2',
+                            options=[
+                                {'label': 'Alle Jahre', 'value': 'all'},
+                                {'label': '2015', 'value': '2015'},
+                                {'label': 'Historisch', 'value': 'history'},
+                            ],
+                            value='all',
+                            clearable=False,
+                            style={'width': '300px', 'marginTop': '10px'}
+                        ),
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dash_table.DataTable(
+                            id='statistics-table-2',
+                            columns=[],
+                            data=[],
+                            style_table={'overflowX': 'auto'},
+                            page_size=10
+                        )
+                    ])
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(
+                            id='statistics-location-dropdown-3',
+                            options=[
+                                {'label': 'Arber', 'value': 'arber'},
+                                {'label': 'Straubing', 'value': 'straubing'},
+                                {'label': 'Schorndorf', 'value': 'schorndorf'},
+                            ],
+                            value='schorndorf',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Dropdown(
+                            id='statistics-year-dropdown-3',
+                            options=[
+                                {'label': 'Alle Jahre', 'value': 'all'},
+                                {'label': '2015', 'value': '2015'},
+                                {'label': 'Historisch', 'value': 'history'},
+                            ],
+                            value='all',
+                            clearable=False,
+                            style={'width': '300px', 'marginTop': '10px'}
+                        ),
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dash_table.DataTable(
+                            id='statistics-table-3',
+                            columns=[],
+                            data=[],
+                            style_table={'overflowX': 'auto'},
+                            page_size=10
+                        )
+                    ])
+                ]),
             ]),
-            dbc.Row([
-                dbc.Col([
-                    html.H3('Niederschlag',className="text-muted"),
-                    dcc.Dropdown(
-                        id='rain-location-dropdown',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="rain-graph",style={'height': '500px'})
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    html.H3('Temperatur - historischer Vergleich',className="text-muted"),
-                    dcc.Dropdown(
-                        id='temprature-location-dropdown-2015',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="temprature-graph-2015",style={'height': '500px'})
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dcc.Dropdown(
-                        id='temprature-location-dropdown-history',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="temprature-graph-history",style={'height': '500px'})
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    html.H3('Niederschlag - historischer Vergleich',className="text-muted"),
-                    dcc.Dropdown(
-                        id='rain-location-dropdown-2015',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="rain-graph-2015",style={'height': '500px'})
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dcc.Dropdown(
-                        id='rain-location-dropdown-history',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Graph(id="rain-graph-history",style={'height': '500px'})
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    html.H3('Jährliche Durchschnitte', className='text-muted')
-                ], className='row-titles')
-            ]),
-            dbc.Row([
-                dbc.Col(dcc.Graph(figure=fig12)),
-                dbc.Col(dcc.Graph(figure=fig13)),
-                dbc.Col(dcc.Graph(figure=fig14)),  
-            ]),
-            dbc.Row([
-                dbc.Col([dcc.Graph(figure=fig15)]),
-                dbc.Col([dcc.Graph(figure=fig16)]),
-                dbc.Col([dcc.Graph(figure=fig17)])
+            dbc.Tab(label="Anomalien", tab_id="tab-anomalies", children=[
+                dbc.Row([
+                    dbc.Col([
+                        html.H1("Abweichung vom Normalwert"),
+                        dcc.Dropdown(
+                            id='anomaly-location-dropdown',
+                            options=[{'label': name, 'value': location} for location, name in LOCATIONS.items()],
+                            value='straubing',
+                            clearable=False,
+                        ),
+                    ], width=3),
+                    dbc.Col([
+                        html.H1("\u00a0"),
+                        dcc.Dropdown(
+                            id='anomaly-column-dropdown',
+                            options=[{'label': label, 'value': column} for column, label in CORRELATION_COLUMNS.items()],
+                            value='LUFTTEMPERATUR',
+                            clearable=False,
+                        ),
+                    ], width=3),
+                    dbc.Col([
+                        html.H1("\u00a0"),
+                        dcc.Dropdown(
+                            id='anomaly-reference-dropdown',
+                            options=[{'label': f'Referenz {label}', 'value': key}
+                                     for key, (label, _, _) in REFERENCE_PERIODS.items()],
+                            value='1961-1990',
+                            clearable=False,
+                        ),
+                    ], width=3),
+                    dbc.Col([
+                        html.H1("\u00a0"),
+                        dcc.Input(id='anomaly-year', type='number', value=2015, debounce=True,
+                                  style={'width': '100%'}),
+                    ], width=3),
+                ]),
+                dbc.Row([dbc.Col([dcc.Graph(id='anomaly-stripes', style={'height': '250px'})])]),
+                dbc.Row([dbc.Col([dcc.Graph(id='anomaly-yearly', style={'height': '400px'})])]),
+                dbc.Row([dbc.Col([dcc.Graph(id='anomaly-band', style={'height': '500px'})])]),
             ]),
+            dbc.Tab(label="Trendübersicht", tab_id="tab-trend-overview", children=[
+                dbc.Row([
+                    dbc.Col([
+                        html.H1("Trends aller Stationen und Messgrößen"),
+                        html.P("Steigungen pro Jahrzehnt aus OLS und Sen-Schätzer, Signifikanz nach Mann-Kendall "
+                               f"(p < {trends.SIGNIFICANCE}).", className="text-muted"),
+                        dcc.Dropdown(
+                            id='trend-overview-season',
+                            options=[{'label': 'Alle Zeiträume', 'value': 'all'}] +
+                                    [{'label': label, 'value': key} for key, (label, _) in SEASONS.items()],
+                            value='year',
+                            clearable=False,
+                            style={'width': '300px'}
+                        ),
+                        dcc.Checklist(
+                            id='trend-overview-significant',
+                            options=[{'label': 'Nur signifikante Trends', 'value': 'significant'}],
+                            value=[],
+                            style={'margin': '10px 0'}
+                        ),
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dash_table.DataTable(
+                            id='trend-overview-table',
+                            columns=[{'name': label, 'id': key} for key, label in TREND_COLUMNS.items()],
+                            data=[],
+                            sort_action='native',
+                            filter_action='native',
+                            style_table={'overflowX': 'auto'},
+                            page_size=25
+                        )
+                    ])
+                ]),
+            ])
         ]),
-        dbc.Tab(label="Tabellen", tab_id="tab-tables", children=[
-            dbc.Row([
-                dbc.Col([
-                    html.H1("Deskriptive Statistik"),
-                    dcc.Dropdown(
-                        id='statistics-location-dropdown',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='arber',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Dropdown(
-                        id='statistics-year-dropdown',
-                        options=[
-                            {'label': 'Alle Jahre', 'value': 'all'},
-                            {'label': '2015', 'value': '2015'},
-                            {'label': 'Historisch', 'value': 'history'},
-                        ],
-                        value='all',
-                        clearable=False,
-                        style={'width': '300px', 'marginTop': '10px'}
-                    ),
-                ], width=12)
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dash_table.DataTable(
-                        id='statistics-table',
-                        columns=[],
-                        data=[],
-                        style_table={'overflowX': 'auto'},
-                        page_size=10
-                    )
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dcc.Dropdown(
-                        id='statistics-location-dropdown-2',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='straubing',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Dropdown(
-                        id='statistics-year-dropdown-2',
-                        options=[
-                            {'label': 'Alle Jahre', 'value': 'all'},
-                            {'label': '2015', 'value': '2015'},
-                            {'label': 'Historisch', 'value': 'history'},
-                        ],
-                        value='all',
-                        clearable=False,
-                        style={'width': '300px', 'marginTop': '10px'}
-                    ),
-                ], width=12)
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dash_table.DataTable(
-                        id='statistics-table-2',
-                        columns=[],
-                        data=[],
-                        style_table={'overflowX': 'auto'},
-                        page_size=10
-                    )
-                ])
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dcc.Dropdown(
-                        id='statistics-location-dropdown-3',
-                        options=[
-                            {'label': 'Arber', 'value': 'arber'},
-                            {'label': 'Straubing', 'value': 'straubing'},
-                            {'label': 'Schorndorf', 'value': 'schorndorf'},
-                        ],
-                        value='schorndorf',
-                        clearable=False,
-                        style={'width': '300px'}
-                    ),
-                    dcc.Dropdown(
-                        id='statistics-year-dropdown-3',
-                        options=[
-                            {'label': 'Alle Jahre', 'value': 'all'},
-                            {'label': '2015', 'value': '2015'},
-                            {'label': 'Historisch', 'value': 'history'},
-                        ],
-                        value='all',
-                        clearable=False,
-                        style={'width': '300px', 'marginTop': '10px'}
-                    ),
-                ], width=12)
-            ]),
-            dbc.Row([
-                dbc.Col([
-                    dash_table.DataTable(
-                        id='statistics-table-3',
-                        columns=[],
-                        data=[],
-                        style_table={'overflowX': 'auto'},
-                        page_size=10
-                    )
-                ])
-            ]),
-        ])
-    ]),
-    fluid=True
+    ], fluid=True)
+
+# == Figuren-Umschaltung im Browser =========================================================
+# Die Verlaufsfiguren aller Stationen (pxs.views.trends_figures) werden einmal in 'trends-figures' geladen, das
+# Umschalten per Dropdown passiert danach clientseitig ohne Anfrage an den Server
+SWITCHED_FIGURES = {
+    'temperature-graph': ('temp-location-dropdown', 'temp'),
+    'rain-graph': ('rain-location-dropdown', 'rain'),
+    'temprature-graph-2015': ('temprature-location-dropdown-2015', 'temp_2015'),
+    'temprature-graph-history': ('temprature-location-dropdown-history', 'temp_history'),
+    'rain-graph-2015': ('rain-location-dropdown-2015', 'rain_2015'),
+    'rain-graph-history': ('rain-location-dropdown-history', 'rain_history'),
+}
+
+# Per GET statt als Dash-Callback: die Antwort trägt ein ETag, bei gleicher Version
+# antwortet der Server mit 304 und der Browser nimmt seine gecachte Kopie (pxs.http)
+dash.clientside_callback(
+    """
+    async function(version, quality) {
+        const response = await fetch('%s?version=' + encodeURIComponent(version)
+                                     + '&quality=' + encodeURIComponent(quality || 0));
+        return response.ok ? response.json() : window.dash_clientside.no_update;
+    }
+    """ % dash.get_relative_path('/figures/trends'),
+    Output('trends-figures', 'data'),
+    Input('dataset-version', 'data'),
+    Input('min-quality', 'value'),
+    prevent_initial_call=False
 )
 
-@dash.callback(
-    Output('temperature-graph', 'figure'),
-    Input('temp-location-dropdown', 'value')
-)
-def update_temp_graph(location):
-    if location == 'arber':
-        return fig
-    elif location == 'straubing':
-        return fig1
-    elif location == 'schorndorf':
-        return fig2
-    return fig
-
-@dash.callback(
-    Output('rain-graph', 'figure'),
-    Input('rain-location-dropdown', 'value')
-)
-def update_rain_graph(location):
-    if location == 'arber':
-        return fig3
-    elif location == 'straubing':
-        return fig4
-    elif location == 'schorndorf':
-        return fig5
-    return fig3
-
-
-
-@dash.callback(
-    Output('temprature-graph-2015', 'figure'),
-    Input('temprature-location-dropdown-2015', 'value')
-)
-def update_temprature_graph_2015(location):
-    if location == 'arber':
-        return fig18
-    elif location == 'straubing':
-        return fig19
-    elif location == 'schorndorf':
-        return fig20
-    return fig3
-
-@dash.callback(
-    Output('temprature-graph-history', 'figure'),
-    Input('temprature-location-dropdown-history', 'value')
-)
-def update_temprature_graph_history(location):
-    if location == 'arber':
-        return fig21
-    elif location == 'straubing':
-        return fig22
-    elif location == 'schorndorf':
-        return fig23
-    return fig3
-
-@dash.callback(
-    Output('rain-graph-2015', 'figure'),
-    Input('rain-location-dropdown-2015', 'value')
-)
-def update_rain_graph_2015(location):
-    if location == 'arber':
-        return fig6
-    elif location == 'straubing':
-        return fig8
-    elif location == 'schorndorf':
-        return fig10
-    return fig3
-
-@dash.callback(
-    Output('rain-graph-history', 'figure'),
-    Input('rain-location-dropdown-history', 'value')
-)
-def update_rain_graph_history(location):
-    if location == 'arber':
-        return fig7
-    elif location == 'straubing':
-        return fig9
-    elif location == 'schorndorf':
-        return fig11
-    return fig3
+for graph_id, (dropdown_id, key) in SWITCHED_FIGURES.items():
+    dash.clientside_callback(
+        """
+        function(location, figures) {
+            if (!figures) {
+                return window.dash_clientside.no_update;
+            }
+            return (figures[location] || figures['arber'])['%s'];
+        }
+        """ % key,
+        Output(graph_id, 'figure'),
+        Input(dropdown_id, 'value'),
+        Input('trends-figures', 'data'),
+        prevent_initial_call=False
+    )
+
+# Jahreswerte: je Station eine feste Grafik aus demselben Figurensatz
+for location in LOCATIONS:
+    for key, prefix in (('yearly_temp', 'yearly-temp'), ('yearly_rain', 'yearly-rain')):
+        dash.clientside_callback(
+            """
+            function(figures) {
+                return figures ? figures['%s']['%s'] : window.dash_clientside.no_update;
+            }
+            """ % (location, key),
+            Output(f'{prefix}-{location}', 'figure'),
+            Input('trends-figures', 'data'),
+            prevent_initial_call=False
+        )
+
+# Geteilt von allen drei Tabellen und allen Sitzungen
+@memo.memoize()
+def statistics_table(location, year, min_quality=None):
+    """Spalten und Zeilen der Statistik-Tabelle ('all', '2015' oder 'history')"""
+    statistics = trends_view(location, min_quality)['statistics']
+    df = statistics.get(year, statistics['history'])
+    columns = [{"name": c, "id": c} for c in df.columns]
+    data = df.to_dict('records')
+    return columns, data
 
 @dash.callback(
     Output('statistics-table', 'columns'),
     Output('statistics-table', 'data'),
     Input('statistics-location-dropdown', 'value'),
-    Input('statistics-year-dropdown', 'value')
+    Input('statistics-year-dropdown', 'value'),
+    Input('dataset-version', 'data'),
+    Input('min-quality', 'value')
 )
-def update_statistics_table(location, year):
-    if location == 'arber':
-        if year == 'all':
-            df = df_A_desc_all
-        elif year == '2015':
-            df = df_A_desc_2015
-        else:  # history
-            df = df_A_desc_1983
-    elif location == 'straubing':
-        if year == 'all':
-            df = df_St_desc_all
-        elif year == '2015':
-            df = df_St_desc_2015
-        else:  # history
-            df = df_St_desc_1951
-    else:  # schorndorf
-        if year == 'all':
-            df = df_Sc_desc_all
-        elif year == '2015':
-            df = df_Sc_desc_2015
-        else:  # history
-            df = df_Sc_desc_1997
-    
-    columns = [{"name": c, "id": c} for c in df.columns]
-    data = df.to_dict('records')
-    
-    return columns, data
+def update_statistics_table(location, year, version, min_quality):
+    return statistics_table(location, year, min_quality)
 
 @dash.callback(
     Output('statistics-table-2', 'columns'),
     Output('statistics-table-2', 'data'),
     Input('statistics-location-dropdown-2', 'value'),
-    Input('statistics-year-dropdown-2', 'value')
+    Input('statistics-year-dropdown-2', 'value'),
+    Input('dataset-version', 'data'),
+    Input('min-quality', 'value')
 )
-def update_statistics_table_2(location, year):
-    if location == 'arber':
-        if year == 'all':
-            df = df_A_desc_all
-        elif year == '2015':
-            df = df_A_desc_2015
-        else:
-            df = df_A_desc_1983
-    elif location == 'straubing':
-        if year == 'all':
-            df = df_St_desc_all
-        elif year == '2015':
-            df = df_St_desc_2015
-        else:
-            df = df_St_desc_1951
-    else:
-        if year == 'all':
-            df = df_Sc_desc_all
-        elif year == '2015':
-            df = df_Sc_desc_2015
-        else:
-            df = df_Sc_desc_1997
-    
-    columns = [{"name": c, "id": c} for c in df.columns]
-    data = df.to_dict('records')
-    return columns, data
+def update_statistics_table_2(location, year, version, min_quality):
+    return statistics_table(location, year, min_quality)
 
 @dash.callback(
     Output('statistics-table-3', 'columns'),
     Output('statistics-table-3', 'data'),
     Input('statistics-location-dropdown-3', 'value'),
-    Input('statistics-year-dropdown-3', 'value')
+    Input('statistics-year-dropdown-3', 'value'),
+    Input('dataset-version', 'data'),
+    Input('min-quality', 'value')
 )
-def update_statistics_table_3(location, year):
-    if location == 'arber':
-        if year == 'all':
-            df = df_A_desc_all
-        elif year == '2015':
-            df = df_A_desc_2015
-        else:
-            df = df_A_desc_1983
-    elif location == 'straubing':
-        if year == 'all':
-            df = df_St_desc_all
-        elif year == '2015':
-            df = df_St_desc_2015
-        else:
-            df = df_St_desc_1951
-    else:
-        if year == 'all':
-            df = df_Sc_desc_all
-        elif year == '2015':
-            df = df_Sc_desc_2015
-        else:
-            df = df_Sc_desc_1997
-    
-    columns = [{"name": c, "id": c} for c in df.columns]
-    data = df.to_dict('records')
-    return columns, data
\ No newline at end of file
+def update_statistics_table_3(location, year, version, min_quality):
+    return statistics_table(location, year, min_quality)
+
+
+@dash.callback(
+    Output('trend-overview-table', 'data'),
+    Input('trend-overview-season', 'value'),
+    Input('trend-overview-significant', 'value'),
+    Input('min-quality', 'value'),
+    Input('dataset-version', 'data'),
+)
+@memo.memoize()
+def update_trend_overview(season, significant, min_quality, version):
+    # Eine Rechnung für alle Reihen, bis sich die Daten ändern (pxs.trends)
+    table = trends.trend_table(min_quality)
+    if table.empty:
+        return []
+    if season != 'all':
+        table = table[table['season'] == season]
+    if significant:
+        table = table[table['significant']]
+    table = table.round({'ols_decade': 3, 'r2': 3, 'sen_decade': 3, 'mk_z': 2, 'mk_p': 4})
+    return table.assign(significant=table['significant'].map({True: 'ja', False: 'nein'})).to_dict('records')
+
+
+@dash.callback(
+    Output('anomaly-stripes', 'figure'),
+    Output('anomaly-yearly', 'figure'),
+    Output('anomaly-band', 'figure'),
+    Input('anomaly-location-dropdown', 'value'),
+    Input('anomaly-column-dropdown', 'value'),
+    Input('anomaly-reference-dropdown', 'value'),
+    Input('anomaly-year', 'value'),
+    Input('min-quality', 'value'),
+    Input('dataset-version', 'data'),
+)
+@memo.memoize()
+def update_anomalies(location, column, reference, year, min_quality, version):
+    # Normalwerte und Anomalien liegen pro Station im Cache (pxs.climatology)
+    figures = anomaly_view(location, column, reference, 2015 if year is None else year, min_quality)
+    if figures is None:
+        # Kein ganzes Jahr der Station: Figuren bleiben stehen
+        return no_update, no_update, no_update
+    return figures['stripes'], figures['yearly'], figures['band']
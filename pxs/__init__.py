@@ -0,0 +1 @@
+"""Gemeinsame Datenschicht der PXS-App (Stationsdaten, Caches, Hilfsfunktionen)."""
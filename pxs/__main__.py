@@ -0,0 +1,24 @@
+"""Kommandozeile: ``python -m pxs <befehl> [optionen]``
+
+    build-cache   Artefakte für den Start der App vorberechnen (pxs.cache)
+    memory        Speicherbedarf der Stationsdaten ausgeben (pxs.memory)
+"""
+import sys
+
+COMMANDS = {
+    "build-cache": "pxs.cache",
+    "memory": "pxs.memory",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__.strip())
+        return 2
+    module = __import__(COMMANDS[argv[0]], fromlist=["main"])
+    return module.main(argv[1:]) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
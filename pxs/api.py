@@ -0,0 +1,276 @@
+"""Lesende REST-Schnittstelle auf die Stationsdaten (unter app.server).
+
+    GET /api/v1/stations
+        Stationen mit Spalten, Zeilenzahl, erstem und letztem Tag.
+    GET /api/v1/stations/<name>?variables=LUFTTEMPERATUR,NIEDERSCHLAGSHOEHE
+            &start=2000-01-01&end=2015-12-31&resolution=daily&format=json
+            &offset=0&limit=100000&quality=5
+
+``resolution`` ist ``daily`` (Standard), ``monthly`` oder ``yearly``; Monats- und
+Jahreswerte sind Mittelwerte, Niederschlag die Summe (``agg=mean|sum|min|max``
+überschreibt das) und werden für ganze Monate/Jahre ausgegeben. ``format`` ist
+``json`` (spaltenweise, fehlende Werte als null), ``npy`` (ein strukturiertes
+Array, ``np.load``) oder ``arrow`` (Arrow IPC Stream, nur mit pyarrow).
+``quality`` (eine Stufe aus qc.QUALITY_LEVELS) setzt Werte aus Zeilen unter
+diesem Qualitätsniveau auf fehlend.
+
+Die Zeilen werden aus den Spalten des Stationsspeichers in Blöcken von
+CHUNK_ROWS Zeilen gestreamt, ohne DataFrame. Seiten: ``offset``/``limit`` oder
+der Header ``Range: rows=0-9999`` (Antwort 206); ``Content-Range: rows a-b/gesamt``
+und ein ``Link``-Header mit rel="next" zeigen, ob noch Zeilen folgen. Ein Beginn
+hinter der letzten Zeile ist ein Fehler: 400 bei ``offset``, 416 bei ``Range``.
+
+    PXS_API_PAGE_SIZE   höchstens so viele Zeilen pro Antwort (Standard 100000)
+"""
+import io
+import json
+import os
+import re
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request, url_for
+from werkzeug.exceptions import HTTPException, BadRequest, NotFound, NotAcceptable, RequestedRangeNotSatisfiable
+
+from pxs import qc
+from pxs.store import stations, DATE_COLUMN, DATE_INTEGER_COLUMN, to_datetime, to_day
+
+PAGE_SIZE = int(os.environ.get("PXS_API_PAGE_SIZE", "100000"))
+CHUNK_ROWS = 65536
+
+RESOLUTIONS = {"daily": None, "monthly": "datetime64[M]", "yearly": "datetime64[Y]"}
+AGGREGATES = ("mean", "sum", "min", "max")
+# Spalten, deren Monats-/Jahreswert die Summe ist
+SUM_COLUMNS = {"NIEDERSCHLAGSHOEHE"}
+FORMATS = {"json": "application/json", "npy": "application/octet-stream",
+           "arrow": "application/vnd.apache.arrow.stream"}
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+@api.errorhandler(HTTPException)
+def _error(error):
+    response = jsonify({"error": error.description})
+    # 416 nennt die Gesamtzahl der Zeilen (Content-Range: rows */gesamt)
+    response.headers.extend((key, value) for key, value in error.get_headers() if key == "Content-Range")
+    return response, error.code
+
+
+# == Auswahl ===============================================================================
+
+def _variables(station, text):
+    if not text:
+        return [name for name in station.names if name not in (DATE_COLUMN, DATE_INTEGER_COLUMN)]
+    names = [name.strip() for name in text.split(",") if name.strip()]
+    if not names:
+        raise BadRequest("no variables given")
+    unknown = [name for name in names if name not in station.masks]
+    if unknown:
+        raise BadRequest(f"unknown variables: {', '.join(unknown)}")
+    return names
+
+
+def _day(text, name):
+    if not text:
+        return None
+    try:
+        return int(to_day(np.datetime64(text, "D")))
+    except ValueError:
+        raise BadRequest(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def _page(total):
+    """(offset, stop, partial) from a 'Range: rows=a-b' header or offset/limit."""
+    match = re.fullmatch(r"rows=(\d+)-(\d*)", request.headers.get("Range", "").strip())
+    if match:
+        offset = int(match.group(1))
+        stop = int(match.group(2)) + 1 if match.group(2) else total
+        partial = True
+    else:
+        try:
+            offset = int(request.args.get("offset", 0))
+            stop = offset + int(request.args.get("limit", PAGE_SIZE))
+        except ValueError:
+            raise BadRequest("offset and limit must be integers")
+        partial = False
+    if offset < 0 or stop < offset:
+        raise BadRequest("invalid row range")
+    if total and offset >= total:
+        if partial:
+            raise RequestedRangeNotSatisfiable(length=total, units="rows",
+                                               description=f"first row {offset} beyond {total} rows")
+        raise BadRequest(f"offset {offset} beyond {total} rows")
+    return offset, min(stop, total, offset + PAGE_SIZE), partial
+
+
+def _series(station, name, min_quality=None):
+    # Saubere Messwerte sind Views, alle anderen Varianten cacht der Stationsspeicher
+    return station.series(name, min_quality=min_quality)
+
+
+def aggregate(station, column, resolution, how, min_quality=None):
+    """(period start days, float32 values) of a column per month or year, cached per station."""
+    def build():
+        days = station.day
+        periods = to_datetime(days).astype(RESOLUTIONS[resolution])
+        if not len(days):
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+        # Tage sind sortiert -> jeder Zeitraum ist ein zusammenhängender Block
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        values = _series(station, column, min_quality)
+        valid = ~np.isnan(values)
+        count = np.add.reduceat(valid, starts)
+        if how in ("min", "max"):
+            result = (np.fmin if how == "min" else np.fmax).reduceat(values, starts)
+        else:
+            result = np.add.reduceat(np.where(valid, values, 0).astype(np.float64), starts)
+            if how == "mean":
+                result = result / np.maximum(count, 1)
+        result = np.where(count > 0, result, np.nan).astype(np.float32)
+        return to_day(periods[starts].astype("datetime64[D]")), result
+
+    return station.cached(("api-aggregate", column, resolution, how, int(min_quality or 0)), build)
+
+
+def select(station, variables, start, end, resolution, how=None, min_quality=None):
+    """Day numbers and {variable: float32 values} of the requested rows (views where possible)."""
+    if RESOLUTIONS[resolution] is None:
+        rows = station.rows(start, end)
+        return station.day[rows], {name: _series(station, name, min_quality)[rows] for name in variables}
+
+    # Ganze Zeiträume: Beginn auf den Monats-/Jahresanfang zurücksetzen
+    if start is not None:
+        start = int(to_day(to_datetime(start).astype(RESOLUTIONS[resolution]).astype("datetime64[D]")))
+    columns = {}
+    for name in variables:
+        days, values = aggregate(station, name, resolution, how or ("sum" if name in SUM_COLUMNS else "mean"),
+                                 min_quality)
+        columns[name] = values
+    lo = 0 if start is None else int(np.searchsorted(days, start, side="left"))
+    hi = len(days) if end is None else int(np.searchsorted(days, end, side="right"))
+    return days[lo:hi], {name: values[lo:hi] for name, values in columns.items()}
+
+
+# == Kodierung =============================================================================
+
+def _chunks(days, columns, offset, stop):
+    for lo in range(offset, stop, CHUNK_ROWS):
+        hi = min(lo + CHUNK_ROWS, stop)
+        yield to_datetime(days[lo:hi]), {name: values[lo:hi] for name, values in columns.items()}
+
+
+def _json_values(values):
+    # Kürzeste float32-Darstellung ("1.6" statt "1.600000023841858"), NaN -> null
+    text = values.astype(str)
+    text[np.isnan(values)] = "null"
+    return ", ".join(text.tolist())
+
+
+def encode_json(station, resolution, days, columns, offset, stop, total):
+    head = {"station": station.name, "resolution": resolution, "offset": offset, "total": total}
+    yield json.dumps(head)[:-1] + ', "columns": {'
+    for index, name in enumerate([DATE_COLUMN, *columns]):
+        yield f'{", " if index else ""}{json.dumps(name)}: ['
+        for lo in range(offset, stop, CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, stop)
+            if name == DATE_COLUMN:
+                part = json.dumps(np.datetime_as_string(to_datetime(days[lo:hi])).tolist())[1:-1]
+            else:
+                part = _json_values(columns[name][lo:hi])
+            yield (", " if lo > offset else "") + part
+        yield "]"
+    yield "}}"
+
+
+def encode_npy(station, resolution, days, columns, offset, stop, total):
+    dtype = np.dtype([(DATE_COLUMN, "datetime64[D]"), *((name, np.float32) for name in columns)])
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {"descr": np.lib.format.dtype_to_descr(dtype),
+                                                  "fortran_order": False, "shape": (stop - offset,)})
+    yield header.getvalue()
+    for dates, values in _chunks(days, columns, offset, stop):
+        block = np.empty(len(dates), dtype)
+        block[DATE_COLUMN] = dates
+        for name, column in values.items():
+            block[name] = column
+        yield block.tobytes()
+
+
+def encode_arrow(station, resolution, days, columns, offset, stop, total):
+    import pyarrow as pa
+
+    schema = pa.schema([(DATE_COLUMN, pa.date32()), *((name, pa.float32()) for name in columns)],
+                       metadata={"station": station.name, "resolution": resolution,
+                                 "offset": str(offset), "total": str(total)})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for dates, values in _chunks(days, columns, offset, stop):
+            # from_pandas: NaN -> null
+            arrays = [pa.array(dates), *(pa.array(column, from_pandas=True) for column in values.values())]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+ENCODERS = {"json": encode_json, "npy": encode_npy, "arrow": encode_arrow}
+
+
+# == Routen ================================================================================
+
+@api.route("/stations")
+def station_list():
+    result = []
+    for name, station in stations.load(stations.names()).items():
+        first, last = (to_datetime(station.day[[0, -1]]).astype(str).tolist() if len(station) else (None, None))
+        result.append({"name": name, "rows": len(station), "first": first, "last": last,
+                       "variables": _variables(station, None)})
+    return jsonify({"version": stations.version, "stations": result})
+
+
+@api.route("/stations/<name>")
+def station_data(name):
+    station = stations.load([name]).get(name)
+    if station is None:
+        raise NotFound(f"unknown station: {name}")
+
+    args = request.args
+    resolution = args.get("resolution", "daily")
+    if resolution not in RESOLUTIONS:
+        raise BadRequest(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    how = args.get("agg")
+    if how is not None and how not in AGGREGATES:
+        raise BadRequest(f"agg must be one of {', '.join(AGGREGATES)}")
+    encoding = args.get("format", "json")
+    if encoding not in FORMATS:
+        raise BadRequest(f"format must be one of {', '.join(FORMATS)}")
+    if encoding == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise NotAcceptable("format=arrow needs pyarrow on the server")
+
+    variables = _variables(station, args.get("variables"))
+    try:
+        min_quality = qc.quality_level(args.get("quality"))
+    except ValueError as error:
+        raise BadRequest(str(error))
+    days, columns = select(station, variables, _day(args.get("start"), "start"), _day(args.get("end"), "end"),
+                           resolution, how, min_quality)
+    total = len(days)
+    offset, stop, partial = _page(total)
+
+    body = ENCODERS[encoding](station, resolution, days, columns, offset, stop, total)
+    response = Response(body, status=206 if partial else 200, mimetype=FORMATS[encoding])
+    response.headers["Content-Range"] = f"rows {offset}-{max(stop - 1, offset)}/{total}" if stop > offset \
+        else f"rows */{total}"
+    response.headers["X-Dataset-Version"] = str(stations.version)
+    if stop < total:
+        query = {**args.to_dict(), "offset": stop, "limit": stop - offset}
+        response.headers["Link"] = f'<{url_for("api.station_data", name=name, **query)}>; rel="next"'
+    return response
+
+
+def install(server):
+    """Registers the /api/v1 routes on the Flask server."""
+    server.register_blueprint(api)
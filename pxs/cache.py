@@ -0,0 +1,58 @@
+"""Offline-Build der Artefakte, damit die App beim Start nichts parsen muss.
+
+    python -m pxs build-cache              # alle data/*.csv parallel einlesen
+    python -m pxs build-cache --jobs 2     # höchstens zwei Prozesse
+    python -m pxs build-cache --check      # nur prüfen, ob die Artefakte aktuell sind
+
+Geschrieben wird eine neue Generation im Spaltenspeicher (SHARED_DIR): die
+Spalten und Jahreswerte jeder Station, die vorberechneten Ansichten der Seiten
+(``views/``) und ein Manifest mit den Prüfsummen der CSVs. Die App mappt die
+Generation beim Start; ändert sich eine CSV, wird sie neu veröffentlicht und
+die Ansichten werden wieder live berechnet.
+"""
+import argparse
+import sys
+import time
+
+from pxs import executor, shared
+from pxs.store import stations, SHARED_DIR
+
+
+def build_cache(directory=SHARED_DIR, jobs=None, store=stations):
+    """Parses all stations in parallel and publishes them with the precomputed views."""
+    from pxs.views import write_views
+
+    paths = {name: store.folder / f"{name}.csv" for name in store.names()}
+    parsed = executor.parse_stations(paths, processes=True, workers=jobs)
+
+    with shared.locked(directory):
+        store.adopt(parsed)
+        generation = store.publish(directory, extra=write_views)
+        store.attach(directory)
+    return generation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pxs build-cache", description="Artefakte vorberechnen")
+    parser.add_argument("--dir", default=SHARED_DIR, help=f"Spaltenspeicher (Standard: {SHARED_DIR})")
+    parser.add_argument("--jobs", type=int, default=None, help="Anzahl paralleler Prozesse")
+    parser.add_argument("--check", action="store_true", help="nur gegen das Manifest prüfen")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = shared.verify(args.dir, stations.folder)
+        for problem in problems:
+            print(problem)
+        if problems:
+            return 1
+        print(f"{shared.current(args.dir)}: aktuell")
+        return 0
+
+    start = time.perf_counter()
+    generation = build_cache(args.dir, args.jobs)
+    print(f"{generation} in {args.dir} geschrieben ({time.perf_counter() - start:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Klimatologischer Normalwert je Kalendertag und Anomalien.
+
+Für eine Referenzperiode (REFERENCE_PERIODS, z.B. 1961-1990) werden je
+Station und Spalte der geglättete mittlere Jahresgang (`gapfill.climatology`)
+und Perzentile je Kalendertag (PERCENTILES, aus einem Fenster von
+gapfill.SMOOTHING_DAYS Tagen um den Tag) berechnet. Daraus entstehen:
+
+    anomalies          Tageswert minus Normalwert des Kalendertags
+    yearly_anomalies   Jahresmittel der Anomalien (Warming Stripes), NaN unter
+                       MIN_COVERAGE gültigen Tagen
+
+Alles wird pro (Station, Spalte, Referenzperiode, Qualitätsfilter) bis zur
+nächsten Datenänderung gecacht. Kalendertage ohne Daten in der
+Referenzperiode bleiben NaN.
+"""
+import numpy as np
+import pandas as pd
+
+from pxs.gapfill import SMOOTHING_DAYS, climatology, day_of_year
+from pxs.indices import MIN_COVERAGE
+from pxs.store import day_years
+
+# Schlüssel -> (Beschriftung, erstes Jahr, letztes Jahr); None = ganze Reihe
+REFERENCE_PERIODS = {
+    "all": ("Gesamte Reihe", None, None),
+    "1961-1990": ("1961 - 1990", 1961, 1990),
+    "1991-2020": ("1991 - 2020", 1991, 2020),
+}
+PERCENTILES = (10, 50, 90)
+
+
+def reference_rows(station, reference):
+    """Slice of the rows inside the reference period."""
+    _, first, last = REFERENCE_PERIODS[reference]
+    years = day_years(station.day)
+    lo = 0 if first is None else int(np.searchsorted(years, first, side="left"))
+    hi = len(years) if last is None else int(np.searchsorted(years, last, side="right"))
+    return slice(lo, hi)
+
+
+def day_percentiles(doy, values, percentiles=PERCENTILES):
+    """{p: 366 values} of the values within ±SMOOTHING_DAYS // 2 days of each day of the year."""
+    valid = ~np.isnan(values)
+    doy, values = doy[valid], values[valid]
+    half = SMOOTHING_DAYS // 2
+    # Jeder Wert zählt für alle Kalendertage im Fenster um seinen Tag
+    offsets = np.arange(-half, half + 1)
+    target = ((doy[:, None] + offsets) % 366).ravel()
+    samples = np.repeat(values, len(offsets))
+    order = np.lexsort((samples, target))
+    target, samples = target[order], samples[order]
+    counts = np.bincount(target, minlength=366)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    result = {}
+    for p in percentiles:
+        # Lineare Interpolation zwischen den Nachbarn wie np.percentile
+        position = starts + (counts - 1) * p / 100
+        lower = np.clip(np.floor(position).astype(np.int64), 0, max(len(samples) - 1, 0))
+        upper = np.clip(np.ceil(position).astype(np.int64), 0, max(len(samples) - 1, 0))
+        weight = position - np.floor(position)
+        if len(samples):
+            value = samples[lower] * (1 - weight) + samples[upper] * weight
+        else:
+            value = np.full(366, np.nan)
+        result[p] = np.where(counts > 0, value, np.nan)
+    return result
+
+
+def baseline(station, column, reference="all", min_quality=None):
+    """{'mean': 366 values, p: 366 values for p in PERCENTILES} of the reference period."""
+    def build():
+        rows = reference_rows(station, reference)
+        days = station.day[rows]
+        values = station.series(column, min_quality=min_quality)[rows].astype(np.float64)
+        return {"mean": climatology(days, values), **day_percentiles(day_of_year(days), values)}
+
+    return station.cached(("climatology", column, reference, int(min_quality or 0)), build)
+
+
+def anomalies(station, column, reference="all", min_quality=None):
+    """float32 deviation of every day from the mean of its day of the year."""
+    def build():
+        normal = baseline(station, column, reference, min_quality)["mean"]
+        values = station.series(column, min_quality=min_quality)
+        return (values - normal[day_of_year(station.day)]).astype(np.float32)
+
+    return station.cached(("anomalies", column, reference, int(min_quality or 0)), build)
+
+
+def yearly_anomalies(station, column, reference="all", min_quality=None):
+    """Mean anomaly per calendar year (NaN below MIN_COVERAGE valid days)."""
+    def build():
+        values = pd.Series(anomalies(station, column, reference, min_quality))
+        grouped = values.groupby(day_years(station.day))
+        means = grouped.mean()
+        return means.where(grouped.count() >= MIN_COVERAGE * 365)
+
+    return station.cached(("yearly-anomalies", column, reference, int(min_quality or 0)), build)
@@ -0,0 +1,111 @@
+"""Vergleich zweier beliebiger Zeiträume einer Station und Spalte.
+
+Die gültigen Werte liegen je Jahr (bzw. Jahreszeit, siehe pxs.indices.SEASONS)
+vorsortiert in einem Block (`sorted_blocks`, gecacht pro Station). Die Werte
+eines Zeitraums sind damit nur noch das Zusammenführen der sortierten
+Blöcke seiner Jahre (`period_values`; die stabile Sortierung von NumPy ist für
+Gleitkommazahlen Timsort und verschmilzt vorsortierte Läufe direkt), ohne
+erneuten Durchlauf über die Tageswerte. Auf den sortierten Werten:
+
+    quantiles         QUANTILES beider Zeiträume und ihre Verschiebung
+    ks                Kolmogorov-Smirnov: größter Abstand der empirischen
+                      Verteilungsfunktionen, p asymptotisch
+    mann_whitney      U über binäre Suche im anderen Zeitraum, p aus der
+                      Normalapproximation mit Bindungskorrektur
+"""
+import numpy as np
+
+from pxs.indices import season_years
+
+QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+HISTOGRAM_BINS = 40
+
+
+def sorted_blocks(station, column, season="year", min_quality=None):
+    """(years, offsets, values): valid values sorted within each year, year i in values[offsets[i]:offsets[i+1]]."""
+    def build():
+        years = season_years(station.day, season)
+        values = station.series(column, min_quality=min_quality)
+        keep = (years >= 0) & ~np.isnan(values)
+        years, values = years[keep], values[keep].astype(np.float64)
+        order = np.lexsort((values, years))
+        years, values = years[order], values[order]
+        unique, starts = np.unique(years, return_index=True)
+        return unique, np.r_[starts, len(values)], values
+
+    return station.cached(("sorted-blocks", column, season, int(min_quality or 0)), build)
+
+
+def period_values(station, column, first_year, last_year, season="year", min_quality=None):
+    """Sorted valid values of the years first_year..last_year (merge of the presorted year blocks)."""
+    years, offsets, values = sorted_blocks(station, column, season, min_quality)
+    lo = int(np.searchsorted(years, first_year, side="left"))
+    hi = int(np.searchsorted(years, last_year, side="right"))
+    blocks = [values[offsets[i]:offsets[i + 1]] for i in range(lo, hi)]
+    if not blocks:
+        return np.zeros(0)
+    return np.sort(np.concatenate(blocks), kind="stable")
+
+
+def quantiles(a, b, levels=QUANTILES):
+    """{'a': ..., 'b': ..., 'shift': b - a} at `levels` of two sorted samples."""
+    qa = np.quantile(a, levels) if len(a) else np.full(len(levels), np.nan)
+    qb = np.quantile(b, levels) if len(b) else np.full(len(levels), np.nan)
+    return {"a": qa, "b": qb, "shift": qb - qa}
+
+
+def ks(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic and asymptotic p of two sorted samples."""
+    from scipy.special import kolmogorov
+
+    points = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, points, side="right") / len(a)
+    cdf_b = np.searchsorted(b, points, side="right") / len(b)
+    d = np.abs(cdf_a - cdf_b).max()
+    n = len(a) * len(b) / (len(a) + len(b))
+    return d, float(kolmogorov(np.sqrt(n) * d))
+
+
+def mann_whitney(a, b):
+    """Mann-Whitney U of `a` and two-sided p (normal approximation, tie corrected) of two sorted samples."""
+    from scipy.special import ndtr
+
+    below = np.searchsorted(b, a, side="left")
+    equal = np.searchsorted(b, a, side="right") - below
+    u = below.sum() + 0.5 * equal.sum()
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    _, ties = np.unique(np.sort(np.concatenate([a, b]), kind="stable"), return_counts=True)
+    variance = n1 * n2 / 12 * ((n + 1) - (ties ** 3 - ties).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return u, float("nan")
+    z = (u - n1 * n2 / 2 - 0.5 * np.sign(u - n1 * n2 / 2)) / np.sqrt(variance)
+    return u, float(2 * ndtr(-abs(z)))
+
+
+def histograms(a, b, bins=HISTOGRAM_BINS):
+    """(bin edges, density a, density b) on common bins."""
+    both = np.concatenate([a, b])
+    edges = np.histogram_bin_edges(both, bins=bins) if len(both) else np.linspace(0, 1, bins + 1)
+    density_a = np.histogram(a, edges, density=True)[0] if len(a) else np.zeros(bins)
+    density_b = np.histogram(b, edges, density=True)[0] if len(b) else np.zeros(bins)
+    return edges, density_a, density_b
+
+
+def compare(station, column, period_a, period_b, season="year", min_quality=None):
+    """Statistics of period_b against period_a ((first_year, last_year) each); None if one is empty."""
+    a = period_values(station, column, *period_a, season=season, min_quality=min_quality)
+    b = period_values(station, column, *period_b, season=season, min_quality=min_quality)
+    if not len(a) or not len(b):
+        return None
+    d, ks_p = ks(a, b)
+    u, mw_p = mann_whitney(a, b)
+    return {
+        "a": a,
+        "b": b,
+        "mean": (a.mean(), b.mean()),
+        "quantiles": quantiles(a, b),
+        "ks": (d, ks_p),
+        "mann_whitney": (u, mw_p),
+        "histograms": histograms(a, b),
+    }
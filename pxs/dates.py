@@ -0,0 +1,65 @@
+"""Vektorisierte Datumsdekodierung für die DWD-Dateien.
+
+Statt die Textspalte DATE (``01.11.1982``) mit ``pd.to_datetime`` zu parsen,
+wird die Tagesnummer (Tage seit 1970-01-01) arithmetisch aus der Ganzzahl
+MESS_DATUM (``19821101``) berechnet. Zeilen, in denen MESS_DATUM fehlt (-999,
+z.B. am Anfang von Schorndorf.csv), werden aus den festen Zeichenpositionen
+von DATE dekodiert.
+"""
+import numpy as np
+
+# Tagesnummer für ungültige/fehlende Datumsangaben
+INVALID_DAY = np.iinfo(np.int32).min
+
+
+def days_from_civil(year, month, day):
+    """Proleptic Gregorian (year, month, day) arrays -> days since 1970-01-01 (int64)."""
+    year = np.asarray(year, dtype=np.int64) - (np.asarray(month) <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((np.asarray(month, dtype=np.int64) + 9) % 12) + 2) // 5 + np.asarray(day) - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _days_checked(year, month, day):
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (year > 0)
+    days = days_from_civil(year, np.clip(month, 1, 12), np.clip(day, 1, 31))
+    # Tag muss vor dem Ersten des Folgemonats liegen (30. Februar usw. sind ungültig)
+    next_month = days_from_civil(year + (month >= 12), np.clip(month, 1, 12) % 12 + 1, 1)
+    valid &= days < next_month
+    return np.where(valid, days, INVALID_DAY).astype(np.int32)
+
+
+def days_from_yyyymmdd(values):
+    """Integer YYYYMMDD array (e.g. MESS_DATUM) -> int32 day numbers, INVALID_DAY where invalid."""
+    values = np.asarray(values, dtype=np.int64)
+    return _days_checked(values // 10000, values // 100 % 100, values % 100)
+
+
+def days_from_ddmmyyyy(strings):
+    """Fixed-width 'DD.MM.YYYY' strings -> int32 day numbers, INVALID_DAY where invalid."""
+    raw = np.asarray(strings, dtype="S10")
+    chars = raw.view(np.uint8).reshape(len(raw), 10).astype(np.int64)
+    digits = chars - ord("0")
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 3] * 10 + digits[:, 4]
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    numeric = np.delete(digits, [2, 5], axis=1)
+    well_formed = ((numeric >= 0) & (numeric <= 9)).all(axis=1) & (chars[:, 2] == ord(".")) & (chars[:, 5] == ord("."))
+    days = _days_checked(year, month, day)
+    return np.where(well_formed, days, INVALID_DAY).astype(np.int32)
+
+
+def decode_days(mess_datum, date_strings):
+    """Day numbers from MESS_DATUM, falling back to the DATE strings where it is missing.
+
+    `date_strings` may be a callable returning the strings, so that the text
+    column is only touched for the fallback rows.
+    """
+    days = days_from_yyyymmdd(np.nan_to_num(np.asarray(mess_datum, dtype=float), nan=-1))
+    missing = days == INVALID_DAY
+    if missing.any():
+        strings = date_strings() if callable(date_strings) else date_strings
+        days[missing] = days_from_ddmmyyyy(np.asarray(strings, dtype=object)[missing].astype(str))
+    return days
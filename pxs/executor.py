@@ -0,0 +1,91 @@
+"""Station-Executor: Arbeit pro Station parallel ausführen, Ergebnisse in Eingabereihenfolge.
+
+Das Parsen läuft je nach PXS_STATION_EXECUTOR in Threads (Standard; der
+CSV-Parser von pandas und numpy geben den GIL meist frei) oder in Prozessen.
+Auswertungen pro Station (Aggregationen, Regressionen, Schnee-Kennzahlen)
+laufen immer im Thread-Pool, weil sie auf die gemappten Arrays des Prozesses
+zugreifen. Rechenintensive Arbeit auf kleinen Eingaben (z.B. die Bootstrap-
+Stichproben der Extremwertanalyse) verteilt `map_processes` auf einen
+dauerhaften Prozess-Pool derselben Größe.
+
+    PXS_STATION_EXECUTOR=thread|process
+    PXS_STATION_WORKERS=8     Größe der Pools (Standard: Anzahl CPUs, höchstens 8)
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR = os.environ.get("PXS_STATION_EXECUTOR", "thread")
+WORKERS = int(os.environ.get("PXS_STATION_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_pool = None
+_process_pool = None
+_pool_lock = threading.Lock()
+_inside = threading.local()
+
+
+def _thread_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="pxs-station")
+        return _pool
+
+
+def _processes():
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=WORKERS)
+        return _process_pool
+
+
+def map_processes(func, items):
+    """[func(*item) for item in items] in the process pool; `func` and the items must be picklable."""
+    items = list(items)
+    if len(items) <= 1 or WORKERS <= 1:
+        return [func(*item) for item in items]
+    return list(_processes().map(func, *zip(*items)))
+
+
+def _run_inside(func, item):
+    _inside.active = True
+    try:
+        return func(item)
+    finally:
+        _inside.active = False
+
+
+def map_stations(func, items):
+    """[func(item) for item in items], fanned out over the thread pool.
+
+    Calls from inside a pool thread run sequentially, so nested fan-outs
+    cannot exhaust the pool and deadlock.
+    """
+    items = list(items)
+    if len(items) <= 1 or WORKERS <= 1 or getattr(_inside, "active", False):
+        return [func(item) for item in items]
+    return list(_thread_pool().map(lambda item: _run_inside(func, item), items))
+
+
+def _parse(name, path):
+    from pxs.store import Station
+
+    station = Station(name, path)
+    station.refresh()
+    return station
+
+
+def parse_stations(paths, processes=None, workers=None):
+    """Parses {name: path} into Station objects, in the order of `paths`.
+
+    `processes` overrides PXS_STATION_EXECUTOR (True: process pool), `workers`
+    the size of that process pool.
+    """
+    names = list(paths)
+    if processes is None:
+        processes = EXECUTOR == "process"
+    if processes and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers or WORKERS, len(names))) as pool:
+            return list(pool.map(_parse, names, [paths[name] for name in names]))
+    return map_stations(lambda name: _parse(name, paths[name]), names)
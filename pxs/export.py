@@ -0,0 +1,195 @@
+"""Export der Dashboard-Auswahl als CSV oder Parquet.
+
+    GET /export/selection.csv?stations=Arber,Straubing&columns=LUFTTEMPERATUR
+            &missing=1&common=1&window=0.5&yearly=0&quality=5&fill=linear&anomaly=1961-1990
+    GET /export/selection.parquet?...      (nur mit pyarrow)
+
+Die Parameter entsprechen den Einstellungen des Dashboards (`export_url` baut
+den Link aus ihnen), die Werte kommen aus `pxs.selection.column_xy` wie im Plot.
+Ausgegeben wird eine Zeile pro Station und Tag (bzw. Jahr bei ``yearly=1``):
+STATION, DATE und die gewählten Spalten. Die Antwort wird stationsweise in
+Blöcken von CHUNK_ROWS Zeilen erzeugt und gestreamt; im Speicher liegt also
+höchstens eine Station, egal wie viele exportiert werden.
+"""
+import math
+from urllib.parse import urlencode
+
+import numpy as np
+from flask import Blueprint, Response, request
+from werkzeug.exceptions import BadRequest, NotAcceptable
+
+from pxs import climatology, gapfill, qc
+from pxs.selection import column_xy, common_range, window_days
+from pxs.store import stations, DATE_COLUMN
+
+CHUNK_ROWS = 65536
+# Gleitendes Mittel höchstens über so viele Jahre (länger als jede Messreihe)
+MAX_WINDOW_YEARS = 200
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+export = Blueprint("export", __name__, url_prefix="/export")
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_url(fmt, selected_files, selected_columns, missing_data, window_years, common_timerange, yearly_mean,
+               min_quality=None, fill_method=None, anomaly_reference=None):
+    """Link to the streamed export of the current Dashboard settings"""
+    query = {
+        "stations": ",".join(selected_files or []),
+        "columns": ",".join(selected_columns or []),
+        "missing": int(bool(missing_data)),
+        "common": int(bool(common_timerange)),
+        "window": window_years or 0,
+        "yearly": int(bool(yearly_mean)),
+        "quality": int(min_quality or 0),
+        "fill": fill_method or "",
+        "anomaly": anomaly_reference or "",
+    }
+    return f"/export/selection.{fmt}?{urlencode(query)}"
+
+
+# == Zeilen ================================================================================
+
+def _names(text):
+    return [name for name in (text or "").split(",") if name]
+
+
+def station_blocks(args):
+    """Columns and a generator of (station, datetime64 dates, {column: values}) chunks, one station at a time.
+
+    Invalid parameters raise BadRequest here, before the response starts streaming.
+    """
+    selected = stations.load(_names(args.get("stations")))
+    columns = [name for name in _names(args.get("columns")) if name != DATE_COLUMN]
+    if not selected or not columns:
+        raise BadRequest("stations and columns are required")
+    try:
+        window_years = float(args.get("window", 0))
+        if not math.isfinite(window_years):
+            raise ValueError(window_years)
+        window = window_days(min(window_years, MAX_WINDOW_YEARS))
+    except (ValueError, OverflowError):
+        raise BadRequest("window must be a finite number of years")
+    try:
+        min_quality = qc.quality_level(args.get("quality"))
+    except ValueError as error:
+        raise BadRequest(str(error))
+    missing_data = args.get("missing") == "1"
+    yearly_mean = args.get("yearly") == "1"
+    fill_method = args.get("fill") or None
+    if fill_method is not None and fill_method not in gapfill.METHODS:
+        raise BadRequest(f"fill must be one of {', '.join(gapfill.METHODS)}")
+    anomaly_reference = args.get("anomaly") or None
+    if anomaly_reference is not None and anomaly_reference not in climatology.REFERENCE_PERIODS:
+        raise BadRequest(f"anomaly must be one of {', '.join(climatology.REFERENCE_PERIODS)}")
+    start, end = common_range(selected) if args.get("common") == "1" else (None, None)
+
+    def blocks():
+        for name, station in selected.items():
+            rows = station.rows(start, end)
+            dates, values = None, {}
+            for column in columns:
+                if column in station.masks:
+                    dates, values[column] = column_xy(station, column, rows, missing_data, window, yearly_mean,
+                                                               min_quality, fill_method, anomaly_reference)
+            if dates is None:
+                continue
+            for lo in range(0, len(dates), CHUNK_ROWS):
+                hi = lo + CHUNK_ROWS
+                yield name, dates[lo:hi], {column: values[column][lo:hi] if column in values else None
+                                           for column in columns}
+
+    return columns, blocks()
+
+
+# == Formate ===============================================================================
+
+def _text(values, size):
+    if values is None:
+        return np.full(size, "", dtype="U1")
+    values = np.asarray(values, dtype=np.float32)
+    text = values.astype(str)
+    text[np.isnan(values)] = ""
+    return text
+
+
+def iter_csv(columns, blocks):
+    yield ",".join(["STATION", DATE_COLUMN, *columns]) + "\n"
+    for name, dates, values in blocks:
+        fields = [np.datetime_as_string(dates, unit="D"), *(_text(values[column], len(dates)) for column in columns)]
+        yield "".join(f"{name},{','.join(row)}\n" for row in zip(*(field.tolist() for field in fields)))
+
+
+class _Sink:
+    """Write-only file for ParquetWriter that hands out the written bytes in between."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Parquet merkt sich absolute Offsets, also die Gesamtlänge statt der Pufferlänge
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_parquet(columns, blocks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("STATION", pa.string()), (DATE_COLUMN, pa.date32()),
+                        *((column, pa.float32()) for column in columns)])
+    sink = _Sink()
+    # Eine Row Group pro Block
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for name, dates, values in blocks:
+            arrays = [pa.array(np.full(len(dates), name)), pa.array(dates.astype("datetime64[D]")),
+                      *(pa.array(values[column], type=pa.float32(), from_pandas=True) if values[column] is not None
+                        else pa.nulls(len(dates), pa.float32()) for column in columns)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+ENCODERS = {"csv": iter_csv, "parquet": iter_parquet}
+
+
+@export.route("/selection.<fmt>")
+def selection(fmt):
+    if fmt not in FORMATS:
+        raise BadRequest(f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "parquet" and not parquet_available():
+        raise NotAcceptable("parquet export needs pyarrow on the server")
+    columns, blocks = station_blocks(request.args)
+    response = Response(ENCODERS[fmt](columns, blocks), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=selection.{fmt}"
+    return response
+
+
+def install(server):
+    """Registers the /export routes on the Flask server."""
+    server.register_blueprint(export)
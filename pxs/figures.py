@@ -0,0 +1,66 @@
+"""WebGL statt SVG für große Liniendiagramme.
+
+plotly.js zeichnet ``scatter``-Traces als SVG-Pfade; bei Tageswerten über
+Jahrzehnte und mehreren Stationen blockiert das den Browser bei jedem Zoom und
+Hover. `webgl_figure` wandelt alle Scatter-Traces einer Figur in ``scattergl``
+um, sobald die Figur zusammen mehr als PXS_WEBGL_THRESHOLD Punkte (Standard
+10000) hat. Name, Farbe, Linienart, Hovertemplate und Legende bleiben gleich;
+Eigenschaften, die es nur für SVG gibt (Stapeln, ``line.shape="spline"`` ...),
+fallen weg. PXS_WEBGL_THRESHOLD=0 schaltet die Umwandlung ab.
+
+Aufzurufen vor `pxs.serialize.compact_figure`, solange x noch ein Array ist.
+"""
+import os
+
+import plotly.graph_objects as go
+
+WEBGL_THRESHOLD = int(os.environ.get("PXS_WEBGL_THRESHOLD", "10000"))
+
+# Linienformen, die scattergl kann
+_GL_SHAPES = {"linear", "hv", "vh", "hvh", "vhv"}
+
+
+def _points(trace):
+    return max((len(values) for values in (trace.x, trace.y) if values is not None), default=0)
+
+
+def use_webgl(points, threshold=None):
+    """True if a figure with `points` points in total should be drawn with WebGL"""
+    threshold = WEBGL_THRESHOLD if threshold is None else threshold
+    return 0 < threshold < points
+
+
+def trace_type(points, threshold=None):
+    """'scattergl' or 'scatter' for `points` points (for patches of existing traces)"""
+    return "scattergl" if use_webgl(points, threshold) else "scatter"
+
+
+def to_scattergl(trace):
+    """go.Scatter -> go.Scattergl with the same data, names and styling"""
+    props = trace.to_plotly_json()
+    props.pop("type", None)
+    valid = go.Scattergl()._valid_props
+    props = {key: value for key, value in props.items() if key in valid}
+    line = props.get("line")
+    if line:
+        line = {key: value for key, value in line.items() if key not in ("simplify", "smoothing", "backoff")}
+        if line.get("shape") not in (None, *_GL_SHAPES):
+            line.pop("shape")
+        props["line"] = line
+    marker = props.get("marker")
+    if marker:
+        props["marker"] = {key: value for key, value in marker.items()
+                           if key not in ("angleref", "gradient", "maxdisplayed", "standoff")}
+    return go.Scattergl(props)
+
+
+def webgl_figure(fig, threshold=None):
+    """Converts all Scatter traces to Scattergl above the point threshold (in place, returns fig)"""
+    scatter = [trace for trace in fig.data if isinstance(trace, go.Scatter)]
+    if not use_webgl(sum(_points(trace) for trace in scatter), threshold):
+        return fig
+    traces = [to_scattergl(trace) if isinstance(trace, go.Scatter) else trace for trace in fig.data]
+    # fig.data lässt sich nur umsortieren, nicht ersetzen
+    fig.data = []
+    fig.add_traces(traces)
+    return fig
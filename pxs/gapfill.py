@@ -0,0 +1,116 @@
+"""Lückenfüllung für Messreihen der Stationen.
+
+    linear        lineare Interpolation zwischen den Nachbartagen, nur für Lücken
+                  bis PXS_GAPFILL_MAX_LINEAR Tage (Standard 10) innerhalb der Reihe
+    climatology   mittlerer Jahresgang: Mittel je Kalendertag über alle Jahre,
+                  mit einem zyklischen 15-Tage-Fenster geglättet
+    neighbour     lineare Regression auf die am stärksten korrelierte Nachbarstation
+                  (mindestens MIN_OVERLAP gemeinsame Tage), dann die nächstbeste
+
+`fill` liefert die gefüllte Reihe und eine Maske der gefüllten Werte; beides
+wird pro (Station, Spalte, Methode, Qualitätsfilter) bis zur nächsten
+Datenänderung gecacht. Werte, die keine Methode schätzen kann, bleiben NaN.
+"""
+import os
+
+import numpy as np
+
+from pxs.store import stations, to_datetime
+
+METHODS = {
+    "linear": "Linear",
+    "climatology": "Klimatologie (Jahresgang)",
+    "neighbour": "Nachbarstation (Regression)",
+}
+
+MAX_LINEAR_GAP = int(os.environ.get("PXS_GAPFILL_MAX_LINEAR", "10"))
+SMOOTHING_DAYS = 15
+MIN_OVERLAP = 365
+
+
+def _linear(days, values):
+    valid = ~np.isnan(values)
+    if valid.sum() < 2:
+        return values
+    index = np.flatnonzero(valid)
+    estimate = np.interp(days, days[index], values[index])
+    # Abstand zum vorigen und nächsten gültigen Wert in Tagen
+    position = np.searchsorted(index, np.arange(len(values)))
+    inside = (position > 0) & (position < len(index))
+    before = days[index[np.clip(position - 1, 0, len(index) - 1)]]
+    after = days[index[np.clip(position, 0, len(index) - 1)]]
+    fillable = ~valid & inside & (after - before - 1 <= MAX_LINEAR_GAP)
+    return np.where(fillable, estimate, values)
+
+
+def day_of_year(days):
+    """Calendar slot (0..365) of day numbers: month/day ordinal, 29 February is slot 59 in every year."""
+    dates = to_datetime(days)
+    years = dates.astype("datetime64[Y]")
+    doy = (dates - years).astype(np.int64)
+    year = years.astype(np.int64) + 1970
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    # In Gemeinjahren ab dem 1. März einen Platz weiter, damit gleiche Kalendertage zusammenfallen
+    return doy + ((doy >= 59) & ~leap)
+
+
+def climatology(days, values):
+    """Smoothed mean per day of the year (366 values, NaN where no data)."""
+    doy = day_of_year(days)
+    valid = ~np.isnan(values)
+    sums = np.bincount(doy[valid], weights=values[valid], minlength=366)
+    counts = np.bincount(doy[valid], minlength=366).astype(float)
+    # Zyklisch glätten: Summen und Anzahlen über das Fenster, dann teilen
+    kernel = np.ones(SMOOTHING_DAYS)
+    half = SMOOTHING_DAYS // 2
+    wrap = lambda a: np.convolve(np.r_[a[-half:], a, a[:half]], kernel, mode="valid")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return wrap(sums) / wrap(counts)
+
+
+def _climatology(days, values):
+    return np.where(np.isnan(values), climatology(days, values)[day_of_year(days)], values)
+
+
+def _neighbour(station, column, values, min_quality):
+    days = station.day
+    candidates = []
+    for other in stations.load(stations.names()).values():
+        if other.name == station.name or column not in other.masks:
+            continue
+        common, mine, theirs = np.intersect1d(days, other.day, assume_unique=True, return_indices=True)
+        x = other.series(column, min_quality=min_quality)[theirs].astype(np.float64)
+        y = values[mine].astype(np.float64)
+        both = ~np.isnan(x) & ~np.isnan(y)
+        if both.sum() < MIN_OVERLAP or np.std(x[both]) == 0 or np.std(y[both]) == 0:
+            continue
+        slope, intercept = np.polyfit(x[both], y[both], 1)
+        r = np.corrcoef(x[both], y[both])[0, 1]
+        candidates.append((r, mine, intercept + slope * x))
+
+    filled = values.astype(np.float64)
+    # Beste Nachbarstation zuerst, die weiteren nur für die übrigen Lücken
+    for _, mine, estimate in sorted(candidates, key=lambda candidate: -candidate[0]):
+        target = np.isnan(filled[mine])
+        filled[mine[target]] = estimate[target]
+    return filled
+
+
+def fill(station, column, method, min_quality=None):
+    """(float32 values with gaps filled by `method`, bool mask of the filled values)."""
+    if method not in METHODS:
+        raise ValueError(f"Unbekannte Methode {method}")
+
+    def build():
+        values = station.series(column, min_quality=min_quality)
+        if method == "linear":
+            filled = _linear(station.day, values)
+        elif method == "climatology":
+            filled = _climatology(station.day, values)
+        else:
+            filled = _neighbour(station, column, values, min_quality)
+        filled = np.asarray(filled, dtype=np.float32)
+        return filled, np.isnan(values) & ~np.isnan(filled)
+
+    # Global gecacht: die Nachbarmethode hängt auch von den anderen Stationen ab
+    return stations.cached(("gap-fill", station.name, column, method, int(min_quality or 0)), build)
@@ -0,0 +1,100 @@
+"""HTTP-Schicht von app.server: Kompression und bedingte Antworten.
+
+`install(server)` hängt einen after_request-Handler an Flask:
+
+* Antworten ab PXS_COMPRESS_MIN_SIZE Bytes (Standard 1024) mit komprimierbarem
+  Typ (JSON, HTML, JS, CSS) werden mit brotli (falls das Paket installiert ist)
+  oder gzip komprimiert, je nach Accept-Encoding des Browsers.
+* GET-Antworten bekommen ein ETag aus dem Inhalt; schickt der Browser es mit
+  If-None-Match zurück, antwortet der Server mit 304 ohne Inhalt. Routen, deren
+  Inhalt nur von der Datensatz-Version abhängt (z.B. /figures/<name>), setzen
+  dazu ``Cache-Control: no-cache``, damit der Browser immer nachfragt.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get("PXS_COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE = ("application/json", "text/html", "text/css", "text/plain",
+                "application/javascript", "text/javascript")
+
+# Komprimierte GET-Antworten (Layout, JS-Bundles, Figuren) nur einmal packen
+_CACHE_SIZE = 64
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+
+
+def _encoding(accept_encoding):
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0: gleicher Inhalt ergibt gleiche Bytes
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_cached(digest, data, encoding):
+    key = (digest, encoding)
+    with _compressed_lock:
+        if key in _compressed:
+            _compressed.move_to_end(key)
+            return _compressed[key]
+    body = _compress(data, encoding)
+    with _compressed_lock:
+        _compressed[key] = body
+        while len(_compressed) > _CACHE_SIZE:
+            _compressed.popitem(last=False)
+    return body
+
+
+def _after_request(response):
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    if "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE:
+        return response
+
+    data = response.get_data()
+    conditional = request.method in ("GET", "HEAD")
+    encoding = _encoding(request.headers.get("Accept-Encoding", "")) if len(data) >= COMPRESS_MIN_SIZE else None
+    response.vary.add("Accept-Encoding")
+
+    if conditional:
+        digest = hashlib.sha1(data).hexdigest()
+        etag = f"{digest[:20]}-{encoding}" if encoding else digest[:20]
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            response.set_data(b"")
+            response.set_etag(etag)
+            return response
+        response.set_etag(etag)
+        if encoding:
+            response.set_data(_compress_cached(digest, data, encoding))
+    elif encoding:
+        response.set_data(_compress(data, encoding))
+
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def install(server):
+    """Registers compression and ETag handling on the Flask server."""
+    server.after_request(_after_request)
@@ -0,0 +1,151 @@
+"""Klimaindizes (ETCCDI-Stil) je Station und Jahr bzw. Jahreszeit.
+
+    frost_days     Frosttage          Tagesminimum < 0 °C
+    ice_days       Eistage            Tagesmaximum < 0 °C
+    summer_days    Sommertage         Tagesmaximum > 25 °C
+    hot_days       Heiße Tage         Tagesmaximum ≥ 30 °C
+    heating_dd     Heizgradtage       Summe von 18 °C - Tagesmittel (nur positive Werte)
+    cooling_dd     Kühlgradtage       Summe von Tagesmittel - 18 °C (nur positive Werte)
+    dry_spell      längste Trockenperiode, Tage mit Niederschlag < 1 mm am Stück
+    wet_spell      längste Nassperiode, Tage mit Niederschlag ≥ 1 mm am Stück
+    sunshine       Sonnenscheindauer (Stunden)
+
+Alle Indizes einer Station entstehen in einem Durchlauf über die Spalten:
+Tage werden per `np.bincount` ihrem Zeitraum zugeordnet, Perioden am Stück
+über Lauflängen (Beginn/Ende der Läufe) bestimmt. Fehlende Werte zählen
+weder als Treffer noch setzen sie eine Periode fort; Zeiträume mit weniger als
+MIN_COVERAGE gültigen Tagen bleiben NaN. Der Winter (DJF) zählt zum Jahr
+seines Januars. Ergebnisse werden pro Station, Zeitraum und Qualitätsfilter
+bis zur nächsten Datenänderung gecacht.
+"""
+import numpy as np
+import pandas as pd
+
+from pxs.store import day_years, to_datetime, to_day
+
+TMIN_COLUMN = "LUFTTEMPERATUR_MINIMUM"
+TMAX_COLUMN = "LUFTTEMPERATUR_MAXIMUM"
+TMEAN_COLUMN = "LUFTTEMPERATUR"
+RAIN_COLUMN = "NIEDERSCHLAGSHOEHE"
+SUN_COLUMN = "SONNENSCHEINDAUER"
+
+DEGREE_DAY_BASE = 18.0
+WET_DAY = 1.0
+MIN_COVERAGE = 0.8
+
+# Zeitraum -> Monate (1-12)
+SEASONS = {
+    "year": ("Jahr", tuple(range(1, 13))),
+    "DJF": ("Winter (DJF)", (12, 1, 2)),
+    "MAM": ("Frühling (MAM)", (3, 4, 5)),
+    "JJA": ("Sommer (JJA)", (6, 7, 8)),
+    "SON": ("Herbst (SON)", (9, 10, 11)),
+}
+
+# Index -> (Beschriftung, Einheit, Spalte)
+INDICES = {
+    "frost_days": ("Frosttage", "Tage", TMIN_COLUMN),
+    "ice_days": ("Eistage", "Tage", TMAX_COLUMN),
+    "summer_days": ("Sommertage", "Tage", TMAX_COLUMN),
+    "hot_days": ("Heiße Tage", "Tage", TMAX_COLUMN),
+    "heating_dd": ("Heizgradtage", "K·Tage", TMEAN_COLUMN),
+    "cooling_dd": ("Kühlgradtage", "K·Tage", TMEAN_COLUMN),
+    "dry_spell": ("Längste Trockenperiode", "Tage", RAIN_COLUMN),
+    "wet_spell": ("Längste Nassperiode", "Tage", RAIN_COLUMN),
+    "sunshine": ("Sonnenscheindauer", "Stunden", SUN_COLUMN),
+}
+
+
+def season_years(days, season="year"):
+    """Year of the season each day belongs to, -1 outside of `season` (December counts to the next winter)."""
+    months = to_datetime(days).astype("datetime64[M]").astype(np.int64) % 12 + 1
+    years = day_years(days)
+    if season == "DJF":
+        years = years + (months == 12)
+    return np.where(np.isin(months, SEASONS[season][1]), years, -1)
+
+
+def calendar_days(first_year, last_year, season="year"):
+    """Number of calendar days of `season` in each year from first_year to last_year."""
+    days = np.arange(to_day(np.datetime64(f"{first_year - 1}-12-01")),
+                     to_day(np.datetime64(f"{last_year + 1}-01-01")))
+    years = season_years(days, season)
+    inside = (years >= first_year) & (years <= last_year)
+    return np.bincount(years[inside] - first_year, minlength=last_year - first_year + 1)
+
+
+def _count(index, condition, size):
+    return np.bincount(index[condition], minlength=size).astype(np.float64)
+
+
+def _sum(index, values, size):
+    return np.bincount(index, weights=values, minlength=size)
+
+
+def longest_runs(days, index, condition, size):
+    """Longest run of consecutive days with `condition` per period index (runs end at period boundaries)."""
+    if not condition.any():
+        return np.zeros(size)
+    # Ein Lauf beginnt, wo die Bedingung einsetzt, der Zeitraum wechselt oder ein Tag fehlt
+    previous = np.r_[False, condition[:-1]]
+    breaks = np.r_[True, (index[1:] != index[:-1]) | (np.diff(days) != 1)]
+    starts = condition & (~previous | breaks)
+    run = np.cumsum(starts) - 1
+    lengths = np.bincount(run[condition])
+    longest = np.zeros(size)
+    np.maximum.at(longest, index[starts], lengths)
+    return longest
+
+
+def compute(station, season="year", min_quality=None):
+    """Years x INDICES of one station (NaN where a column is missing or coverage is too low)."""
+    days = station.day
+    years = season_years(days, season)
+    inside = years >= 0
+    if not inside.any():
+        return pd.DataFrame(columns=list(INDICES), dtype=float)
+    first_year, last_year = years[inside].min(), years[inside].max()
+    size = last_year - first_year + 1
+    index = years[inside] - first_year
+    days = days[inside]
+    calendar = calendar_days(first_year, last_year, season)
+
+    def column(name):
+        if name not in station.masks:
+            return None
+        values = station.series(name, min_quality=min_quality)[inside].astype(np.float64)
+        return values, ~np.isnan(values)
+
+    result = {}
+    with np.errstate(invalid="ignore"):
+        for name in {spec[2] for spec in INDICES.values()}:
+            loaded = column(name)
+            if loaded is None:
+                continue
+            values, valid = loaded
+            enough = _count(index, valid, size) >= MIN_COVERAGE * calendar
+            if name == TMIN_COLUMN:
+                found = {"frost_days": _count(index, values < 0, size)}
+            elif name == TMAX_COLUMN:
+                found = {"ice_days": _count(index, values < 0, size),
+                         "summer_days": _count(index, values > 25, size),
+                         "hot_days": _count(index, values >= 30, size)}
+            elif name == TMEAN_COLUMN:
+                found = {"heating_dd": _sum(index, np.where(valid, np.maximum(DEGREE_DAY_BASE - values, 0), 0), size),
+                         "cooling_dd": _sum(index, np.where(valid, np.maximum(values - DEGREE_DAY_BASE, 0), 0), size)}
+            elif name == RAIN_COLUMN:
+                found = {"dry_spell": longest_runs(days, index, valid & (values < WET_DAY), size),
+                         "wet_spell": longest_runs(days, index, values >= WET_DAY, size)}
+            else:
+                found = {"sunshine": _sum(index, np.where(valid, values, 0), size)}
+            for key, counts in found.items():
+                result[key] = np.where(enough, counts, np.nan)
+
+    table = pd.DataFrame(result, index=pd.RangeIndex(first_year, last_year + 1, name="year"))
+    return table.reindex(columns=list(INDICES))
+
+
+def indices(station, season="year", min_quality=None):
+    """Cached `compute` per station, season and quality filter."""
+    return station.cached(("climate-indices", season, int(min_quality or 0)),
+                          lambda: compute(station, season, min_quality))
@@ -0,0 +1,175 @@
+"""Gemeinsamer Cache für Callback-Ergebnisse (ähnlich flask-caching ``memoize``).
+
+Der Schlüssel besteht aus Callback-ID, normalisierten Eingaben und der
+Datensatz-Version; neue Daten machen alte Einträge damit automatisch unbrauchbar.
+
+    PXS_MEMO=memory       pro Prozess (Standard)
+    PXS_MEMO=filesystem   Pickle-Dateien in PXS_MEMO_DIR, von allen Workern geteilt
+    PXS_MEMO=off          nichts zwischenspeichern
+    PXS_MEMO_DIR          Standard: <SHARED_DIR>/memo
+    PXS_MEMO_TIMEOUT      Lebensdauer in Sekunden (Standard 3600, 0 = unbegrenzt)
+    PXS_MEMO_THRESHOLD    höchstens so viele Einträge, älteste fliegen zuerst
+"""
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from pxs.store import stations, SHARED_DIR
+
+BACKEND = os.environ.get("PXS_MEMO", "memory")
+MEMO_DIR = os.environ.get("PXS_MEMO_DIR", os.path.join(SHARED_DIR, "memo"))
+TIMEOUT = float(os.environ.get("PXS_MEMO_TIMEOUT", "3600"))
+THRESHOLD = int(os.environ.get("PXS_MEMO_THRESHOLD", "500"))
+
+
+class MemoryCache:
+    """LRU dict of (expires, value) for one process."""
+
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] and entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.time() + timeout if timeout else 0, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.threshold:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache:
+    """One pickle per key in `directory`, shared by all processes on the host."""
+
+    def __init__(self, directory=MEMO_DIR, threshold=THRESHOLD):
+        self.directory = Path(directory)
+        self.threshold = threshold
+
+    def get(self, key):
+        path = self.directory / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if entry[0] and entry[0] < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def set(self, key, value, timeout):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Erst vollständig schreiben, dann umbenennen: andere Worker lesen nie halbe Dateien
+        tmp = self.directory / f"{key}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((time.time() + timeout if timeout else 0, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.directory / f"{key}.pkl")
+        self._evict()
+
+    def _evict(self):
+        entries = list(self.directory.glob("*.pkl"))
+        if len(entries) <= self.threshold:
+            return
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[:len(entries) - self.threshold]:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+def _make_cache():
+    if BACKEND == "off":
+        return None
+    if BACKEND == "filesystem":
+        return FileSystemCache()
+    return MemoryCache()
+
+
+cache = _make_cache()
+
+# Pro Schlüssel ein Lock mit Nutzerzähler: gleichzeitige Anfragen warten auf die eine Berechnung
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+
+def normalize(value):
+    """JSON-compatible, order-stable form of callback inputs."""
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def make_key(callback_id, args, kwargs):
+    payload = json.dumps([callback_id, normalize(args), normalize(kwargs), stations.version],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def memoize(timeout=None, unordered=()):
+    """Caches the return value of a callback across sessions.
+
+    `unordered` names argument positions whose list order does not matter
+    (e.g. checklist values); they are sorted before building the key.
+    """
+    def decorator(func):
+        callback_id = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if cache is None:
+                return func(*args, **kwargs)
+            key_args = [sorted(arg) if i in unordered and isinstance(arg, list) else arg
+                        for i, arg in enumerate(args)]
+            key = make_key(callback_id, key_args, kwargs)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[1]
+            with _key_locks_lock:
+                slot = _key_locks.setdefault(key, {"lock": threading.Lock(), "users": 0})
+                slot["users"] += 1
+            try:
+                with slot["lock"]:
+                    # Wartende bekommen den Wert vom Slot, auch wenn der Cache ihn nicht behalten hat
+                    if "value" in slot:
+                        return slot["value"]
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return entry[1]
+                    value = slot["value"] = func(*args, **kwargs)
+                    cache.set(key, value, TIMEOUT if timeout is None else timeout)
+                    return value
+            finally:
+                # Erst entfernen, wenn niemand mehr auf den Schlüssel wartet
+                with _key_locks_lock:
+                    slot["users"] -= 1
+                    if not slot["users"]:
+                        del _key_locks[key]
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+"""Speicherbedarf der geladenen Stationsdaten, um die Anzahl der Worker zu planen.
+
+    python -m pxs.memory            # so wie ein frisch gestarteter Worker
+    python -m pxs.memory --touch    # alle Spalten einmal gelesen (Worst Case)
+
+Für jede Station und Spalte werden Datentyp, Nenngröße (Werte + Maske) und der
+tatsächlich residente Anteil ausgegeben. Bei Memory-Maps zählt nur, was schon
+in den Speicher geladen wurde; dieser Anteil wird von allen Workern geteilt.
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from pxs.store import stations, SHARED_DIR, DATE_COLUMN
+
+_MIB = 1024 * 1024
+
+
+def mapped_resident_bytes():
+    """Resident bytes per memory-mapped file of this process (from /proc/self/smaps)."""
+    resident = {}
+    try:
+        with open("/proc/self/smaps") as f:
+            path = None
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                if "-" in parts[0] and not parts[0].endswith(":"):
+                    path = parts[5] if len(parts) > 5 else None
+                elif parts[0] == "Rss:" and path:
+                    resident[path] = resident.get(path, 0) + int(parts[1]) * 1024
+    except OSError:
+        pass
+    return resident
+
+
+def process_resident_bytes():
+    """VmRSS of this process or None (non-Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _array_bytes(array, resident):
+    filename = getattr(array, "filename", None)
+    if filename:
+        return array.nbytes, resident.get(os.path.realpath(filename), 0), True
+    return array.nbytes, array.nbytes, False
+
+
+def memory_report(store=stations):
+    """One row per station and column: dtype, rows, bytes, resident bytes, mapped."""
+    resident = mapped_resident_bytes()
+    rows = []
+    for name in store.names():
+        station = store.get(name)
+        for column in station.names:
+            nbytes, rss, mapped = _array_bytes(station.columns[column], resident)
+            if column != DATE_COLUMN:
+                mask_bytes, mask_rss, _ = _array_bytes(station.masks[column], resident)
+                nbytes, rss = nbytes + mask_bytes, rss + mask_rss
+            rows.append({
+                "station": name,
+                "column": column,
+                "dtype": str(station.columns[column].dtype),
+                "rows": len(station),
+                "bytes": nbytes,
+                "resident": rss,
+                "mapped": mapped,
+            })
+        yearly = int(station.yearly.table.memory_usage(deep=True).sum())
+        rows.append({"station": name, "column": "(Jahreswerte)", "dtype": "float64", "rows": len(station.yearly.table),
+                     "bytes": yearly, "resident": yearly, "mapped": False})
+    return pd.DataFrame(rows, columns=["station", "column", "dtype", "rows", "bytes", "resident", "mapped"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speicherbedarf der Stationsdaten")
+    parser.add_argument("--touch", action="store_true", help="alle Spalten einmal lesen (Worst Case)")
+    args = parser.parse_args(argv)
+
+    stations.open(SHARED_DIR)
+    if args.touch:
+        for name in stations.names():
+            station = stations.get(name)
+            for array in [*station.columns.values(), *station.masks.values()]:
+                array.sum()
+
+    report = memory_report()
+    per_station = report.groupby("station")[["bytes", "resident"]].sum()
+
+    pd.set_option("display.width", 160)
+    print(report.to_string(index=False))
+    print()
+    print((per_station / _MIB).round(2).rename(columns=lambda c: f"{c} (MiB)").to_string())
+    print()
+    print(f"Stationsdaten gesamt: {report['bytes'].sum() / _MIB:.2f} MiB, "
+          f"davon resident: {report['resident'].sum() / _MIB:.2f} MiB "
+          f"(gemappt und zwischen Workern geteilt: {report.loc[report['mapped'], 'resident'].sum() / _MIB:.2f} MiB)")
+    rss = process_resident_bytes()
+    if rss is not None:
+        print(f"Prozess gesamt (VmRSS): {rss / _MIB:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Qualitätskennzeichen der Messwerte, beim Einlesen berechnet.
+
+Zu jeder Messspalte speichert der Stationsspeicher eine uint8-Bitmaske
+(`Station.masks[name]`, veröffentlicht als ``<name>.qc.npy``); 0 heißt
+"vorhanden und plausibel":
+
+    QC_MISSING        Wert fehlt (leer oder -999)
+    QC_IMPLAUSIBLE    außerhalb der physikalischen Grenzen (LIMITS) oder
+                      Tagesmaximum unter Tagesminimum
+    QC_SNOW           Niederschlag fiel als Schnee (NIEDERSCHLAGSHOEHE_IND 7)
+    QC_MIXED          Regen und Schnee (8)
+    QC_FORM_UNKNOWN   Form unbekannt oder Fehlkennung (4, 9)
+
+Die Niederschlagsform steht nur an NIEDERSCHLAGSHOEHE und dient zur Auswahl,
+nicht als Fehler. Das Qualitätsniveau des DWD (QUALITAETS_NIVEAU: 1 nur
+formal geprüft ... 10 vollständig geprüft und korrigiert) bleibt eine eigene
+int8-Spalte pro Zeile; `Station.quality_rows` macht daraus die Zeilenmaske für
+den globalen Filter "Mindest-Qualitätsniveau" (QUALITY_LEVELS).
+"""
+import numpy as np
+
+QC_MISSING = 1
+QC_IMPLAUSIBLE = 2
+QC_SNOW = 4
+QC_MIXED = 8
+QC_FORM_UNKNOWN = 16
+
+# Werte mit diesen Bits gelten als fehlend (NaN in Station.series)
+QC_BAD = QC_MISSING | QC_IMPLAUSIBLE
+
+QUALITY_COLUMN = "QUALITAETS_NIVEAU"
+FORM_COLUMN = "NIEDERSCHLAGSHOEHE_IND"
+PRECIPITATION_COLUMN = "NIEDERSCHLAGSHOEHE"
+
+# Auswahl im Filter der Navigationsleiste: Mindestniveau -> Beschriftung
+QUALITY_LEVELS = {
+    0: "Alle Qualitätsniveaus",
+    3: "QN ≥ 3 (ROUTINE geprüft)",
+    5: "QN ≥ 5 (historisch geprüft)",
+    7: "QN ≥ 7 (zweite Prüfung)",
+    10: "QN 10 (geprüft und korrigiert)",
+}
+
+# Physikalisch mögliche Tageswerte (inklusive) in Mitteleuropa
+LIMITS = {
+    "LUFTTEMPERATUR": (-50, 50),
+    "LUFTTEMPERATUR_MAXIMUM": (-50, 50),
+    "LUFTTEMPERATUR_MINIMUM": (-60, 45),
+    "LUFTTEMP_AM_ERDB_MINIMUM": (-60, 45),
+    "DAMPFDRUCK": (0, 60),
+    "BEDECKUNGSGRAD": (0, 8),
+    "LUFTDRUCK_STATIONSHOEHE": (500, 1100),
+    "REL_FEUCHTE": (0, 100),
+    "WINDGESCHWINDIGKEIT": (0, 75),
+    "WINDSPITZE_MAXIMUM": (0, 100),
+    "NIEDERSCHLAGSHOEHE": (0, 500),
+    "SONNENSCHEINDAUER": (0, 17),
+    "SCHNEEHOEHE": (0, 1500),
+}
+
+# Spaltenpaare (Maximum, Minimum) desselben Tages
+ORDERED = [("LUFTTEMPERATUR_MAXIMUM", "LUFTTEMPERATUR_MINIMUM")]
+
+# Niederschlagsform -> Bit an NIEDERSCHLAGSHOEHE
+FORMS = {7: QC_SNOW, 8: QC_MIXED, 4: QC_FORM_UNKNOWN, 9: QC_FORM_UNKNOWN}
+
+
+def flags(values, valid):
+    """Parses (float values, bool valid) of all columns into {name: uint8 QC mask}."""
+    masks = {}
+    for name, column in values.items():
+        mask = np.where(valid[name], 0, QC_MISSING).astype(np.uint8)
+        if name in LIMITS:
+            low, high = LIMITS[name]
+            mask[valid[name] & ((column < low) | (column > high))] |= QC_IMPLAUSIBLE
+        masks[name] = mask
+
+    for high, low in ORDERED:
+        if high in values and low in values:
+            swapped = valid[high] & valid[low] & (values[high] < values[low])
+            masks[high][swapped] |= QC_IMPLAUSIBLE
+            masks[low][swapped] |= QC_IMPLAUSIBLE
+
+    if PRECIPITATION_COLUMN in masks and FORM_COLUMN in values:
+        form = np.where(valid[FORM_COLUMN], values[FORM_COLUMN], -1)
+        for code, bit in FORMS.items():
+            masks[PRECIPITATION_COLUMN][form == code] |= bit
+    return masks
+
+
+def quality_level(value):
+    """`value` (int, numeric string or None) as a key of QUALITY_LEVELS; ValueError for anything else.
+
+    Nur diese Stufen werden gefiltert und gecacht, damit beliebige Werte aus
+    Anfragen die Caches pro Station nicht unbegrenzt wachsen lassen.
+    """
+    if value is None or value == "":
+        return 0
+    try:
+        level = value if isinstance(value, (int, np.integer)) else int(str(value).strip())
+    except ValueError:
+        level = None
+    if isinstance(value, bool) or level not in QUALITY_LEVELS:
+        raise ValueError(f"quality must be one of {', '.join(map(str, QUALITY_LEVELS))}")
+    return int(level)
+
+
+def quality_rows(quality, min_quality):
+    """Bool mask of the rows with a quality level of at least `min_quality` (None = all rows)."""
+    if not min_quality:
+        return None
+    return np.asarray(quality) >= int(min_quality)
@@ -0,0 +1,56 @@
+"""Die Auswahl des Dashboards (Stationen, Spalten, Einstellungen) als Zahlenreihen.
+
+Gemeinsam genutzt vom Plot (pages/Dashboard.py) und vom Export (pxs/export.py),
+damit die exportierten Werte genau denen im Plot entsprechen.
+"""
+import pandas as pd
+
+from pxs import climatology, gapfill
+from pxs.store import day_years, to_datetime, year_start
+
+
+def common_range(selected):
+    """Common time range of the stations as day numbers: latest start to earliest end"""
+    if not selected:
+        return None, None
+    return (max(station.day[0] for station in selected.values()),
+            min(station.day[-1] for station in selected.values()))
+
+
+def window_days(window_years):
+    """Moving average window of the slider (years) in days, 0 = off"""
+    return int(window_years * 365) if window_years and window_years > 0 else 0
+
+
+def column_xy(station, col, rows, missing_data, window_days, yearly_mean, min_quality=None, fill_method=None,
+              anomaly_reference=None):
+    """x und y eines Traces: Tageswerte (optional gleitendes Mittel) oder Jahresmittel
+
+    Zeilen unter dem Mindest-Qualitätsniveau zählen als fehlende Werte; mit
+    `fill_method` werden Lücken vorher gefüllt (pxs/gapfill.py), mit
+    `anomaly_reference` die Abweichungen vom Normalwert dieser Referenzperiode
+    geliefert (pxs/climatology.py).
+    """
+    days = station.day[rows]
+    if fill_method:
+        values = gapfill.fill(station, col, fill_method, min_quality)[0][rows]
+        if anomaly_reference:
+            normal = climatology.baseline(station, col, anomaly_reference, min_quality)["mean"]
+            values = (values - normal[gapfill.day_of_year(days)]).astype("float32")
+    elif anomaly_reference:
+        values = climatology.anomalies(station, col, anomaly_reference, min_quality)[rows]
+    else:
+        values = station.series(col, clean=bool(missing_data), min_quality=min_quality)[rows]
+    if yearly_mean:
+        # x = Jahre, y = Mittelwerte
+        annual_mean = pd.Series(values).groupby(day_years(days)).mean()
+        return year_start(annual_mean.index), annual_mean.to_numpy()
+    # Gleitendes Mittel wie die Messwerte als float32 (halbiert Figur und Patch)
+    y = pd.Series(values).rolling(window=window_days, center=True, min_periods=1).mean().to_numpy(dtype="float32") \
+        if window_days > 0 else values
+    return to_datetime(days), y
+
+
+def filled_rows(station, col, rows, fill_method, min_quality=None):
+    """Bool mask of the values in `rows` that were filled by `fill_method`"""
+    return gapfill.fill(station, col, fill_method, min_quality)[1][rows]
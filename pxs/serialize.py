@@ -0,0 +1,74 @@
+"""Kompakte Kodierung von Figurdaten für den Browser.
+
+plotly.js versteht neben JSON-Listen auch typisierte Arrays
+``{"dtype": "f4", "bdata": "<base64>"}``; go.Figure nutzt das beim
+Serialisieren für numerische numpy-Arrays. Datumsachsen landen dagegen als
+ISO-Strings im JSON (``"2015-01-01T00:00:00"`` pro Punkt). `compact_figure`
+ersetzt gleichabständige Daten (Tageswerte ohne Lücken) durch Start und
+Schrittweite (``x0``/``dx``), alle anderen durch Millisekunden seit 1970 als
+typisiertes Array; die Achse bleibt über ``type="date"`` eine Datumsachse.
+
+Den JSON-Encoder wählt plotly selbst (`plotly.io.json.config.default_engine`,
+Standard "auto"): ist orjson installiert, wird es für alle Dash-Antworten
+verwendet, sonst das json-Modul.
+"""
+import base64
+
+import numpy as np
+
+# numpy-Typ -> Kurzname in plotly.js
+_DTYPES = {
+    "int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+    "int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8",
+}
+
+
+def epoch_ms(values):
+    """datetime64 array -> float64 milliseconds since 1970-01-01 (NaT -> NaN)."""
+    values = np.asarray(values)
+    ms = values.astype("datetime64[ms]").astype(np.int64).astype(np.float64)
+    ms[np.isnat(values)] = np.nan
+    return ms
+
+
+def typed_array(values):
+    """numpy array -> plotly.js typed array spec; dates as epoch milliseconds, other types a list."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = epoch_ms(values)
+    dtype = _DTYPES.get(str(values.dtype))
+    if dtype is None:
+        return values.tolist()
+    return {"dtype": dtype, "bdata": base64.b64encode(np.ascontiguousarray(values)).decode("ascii")}
+
+
+def date_attributes(values, letter="x"):
+    """Trace attributes for a datetime64 coordinate array.
+
+    Evenly spaced dates become {x: None, x0: first date, dx: step in ms}, the
+    rest an epoch-millisecond typed array. `None` clears an existing array, so
+    the result can also be applied with a dash.Patch.
+    """
+    ms = epoch_ms(values)
+    if len(ms) > 1 and not np.isnan(ms).any():
+        step = ms[1] - ms[0]
+        if step > 0 and (np.diff(ms) == step).all():
+            return {letter: None, f"{letter}0": str(np.asarray(values)[0].astype("datetime64[ms]")), f"d{letter}": step}
+    return {letter: typed_array(ms)}
+
+
+def _axis_name(trace, letter):
+    # 'x' -> 'xaxis', 'x2' -> 'xaxis2'
+    anchor = getattr(trace, f"{letter}axis", None) or letter
+    return f"{letter}axis{anchor[1:]}"
+
+
+def compact_figure(fig):
+    """Encodes the datetime64 x/y arrays of all traces compactly (in place, returns fig)."""
+    for trace in fig.data:
+        for letter in ("x", "y"):
+            values = getattr(trace, letter, None)
+            if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+                trace.update(date_attributes(values, letter))
+                fig.layout[_axis_name(trace, letter)].type = "date"
+    return fig
@@ -0,0 +1,209 @@
+"""Gemeinsamer Spaltenspeicher für mehrere Worker-Prozesse (z.B. gunicorn).
+
+Ein Prozess schreibt die geparsten Stationsspalten als .npy-Dateien in ein
+Verzeichnis (am besten unter /dev/shm), alle Worker mappen sie nur lesend mit
+`np.load(..., mmap_mode="r")`. Damit liegen die Daten nur einmal im RAM, egal
+wie viele Worker laufen.
+
+Aufbau des Verzeichnisses::
+
+    current                Name der aktuellen Generation
+    g000001/index.json     Version, Spaltennamen und Lesezustand je Station
+    g000001/manifest.json  SHA-256 der Quell-CSVs und aller Dateien der Generation
+    g000001/<Station>/<Spalte>.npy   unveränderte Stationen als Hardlinks der vorigen Generation
+    g000001/views/*.json   vorberechnete Ansichten (nur von `python -m pxs build-cache`)
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Wird erhöht, wenn sich Spalten oder Datentypen ändern; ältere Generationen werden neu geschrieben
+FORMAT = 3
+
+# So viele Generationen bleiben liegen, damit Worker mit alten Mappings weiterlesen können
+KEEP_GENERATIONS = 2
+
+
+def current(directory):
+    """Returns the name of the current generation or None."""
+    try:
+        return (Path(directory) / "current").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def usable(directory):
+    """True if there is a current generation written in this FORMAT."""
+    try:
+        return read_generation(directory)[2].get("format") == FORMAT
+    except FileNotFoundError:
+        return False
+
+
+@contextlib.contextmanager
+def locked(directory):
+    """Exclusive lock so that only one process publishes at a time."""
+    import fcntl
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_table(path, table):
+    """Stores a DataFrame with (stat, column) columns as .npy plus index metadata."""
+    np.save(path, table.to_numpy(dtype=float))
+    return {"index": table.index.tolist(), "columns": [list(c) for c in table.columns]}
+
+
+def read_table(path, meta):
+    if not meta["columns"]:
+        return pd.DataFrame()
+    return pd.DataFrame(np.load(path), index=meta["index"],
+                        columns=pd.MultiIndex.from_tuples([tuple(c) for c in meta["columns"]]))
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(path, sources):
+    """Checksums of the source CSVs ({name: path}) and of every file in the generation."""
+    path = Path(path)
+    manifest = {
+        "sources": {name: {"file": str(source), "sha256": sha256(source)} for name, source in sources.items()},
+        "artifacts": {str(f.relative_to(path)): sha256(f) for f in sorted(path.rglob("*")) if f.is_file()},
+    }
+    (path / "manifest.json").write_text(json.dumps(manifest, indent=1))
+
+
+def changed_sources(directory, folder, manifest=None):
+    """Names of the stations whose CSV no longer matches the checksum of the current generation."""
+    if manifest is None:
+        try:
+            manifest = json.loads((read_generation(directory)[1] / "manifest.json").read_text())
+        except FileNotFoundError:
+            return []
+    changed = []
+    for name, source in manifest["sources"].items():
+        csv = Path(folder) / f"{name}.csv"
+        if csv.exists() and sha256(csv) != source["sha256"]:
+            changed.append(name)
+    return changed
+
+
+def verify(directory, folder):
+    """Compares the current generation with its manifest and the CSVs in `folder`.
+
+    Returns a list of problems; an empty list means the artifacts are up to date.
+    """
+    try:
+        generation, path, index = read_generation(directory)
+        manifest = json.loads((path / "manifest.json").read_text())
+    except FileNotFoundError as e:
+        return [str(e)]
+    problems = []
+    if index.get("format") != FORMAT:
+        problems.append(f"{generation}: Format {index.get('format')} statt {FORMAT}")
+    names = {f.stem for f in Path(folder).glob("*.csv")}
+    for name in sorted(names ^ set(manifest["sources"])):
+        problems.append(f"{name}: Station nur in {'data' if name in names else generation} vorhanden")
+    for name in changed_sources(directory, folder, manifest):
+        problems.append(f"{name}: {Path(folder) / f'{name}.csv'} hat sich seit {generation} geändert")
+    for relative, checksum in manifest["artifacts"].items():
+        artifact = path / relative
+        if not artifact.exists() or sha256(artifact) != checksum:
+            problems.append(f"{generation}/{relative}: fehlt oder wurde verändert")
+    return problems
+
+
+def write_generation(directory, version, stations, sources, extra=None):
+    """Writes a new generation ({name: (columns, yearly, state)}) and makes it current.
+
+    `extra(path)` may add further artifacts before the manifest is written and
+    the generation becomes current.
+    """
+    directory = Path(directory)
+    previous = current(directory)
+    number = int(previous[1:]) + 1 if previous else 1
+    generation = f"g{number:06d}"
+    path = directory / generation
+    shutil.rmtree(path, ignore_errors=True)
+
+    index = {"format": FORMAT, "version": version, "stations": {}}
+    unchanged = _previous_states(directory, previous)
+    for name, (columns, yearly, state) in stations.items():
+        (path / name).mkdir(parents=True)
+        if _link_station(directory / previous / name if previous else None, path / name, unchanged.get(name), state):
+            index["stations"][name] = unchanged[name]
+            continue
+        for column, values in columns.items():
+            np.save(path / name / f"{column}.npy", np.ascontiguousarray(values))
+        state["yearly"] = write_table(path / name / "yearly.npy", yearly)
+        index["stations"][name] = state
+    (path / "index.json").write_text(json.dumps(index))
+    if extra is not None:
+        extra(path)
+    write_manifest(path, sources)
+
+    # Erst umschalten, wenn die Generation vollständig geschrieben ist
+    tmp = directory / "current.tmp"
+    tmp.write_text(generation)
+    os.replace(tmp, directory / "current")
+
+    for old in sorted(directory.glob("g[0-9]*"))[:-KEEP_GENERATIONS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return generation
+
+
+def _previous_states(directory, previous):
+    # Lesezustände der vorigen Generation, wenn sie dasselbe Format hat
+    try:
+        index = json.loads((Path(directory) / previous / "index.json").read_text())
+    except (TypeError, OSError, ValueError):
+        return {}
+    return index["stations"] if index.get("format") == FORMAT else {}
+
+
+def _link_station(source, target, previous, state):
+    """Hard-links the files of an unchanged station from the previous generation; False if it changed."""
+    if source is None or previous is None or {k: v for k, v in previous.items() if k != "yearly"} != state:
+        return False
+    try:
+        for file in source.iterdir():
+            os.link(file, target / file.name)
+    except OSError:
+        # z.B. anderes Dateisystem: neu schreiben
+        for file in target.iterdir():
+            file.unlink()
+        return False
+    return True
+
+
+def read_generation(directory):
+    """Returns (generation, path, index) of the current generation."""
+    generation = current(directory)
+    if generation is None:
+        raise FileNotFoundError(f"Keine veröffentlichten Stationsdaten in {directory}")
+    path = Path(directory) / generation
+    return generation, path, json.loads((path / "index.json").read_text())
+
+
+def map_columns(path, names):
+    """Maps the column files of one station read-only."""
+    return {name: np.load(Path(path) / f"{name}.npy", mmap_mode="r") for name in names}
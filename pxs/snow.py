@@ -0,0 +1,135 @@
+"""Schneewasseräquivalent (SWE, Schneemasse in mm = kg/m²) aus Schneehöhe, Temperatur und Niederschlag.
+
+Dichtemodell (Tage mit gemessener Schneehöhe):
+
+    Dichte = RHO_MAX - (RHO_MAX - RHO_NEW) * exp(-(K_AGE * Alter + K_DEGREE * Gradtage))
+    SWE    = Schneehöhe (cm) * Dichte / 100
+
+Alter sind die Tage seit Beginn der geschlossenen Schneedecke, Gradtage die
+Summe der positiven Tagesmitteltemperaturen seit diesem Tag (Setzung durch
+Zeit und Schmelze). Die Läufe der Schneedecke werden wie die Trockenperioden
+in pxs.indices über Lauflängen bestimmt.
+
+Gradtagmodell (Saisons ganz ohne Schneehöhe): Niederschlag an Tagen unter
+SNOW_TEMP (oder mit Niederschlagsform Schnee, qc.QC_SNOW) ist Schneefall und
+baut auf, Schmelze ist DEGREE_DAY_FACTOR * max(T - MELT_TEMP, 0). Die
+Rekursion SWE_t = max(0, SWE_t-1 + Zuwachs_t) ist eine Lindley-Rekursion und
+damit vektorisiert: kumulierte Summe minus ihr laufendes Minimum, neu
+gestartet zu Beginn jeder Schneesaison (1. Juli).
+
+Je Saison gilt ein Modell, damit Wechsel zwischen beiden keine Sprünge
+erzeugen; Lücken in der Schneehöhe bleiben NaN.
+
+`swe` liefert die Tagesreihe, `seasonal` je Saison (benannt nach dem Jahr des
+Januars) den modellierten Schneefall (gefallene Schneemasse, NaN ohne
+Niederschlag und Temperatur) und das Maximum des SWE. Setzung und Rauschen
+der Schneehöhe zählen damit nicht als Schneefall. Beides wird pro Station und
+Qualitätsfilter bis zur nächsten Datenänderung gecacht.
+"""
+import numpy as np
+import pandas as pd
+
+from pxs import qc
+from pxs.store import day_years, to_datetime
+
+SNOW_COLUMN = "SCHNEEHOEHE"
+TEMP_COLUMN = "LUFTTEMPERATUR"
+RAIN_COLUMN = "NIEDERSCHLAGSHOEHE"
+
+RHO_NEW = 100.0          # kg/m³, Neuschnee
+RHO_MAX = 450.0          # kg/m³, gesetzter Altschnee
+K_AGE = 0.02             # 1/Tag
+K_DEGREE = 0.01          # 1/(K·Tag)
+SNOW_TEMP = 1.0          # °C, darunter fällt Niederschlag als Schnee
+MELT_TEMP = 0.0          # °C
+DEGREE_DAY_FACTOR = 3.0  # mm/(K·Tag)
+SEASON_START_MONTH = 7
+
+
+def season_of(days):
+    """Snow season of each day, named after the year of its January (July to June)."""
+    months = to_datetime(days).astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return day_years(days) + (months >= SEASON_START_MONTH)
+
+
+def _run_start(starts):
+    # Index des Laufbeginns für jede Zeile
+    return np.maximum.accumulate(np.where(starts, np.arange(len(starts)), 0))
+
+
+def density(days, depth, temperature):
+    """Snow density (kg/m³) on days with snow cover, NaN elsewhere."""
+    cover = depth > 0
+    previous = np.r_[False, cover[:-1]]
+    starts = cover & (~previous | np.r_[True, np.diff(days) != 1])
+    start = _run_start(starts)
+    age = days - days[start]
+    warm = np.cumsum(np.where(np.isnan(temperature), 0, np.maximum(temperature, 0)))
+    # Gradtage seit Laufbeginn (der Starttag selbst zählt nicht)
+    degree_days = warm - warm[start]
+    rho = RHO_MAX - (RHO_MAX - RHO_NEW) * np.exp(-(K_AGE * age + K_DEGREE * degree_days))
+    return np.where(cover, rho, np.nan)
+
+
+def snowfall(temperature, precipitation, snowfall_form):
+    """Daily snowfall (mm water): precipitation on days below SNOW_TEMP or with snow as form, NaN if unknown."""
+    snowing = (temperature < SNOW_TEMP) | snowfall_form
+    unknown = np.isnan(precipitation) | (np.isnan(temperature) & ~snowfall_form)
+    return np.where(unknown, np.nan, np.where(snowing, precipitation, 0))
+
+
+def degree_day(days, temperature, precipitation, snowfall_form):
+    """SWE (mm) of the degree-day mass balance, restarted every snow season."""
+    valid = ~np.isnan(temperature)
+    melt = DEGREE_DAY_FACTOR * np.maximum(np.where(valid, temperature, MELT_TEMP) - MELT_TEMP, 0)
+    change = np.nan_to_num(snowfall(temperature, precipitation, snowfall_form)) - melt
+    # Lindley: W_t = S_t - min(0, min_{s<=t} S_s) mit S = kumulierte Summe je Saison
+    seasons = season_of(days)
+    total = pd.Series(change).groupby(seasons).cumsum()
+    lowest = total.groupby(seasons).cummin().to_numpy()
+    return total.to_numpy() - np.minimum(lowest, 0)
+
+
+def _inputs(station, min_quality):
+    # (Temperatur, Niederschlag, Schneeform) als float64 bzw. bool; None ohne Niederschlag oder Temperatur
+    if RAIN_COLUMN not in station.masks or TEMP_COLUMN not in station.masks:
+        return None
+    return (station.series(TEMP_COLUMN, min_quality=min_quality).astype(np.float64),
+            station.series(RAIN_COLUMN, min_quality=min_quality).astype(np.float64),
+            (station.masks[RAIN_COLUMN] & qc.QC_SNOW) > 0)
+
+
+def compute(station, min_quality=None):
+    """Daily SWE (float32 mm, NaN where it cannot be estimated) of one station."""
+    days = station.day
+    depth = station.series(SNOW_COLUMN, min_quality=min_quality).astype(np.float64)
+    inputs = _inputs(station, min_quality)
+    temperature = inputs[0] if inputs else np.full(len(days), np.nan)
+    from_depth = depth * density(days, np.nan_to_num(depth), temperature) / 100
+    swe = np.where(depth == 0, 0, from_depth)
+
+    if inputs:
+        # Ein Modell je Saison: mit Schneehöhen das Dichtemodell, sonst das Gradtagmodell
+        measured = pd.Series(~np.isnan(depth)).groupby(season_of(days)).transform("any").to_numpy()
+        swe = np.where(measured, swe, degree_day(days, *inputs))
+    return swe.astype(np.float32)
+
+
+def swe(station, min_quality=None):
+    """Cached daily SWE of a station (see `compute`)."""
+    return station.cached(("swe", int(min_quality or 0)), lambda: compute(station, min_quality))
+
+
+def seasonal(station, min_quality=None):
+    """Per snow season: 'total' (modelled snowfall) and 'peak' SWE in mm."""
+    def build():
+        seasons = season_of(station.day)
+        inputs = _inputs(station, min_quality)
+        fallen = snowfall(*inputs) if inputs else np.full(len(seasons), np.nan)
+        # Saisons ohne Werte bleiben leer statt 0
+        return pd.DataFrame({
+            "total": pd.Series(fallen).groupby(seasons).sum(min_count=1),
+            "peak": pd.Series(swe(station, min_quality), dtype=np.float64).groupby(seasons).max(),
+        })
+
+    return station.cached(("swe-seasonal", int(min_quality or 0)), build)
@@ -0,0 +1,580 @@
+"""Stationsspeicher: jede CSV aus dem data-Ordner wird genau einmal geparst.
+
+Die DWD-Exporte wachsen, indem neue Tageswerte hinten angehängt werden. Pro
+Datei merkt sich der Speicher den Byte-Offset der letzten vollständig
+gelesenen Zeile und parst beim Nachladen nur den neuen Teil. Jahreswerte und
+Caches werden dabei nur für die betroffenen Jahre bzw. Stationen erneuert und
+`StationStore.version` wird hochgezählt, damit die Seiten neu rendern.
+"""
+import io
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pxs import executor, qc, shared
+from pxs.dates import INVALID_DAY, decode_days, days_from_ddmmyyyy
+
+DATA_FOLDER = Path("data")
+DATE_COLUMN = "DATE"
+# Dasselbe Datum als Ganzzahl JJJJMMTT, daraus wird die Tagesnummer berechnet (siehe pxs/dates.py)
+DATE_INTEGER_COLUMN = "MESS_DATUM"
+MISSING = -999
+
+# Ganzzahlige Spalten und ihr Typ (alle anderen Messwerte werden als float32 gespeichert).
+# Fehlende Werte stehen dort als MISSING_INT, maßgeblich ist die Gültigkeitsmaske
+INTEGER_COLUMNS = {"MESS_DATUM": np.int32, "QUALITAETS_NIVEAU": np.int8, "NIEDERSCHLAGSHOEHE_IND": np.int8}
+MISSING_INT = -1
+
+# Sekunden zwischen zwei Prüfungen des data-Ordners
+WATCH_INTERVAL = float(os.environ.get("PXS_WATCH_INTERVAL", "10"))
+
+# Verzeichnis mit den Spalten als .npy-Dateien (siehe pxs/shared.py); unter gunicorn
+# liegt es in /dev/shm und wird von allen Workern gemeinsam gemappt
+SHARED_DIR = os.environ.get("PXS_SHARED_DIR", "cache/columns")
+
+# So viele Bytes vor dem Offset werden verglichen, um umgeschriebene Dateien zu erkennen
+_FINGERPRINT_SIZE = 64
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _parse_block(block, names):
+    """Parses CSV rows (without header) into (columns, masks).
+
+    DATE becomes an int32 day number (days since 1970-01-01), measurements are
+    float32 with NaN for -999, integer columns use the types of INTEGER_COLUMNS.
+    The masks are uint8 QC bitmasks (see pxs/qc.py), 0 for present and
+    plausible values. Rows without a parsable date are dropped.
+    """
+    if not block.strip():
+        return None
+    df = pd.read_csv(io.BytesIO(block), header=None, names=names, skipinitialspace=True)
+    if DATE_INTEGER_COLUMN in df:
+        days = decode_days(pd.to_numeric(df[DATE_INTEGER_COLUMN], errors="coerce"), lambda: df[DATE_COLUMN].to_numpy())
+    else:
+        days = days_from_ddmmyyyy(df[DATE_COLUMN].astype(str).to_numpy())
+    rows = days != INVALID_DAY
+    columns = {DATE_COLUMN: days[rows]}
+    values = {}
+    valid = {}
+    for name in names:
+        if name == DATE_COLUMN:
+            continue
+        values[name] = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)[rows]
+        valid[name] = ~np.isnan(values[name]) & (values[name] != MISSING)
+        if name in INTEGER_COLUMNS:
+            columns[name] = np.where(valid[name], values[name], MISSING_INT).astype(INTEGER_COLUMNS[name])
+        else:
+            columns[name] = np.where(valid[name], values[name], np.nan).astype(np.float32)
+    return columns, qc.flags(values, valid)
+
+
+def to_day(dates):
+    """datetime64 -> int32 day number (days since 1970-01-01)."""
+    return (np.asarray(dates).astype("datetime64[D]") - _EPOCH).astype(np.int32)
+
+
+def to_datetime(days):
+    """int32 day number -> datetime64[D]."""
+    return _EPOCH + np.asarray(days).astype("timedelta64[D]")
+
+
+def year_start(years):
+    """Calendar years -> datetime64[D] of January 1st."""
+    return (np.asarray(years) - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+
+
+def day_years(days):
+    """Calendar year of each day number."""
+    return to_datetime(days).astype("datetime64[Y]").astype(int) + 1970
+
+
+class YearlyStats:
+    """Jahreswerte (Summe, Anzahl, Maximum, Tage > 0) je Spalte, inkrementell fortgeschrieben."""
+
+    def __init__(self, min_quality=None):
+        self.table = pd.DataFrame()
+        self.min_quality = min_quality
+
+    def update(self, station, start):
+        """Recomputes the years from row `start` on, earlier years are kept."""
+        days = station.day[start:]
+        if not len(days):
+            return
+        years = day_years(days)
+        frame = pd.DataFrame({
+            name: station.series(name, min_quality=self.min_quality)[start:]
+            for name in station.names if name != DATE_COLUMN
+        })
+        grouped = frame.groupby(years)
+        table = pd.concat({
+            "sum": grouped.sum(),
+            "count": grouped.count(),
+            "max": grouped.max(),
+            "positive": (frame > 0).groupby(years).sum(),
+        }, axis=1)
+        if not self.table.empty:
+            table = pd.concat([self.table[self.table.index < years.min()], table])
+        self.table = table
+
+    def sum(self, column):
+        return self.table[("sum", column)]
+
+    def count(self, column):
+        return self.table[("count", column)]
+
+    def mean(self, column):
+        return self.sum(column) / self.count(column)
+
+    def max(self, column):
+        return self.table[("max", column)]
+
+    def positive(self, column):
+        return self.table[("positive", column)]
+
+
+class _Cache:
+    """Ergebnisse pro Schlüssel; builder() läuft außerhalb des Locks.
+
+    Gleichzeitige Anfragen nach demselben Schlüssel warten auf denselben Bau
+    (Future), andere Schlüssel werden nicht blockiert. `clear` beginnt eine
+    neue Epoche: Bauten, die davor gestartet sind, werden nicht mehr abgelegt.
+    """
+
+    def __init__(self, lock):
+        self._lock = lock
+        self._values = {}
+        self._building = {}
+        self._epoch = 0
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._building.clear()
+            self._epoch += 1
+
+    def get(self, key, builder):
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            pending = self._building.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._building[key] = Future()
+                epoch = self._epoch
+        if not owner:
+            return pending.result()
+        try:
+            value = builder()
+        except BaseException as error:
+            with self._lock:
+                if self._building.get(key) is pending:
+                    del self._building[key]
+            pending.set_exception(error)
+            raise
+        with self._lock:
+            if self._building.get(key) is pending:
+                del self._building[key]
+            if self._epoch == epoch:
+                self._values[key] = value
+        pending.set_result(value)
+        return value
+
+
+class Station:
+    """Spalten einer Stations-CSV als zusammenhängende numpy-Arrays plus Jahreswerte.
+
+    `columns[DATE]` sind int32-Tagesnummern, `columns[name]` float32-Messwerte
+    (bzw. int32/int8 für INTEGER_COLUMNS) und `masks[name]` uint8-QC-Bitmasken
+    (pxs/qc.py: fehlend, unplausibel, Niederschlagsform).
+    Nach `attach` sind alle Arrays nur lesende Memory-Maps.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = Path(path)
+        self.names = []
+        self.columns = {}
+        self.masks = {}
+        self.yearly = YearlyStats()
+        self.version = 0
+        self._offset = 0
+        self._provisional = 0
+        self._pending = b""
+        self._fingerprint = b""
+        self._signature = None
+        # Veröffentlichter Zustand, mit dem die Station gemappt wurde (attach)
+        self._attached = None
+        self._lock = threading.RLock()
+        self._cache = _Cache(self._lock)
+
+    def __len__(self):
+        return len(self.columns.get(DATE_COLUMN, ()))
+
+    def __getstate__(self):
+        # Für die Übergabe aus Worker-Prozessen (build-cache); Lock und Cache bleiben lokal
+        state = self.__dict__.copy()
+        del state["_lock"]
+        del state["_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        self._cache = _Cache(self._lock)
+
+    @property
+    def day(self):
+        return self.columns[DATE_COLUMN]
+
+    def dates(self, rows=slice(None)):
+        """Dates of `rows` as datetime64[D]."""
+        return to_datetime(self.day[rows])
+
+    def rows(self, start=None, end=None):
+        """Slice of the rows between two day numbers (inclusive), for zero-copy column views."""
+        lo = 0 if start is None else int(np.searchsorted(self.day, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.day, end, side="right"))
+        return slice(lo, hi)
+
+    def series(self, name, clean=True, min_quality=None):
+        """Column `name`: missing and implausible values are NaN if `clean`, else -999 as in the file.
+
+        Rows below `min_quality` (QUALITAETS_NIVEAU) count as missing. Clean
+        measurement columns without implausible values are returned without
+        copying, all other variants are cached until the data changes.
+        """
+        values = self.columns[name]
+        if self.quality_rows(min_quality) is not None:
+            def build():
+                series = self.series(name, clean)
+                return np.where(self.quality_rows(min_quality), series, np.nan if clean else MISSING).astype(series.dtype)
+            return self.cached(("series", name, clean, qc.quality_level(min_quality)), build)
+        if clean:
+            if values.dtype.kind == "f" and not self.flagged(name, qc.QC_IMPLAUSIBLE):
+                return values
+            return self.cached(("series", name, True, 0), lambda: np.where(
+                self.masks[name] & qc.QC_BAD, np.nan, values).astype(np.float32))
+        return np.where(self.masks[name] & qc.QC_MISSING, MISSING, values)
+
+    def flagged(self, name, bits):
+        """True if any value of column `name` has one of the QC `bits`."""
+        return self.cached(("flagged", name, bits), lambda: bool((self.masks[name] & bits).any()))
+
+    def quality_rows(self, min_quality):
+        """Bool mask of the rows with QUALITAETS_NIVEAU >= `min_quality`, None if not filtered.
+
+        Only the levels of qc.QUALITY_LEVELS are accepted (ValueError otherwise).
+        """
+        level = qc.quality_level(min_quality)
+        if not level or qc.QUALITY_COLUMN not in self.columns:
+            return None
+        return self.cached(("quality-rows", level),
+                           lambda: qc.quality_rows(self.columns[qc.QUALITY_COLUMN], level))
+
+    def _reset(self):
+        self.names = []
+        self.columns = {}
+        self.masks = {}
+        self.yearly = YearlyStats()
+        self._offset = 0
+        self._provisional = 0
+        self._pending = b""
+        self._fingerprint = b""
+
+    def _read_new_bytes(self):
+        with open(self.path, "rb") as f:
+            if self._offset:
+                f.seek(self._offset - len(self._fingerprint))
+                if f.read(len(self._fingerprint)) != self._fingerprint:
+                    # Datei wurde umgeschrieben, nicht nur verlängert
+                    self._reset()
+                    f.seek(0)
+            return f.read()
+
+    def refresh(self):
+        """Reads rows appended since the last call. Returns True if the data changed."""
+        with self._lock:
+            stat = self.path.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature == self._signature:
+                return False
+            self._signature = signature
+            if stat.st_size < self._offset:
+                self._reset()
+
+            chunk = self._read_new_bytes()
+            if not self._offset:
+                header, _, chunk = chunk.partition(b"\n")
+                self.names = [n.strip() for n in header.decode().split(",")]
+                self._offset = len(header) + 1
+                self._fingerprint = (header + b"\n")[-_FINGERPRINT_SIZE:]
+            elif chunk == self._pending:
+                return False
+
+            # Die letzte Zeile ohne Zeilenumbruch wird vorläufig übernommen und beim
+            # nächsten Nachladen neu geparst (Datei endet ohne \n oder wird gerade geschrieben)
+            end = chunk.rfind(b"\n") + 1
+            keep = len(self) - self._provisional
+            new = _parse_block(chunk, self.names)
+            self._offset += end
+            self._fingerprint = (self._fingerprint + chunk[:end])[-_FINGERPRINT_SIZE:]
+            self._pending = chunk[end:]
+            self._provisional = 1 if self._pending.strip() else 0
+            if new is None and keep == len(self):
+                return False
+
+            new_columns, new_masks = new or ({}, {})
+            if self.columns:
+                columns = {n: np.concatenate([v[:keep], new_columns[n]]) if new else v[:keep]
+                           for n, v in self.columns.items()}
+                masks = {n: np.concatenate([m[:keep], new_masks[n]]) if new else m[:keep]
+                         for n, m in self.masks.items()}
+            else:
+                columns, masks = new_columns, new_masks
+            days = columns[DATE_COLUMN]
+            if len(days) > 1 and (np.diff(days) < 0).any():
+                order = np.argsort(days, kind="stable")
+                columns = {n: v[order] for n, v in columns.items()}
+                masks = {n: m[order] for n, m in masks.items()}
+                start = 0
+            elif len(days) > keep:
+                # Nur die Jahre ab der ersten neuen Zeile neu berechnen
+                first_year = day_years(days[keep:keep + 1])[0]
+                start = int(np.searchsorted(days, to_day(np.datetime64(f"{first_year:04d}-01-01"))))
+            else:
+                start = len(days)
+
+            self.columns = columns
+            self.masks = masks
+            # Vor den Jahreswerten leeren: series() cacht umgewandelte Spalten
+            self._cache.clear()
+            self.yearly.update(self, start)
+            self.version += 1
+            return True
+
+    def arrays(self):
+        """All arrays to publish: columns plus `<name>.qc` masks."""
+        return {**self.columns, **{f"{n}.qc": m for n, m in self.masks.items()}}
+
+    def shared_state(self):
+        """Everything `attach` needs to continue the tail ingest in another process."""
+        return {
+            "names": self.names,
+            "version": self.version,
+            "offset": self._offset,
+            "provisional": self._provisional,
+            "pending": self._pending.hex(),
+            "fingerprint": self._fingerprint.hex(),
+            "signature": list(self._signature) if self._signature else None,
+        }
+
+    @classmethod
+    def attach(cls, name, path, directory, state):
+        """Creates a station whose columns are read-only mappings of published .npy files."""
+        station = cls(name, path)
+        station.names = state["names"]
+        measured = [n for n in state["names"] if n != DATE_COLUMN]
+        station.columns = shared.map_columns(directory, state["names"])
+        masks = shared.map_columns(directory, [f"{n}.qc" for n in measured])
+        station.masks = {n: masks[f"{n}.qc"] for n in measured}
+        station.yearly.table = shared.read_table(Path(directory) / "yearly.npy", state["yearly"])
+        station.version = state["version"]
+        station._offset = state["offset"]
+        station._provisional = state["provisional"]
+        station._pending = bytes.fromhex(state["pending"])
+        station._fingerprint = bytes.fromhex(state["fingerprint"])
+        station._signature = tuple(state["signature"]) if state["signature"] else None
+        station._attached = state
+        return station
+
+    def yearly_stats(self, min_quality=None):
+        """Yearly values; with a quality filter computed from the filtered columns and cached."""
+        if self.quality_rows(min_quality) is None:
+            return self.yearly
+
+        def build():
+            stats = YearlyStats(min_quality)
+            stats.update(self, 0)
+            return stats
+        return self.cached(("yearly", int(min_quality)), build)
+
+    def frame(self, names=None, clean=True, min_quality=None):
+        """Returns the station as DataFrame (DATE first), -999 as NaN if `clean`."""
+        names = [n for n in (names or self.names) if n != DATE_COLUMN]
+        return pd.DataFrame({DATE_COLUMN: self.dates(), **{n: self.series(n, clean, min_quality) for n in names}})
+
+    def cached(self, key, builder):
+        """Returns builder() and keeps it until the station data changes (built outside the station lock)."""
+        return self._cache.get(key, builder)
+
+
+class StationStore:
+    """Alle Stationen des data-Ordners; `version` steigt bei jeder Datenänderung."""
+
+    def __init__(self, folder=DATA_FOLDER):
+        self.folder = Path(folder)
+        self.version = 0
+        self._stations = {}
+        self._known = None
+        self._lock = threading.RLock()
+        self._cache = _Cache(self._lock)
+        self._watcher = None
+        self._shared = None
+        self._generation = None
+
+    def names(self):
+        if not self.folder.exists():
+            return []
+        return sorted(f.stem for f in self.folder.glob("*.csv"))
+
+    def get(self, name):
+        """Returns the station `name`, parsing the file on first access."""
+        with self._lock:
+            station = self._stations.get(name)
+            if station is None:
+                path = self.folder / f"{name}.csv"
+                if not path.exists():
+                    raise KeyError(name)
+                station = Station(name, path)
+                station.refresh()
+                self._stations[name] = station
+            return station
+
+    def load(self, names):
+        """Returns {name: station} for the existing `names`, parsing missing ones in parallel."""
+        with self._lock:
+            missing = {name: self.folder / f"{name}.csv" for name in names
+                       if name not in self._stations and (self.folder / f"{name}.csv").exists()}
+        if missing:
+            parsed = executor.parse_stations(missing)
+            with self._lock:
+                for station in parsed:
+                    self._stations.setdefault(station.name, station)
+        with self._lock:
+            return {name: self._stations[name] for name in names if name in self._stations}
+
+    def refresh(self):
+        """Checks all files for appended rows. Returns True if the dataset version changed."""
+        if self._shared is None:
+            return self._refresh_files()
+        with shared.locked(self._shared):
+            if shared.current(self._shared) != self._generation:
+                # Ein anderer Worker hat die neuen Zeilen schon veröffentlicht
+                self.attach(self._shared)
+                return True
+            if not self._refresh_files():
+                return False
+            self.publish(self._shared)
+            self.attach(self._shared)
+            return True
+
+    def _refresh_files(self):
+        with self._lock:
+            names = self.names()
+            changed = self._known is not None and set(names) != self._known
+            self._known = set(names)
+            for name in list(self._stations):
+                if name not in self._known:
+                    del self._stations[name]
+            changed |= any(executor.map_stations(Station.refresh, list(self._stations.values())))
+            if changed:
+                self.version += 1
+                self._cache.clear()
+            return changed
+
+    def open(self, directory=SHARED_DIR):
+        """Maps the columns in `directory`, publishing them first if there are none yet.
+
+        Files that grew or changed since they were published are brought up to
+        date by the following refresh, so a stale directory costs a tail parse,
+        not a full one. Edits in the middle of a file that keep its size and
+        beginning are only caught by the checksums in the manifest; then all
+        stations are parsed and published again.
+        """
+        with shared.locked(directory):
+            if not shared.usable(directory):
+                self.publish(directory)
+            self.attach(directory)
+        if self.refresh() or not shared.changed_sources(directory, self.folder):
+            return
+        with shared.locked(directory):
+            # Ein anderer Worker kann inzwischen neu veröffentlicht haben
+            if shared.changed_sources(directory, self.folder):
+                with self._lock:
+                    self._stations = {}
+                    self.version += 1
+                    self._cache.clear()
+                    self.publish(directory)
+            self.attach(directory)
+
+    def publish(self, directory, extra=None):
+        """Writes all stations as .npy files to `directory` for other processes to attach."""
+        with self._lock:
+            self.load(self.names())
+            self._known = set(self._stations)
+            stations = {name: (station.arrays(), station.yearly.table, station.shared_state())
+                        for name, station in self._stations.items()}
+            sources = {name: station.path for name, station in self._stations.items()}
+            self._generation = shared.write_generation(directory, self.version, stations, sources, extra)
+            return self._generation
+
+    def adopt(self, parsed):
+        """Takes over stations parsed elsewhere (e.g. in worker processes)."""
+        with self._lock:
+            for station in parsed:
+                self._stations[station.name] = station
+
+    def generation_path(self):
+        """Directory of the attached generation, or None."""
+        if self._shared is None or self._generation is None:
+            return None
+        return self._shared / self._generation
+
+    def attach(self, directory):
+        """Maps the stations published to `directory` read-only instead of parsing the CSVs."""
+        generation, path, index = shared.read_generation(directory)
+        with self._lock:
+            # Unveränderte Stationen (gleicher Lesezustand, Dateien verlinkt) behalten ihre Mappings und Caches
+            previous = self._stations
+            self._stations = {
+                name: station if station is not None and station._attached == state
+                else Station.attach(name, self.folder / f"{name}.csv", path / name, state)
+                for name, state in index["stations"].items()
+                for station in (previous.get(name),)
+            }
+            self._known = set(self._stations)
+            self._shared = Path(directory)
+            self._generation = generation
+            if self.version != index["version"]:
+                self.version = index["version"]
+                self._cache.clear()
+
+    def cached(self, key, builder):
+        """Like Station.cached, but invalidated by changes to any station."""
+        return self._cache.get(key, builder)
+
+    def start_watcher(self, interval=WATCH_INTERVAL):
+        """Starts a daemon thread that polls the data folder for appended rows."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    traceback.print_exc()
+
+        self._watcher = threading.Thread(target=watch, name="pxs-station-watcher", daemon=True)
+        self._watcher.start()
+
+
+stations = StationStore()
@@ -0,0 +1,198 @@
+"""Trendanalyse für alle Reihen auf einmal: OLS, Mann-Kendall und Sen-Steigung.
+
+Eine Reihe ist der Jahres- bzw. Jahreszeitenwert (Mittel, bei Niederschlag
+und Sonnenschein die Summe) einer Spalte einer Station; Zeiträume mit weniger
+als MIN_COVERAGE gültigen Tagen fehlen (NaN). Alle Reihen werden als Matrix
+(Reihen x Jahre) gemeinsam ausgewertet:
+
+    ols          Steigung, Achsenabschnitt und R² über maskierte Summen
+    mann_kendall S, Z und zweiseitiges p; die diskordanten Paare werden mit
+                 einer bitweisen Inversionszählung über alle Reihen zugleich
+                 bestimmt (O(n log n) je Reihe), Bindungen korrigieren die Varianz
+    sens_slope   Median der paarweisen Steigungen
+
+`trend_table` liefert die sortierbare Übersicht Station x Spalte x Zeitraum,
+gecacht pro Qualitätsfilter bis zur nächsten Datenänderung.
+"""
+import numpy as np
+import pandas as pd
+
+from pxs.indices import MIN_COVERAGE, SEASONS, calendar_days, season_years
+from pxs.qc import FORM_COLUMN, QUALITY_COLUMN
+from pxs.store import stations, DATE_COLUMN, DATE_INTEGER_COLUMN
+
+# Spalten, deren Zeitraumwert die Summe ist
+SUM_COLUMNS = {"NIEDERSCHLAGSHOEHE", "SONNENSCHEINDAUER"}
+# Keine Messwerte
+SKIP_COLUMNS = {DATE_COLUMN, DATE_INTEGER_COLUMN, QUALITY_COLUMN, FORM_COLUMN}
+SIGNIFICANCE = 0.05
+MIN_YEARS = 10
+
+
+# == Statistik ============================================================================
+
+def ols(x, Y):
+    """Least-squares line per row of Y (rows x len(x), NaN = missing): (slope, intercept, r²)."""
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    x = np.broadcast_to(np.asarray(x, dtype=np.float64), Y.shape)
+    valid = ~np.isnan(Y)
+    n = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(valid, x, 0).sum(axis=1) / n
+        mean_y = np.where(valid, Y, 0).sum(axis=1) / n
+        dx = np.where(valid, x - mean_x[:, None], 0)
+        dy = np.where(valid, Y - mean_y[:, None], 0)
+        sxx, syy, sxy = (dx * dx).sum(axis=1), (dy * dy).sum(axis=1), (dx * dy).sum(axis=1)
+        slope = sxy / sxx
+        r2 = np.where(syy > 0, sxy * sxy / (sxx * syy), np.nan)
+    return slope, mean_y - slope * mean_x, r2
+
+
+def fit(x, y):
+    """(slope, intercept, r²) of a single series."""
+    slope, intercept, r2 = ols(x, y)
+    return slope[0], intercept[0], r2[0]
+
+
+def _dense_ranks(row, values):
+    # Ränge je Reihe (gleiche Werte, gleicher Rang), 0-basiert
+    order = np.lexsort((values, row))
+    new = np.r_[True, (row[order][1:] != row[order][:-1]) | (values[order][1:] != values[order][:-1])]
+    first = np.r_[True, row[order][1:] != row[order][:-1]]
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.cumsum(new) - np.maximum.accumulate(np.where(first, np.cumsum(new), 0))
+    return ranks
+
+
+def discordant_pairs(row, ranks, rows):
+    """Pairs i < j (in time order) with rank_i > rank_j, per row; bit by bit over all rows at once."""
+    count = np.zeros(rows, dtype=np.int64)
+    bits = int(ranks.max()).bit_length() if len(ranks) else 0
+    for bit in range(bits):
+        # Gruppen mit gleichem höheren Rang-Präfix, zeitlich geordnet (stabile Sortierung)
+        group = row * (1 << (bits - bit)) + (ranks >> (bit + 1))
+        order = np.argsort(group, kind="stable")
+        ones = (ranks[order] >> bit) & 1
+        before = np.cumsum(ones) - ones
+        starts = np.r_[True, group[order][1:] != group[order][:-1]]
+        before -= np.maximum.accumulate(np.where(starts, before, 0))
+        # Jede 0 nach einer 1 derselben Gruppe ist ein diskordantes Paar
+        zeros = ones == 0
+        count += np.bincount(row[order][zeros], weights=before[zeros], minlength=rows).astype(np.int64)
+    return count
+
+
+def mann_kendall(Y):
+    """Mann-Kendall test per row of Y (time along axis 1, NaN = missing): (S, Z, two-sided p)."""
+    from scipy.special import ndtr
+
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    rows = len(Y)
+    row, column = np.nonzero(~np.isnan(Y))
+    values = Y[row, column]
+    n = np.bincount(row, minlength=rows)
+    ranks = _dense_ranks(row, values)
+
+    # Bindungen: Größe jeder Gruppe gleicher Werte
+    width = int(ranks.max()) + 1 if len(ranks) else 1
+    groups, ties = np.unique(row * width + ranks, return_counts=True)
+    tie_rows = groups // width
+    tied = np.bincount(tie_rows, weights=ties * (ties - 1) / 2, minlength=rows)
+    tie_variance = np.bincount(tie_rows, weights=ties * (ties - 1) * (2 * ties + 5), minlength=rows)
+
+    pairs = n * (n - 1) / 2
+    discordant = discordant_pairs(row, ranks, rows)
+    s = pairs - tied - 2 * discordant
+    variance = (n * (n - 1) * (2 * n + 5) - tie_variance) / 18
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(variance > 0, (s - np.sign(s)) / np.sqrt(variance), np.nan)
+    return s, z, 2 * ndtr(-np.abs(z))
+
+
+def sens_slope(x, Y):
+    """Median of the pairwise slopes (y_j - y_i) / (x_j - x_i), i < j, per row of Y."""
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    x = np.asarray(x, dtype=np.float64)
+    i, j = np.triu_indices(len(x), k=1)
+    slopes = (Y[:, j] - Y[:, i]) / (x[j] - x[i])
+    with np.errstate(invalid="ignore"):
+        result = np.full(len(Y), np.nan)
+        some = ~np.isnan(slopes).all(axis=1)
+        result[some] = np.nanmedian(slopes[some], axis=1)
+    return result
+
+
+# == Reihen ===============================================================================
+
+def measurement_columns(station):
+    return [name for name in station.names if name not in SKIP_COLUMNS and name in station.masks]
+
+
+def seasonal_values(station, season="year", min_quality=None):
+    """Years x measurement columns: mean (SUM_COLUMNS: sum) per season, NaN below MIN_COVERAGE."""
+    def build():
+        years = season_years(station.day, season)
+        inside = years >= 0
+        if not inside.any():
+            return pd.DataFrame()
+        first_year, last_year = years[inside].min(), years[inside].max()
+        size = last_year - first_year + 1
+        index = years[inside] - first_year
+        calendar = calendar_days(first_year, last_year, season)
+        table = {}
+        for name in measurement_columns(station):
+            values = station.series(name, min_quality=min_quality)[inside].astype(np.float64)
+            valid = ~np.isnan(values)
+            counts = np.bincount(index[valid], minlength=size)
+            sums = np.bincount(index[valid], weights=values[valid], minlength=size)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = sums if name in SUM_COLUMNS else sums / counts
+            table[name] = np.where(counts >= MIN_COVERAGE * calendar, result, np.nan)
+        return pd.DataFrame(table, index=pd.RangeIndex(first_year, last_year + 1, name="year"))
+
+    return station.cached(("seasonal-values", season, int(min_quality or 0)), build)
+
+
+def trend_table(min_quality=None):
+    """One row per station x column x season with OLS, Mann-Kendall and Sen's slope (per decade)."""
+    def build():
+        series = {}
+        for name, station in stations.load(stations.names()).items():
+            for season in SEASONS:
+                table = seasonal_values(station, season, min_quality)
+                for column in table.columns:
+                    series[(name, column, season)] = table[column]
+        if not series:
+            return pd.DataFrame()
+
+        # Alle Reihen auf gemeinsame Jahre bringen: eine Matrix, eine Rechnung
+        matrix = pd.DataFrame(series).T
+        years = matrix.columns.to_numpy(dtype=np.float64)
+        Y = matrix.to_numpy(dtype=np.float64)
+        valid = ~np.isnan(Y)
+        enough = valid.sum(axis=1) >= MIN_YEARS
+        Y, keys = Y[enough], matrix.index[enough]
+        valid = valid[enough]
+
+        slope, _, r2 = ols(years, Y)
+        s, z, p = mann_kendall(Y)
+        sen = sens_slope(years, Y)
+        first = years[valid.argmax(axis=1)].astype(int)
+        last = years[len(years) - 1 - valid[:, ::-1].argmax(axis=1)].astype(int)
+        return pd.DataFrame({
+            "station": keys.get_level_values(0),
+            "column": keys.get_level_values(1),
+            "season": keys.get_level_values(2),
+            "years": valid.sum(axis=1),
+            "first": first,
+            "last": last,
+            "ols_decade": slope * 10,
+            "r2": r2,
+            "sen_decade": sen * 10,
+            "mk_s": s,
+            "mk_z": z,
+            "mk_p": p,
+            "significant": p < SIGNIFICANCE,
+        })
+
+    return stations.cached(("trend-table", int(min_quality or 0)), build)
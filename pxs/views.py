@@ -0,0 +1,330 @@
+"""Standardansichten der Seiten (Trends, Korrelationsmatrix).
+
+Die Builder werden sowohl von den Seiten als auch von ``python -m pxs
+build-cache`` benutzt. Der Cache-Build legt die fertigen Figuren und Tabellen
+als JSON in der aktuellen Generation ab (``views/``); die Seiten laden sie von
+dort, solange sich die Daten nicht geändert haben, und bauen sie sonst neu.
+
+plotly.express wird erst in den Buildern importiert, damit ein Worker ohne
+diese Bibliothek starten kann (siehe benchmarks/import_time.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from pxs import climatology, trends
+from pxs.figures import webgl_figure
+from pxs.gapfill import day_of_year
+from pxs.serialize import compact_figure
+from pxs.store import stations, day_years, to_datetime, to_day
+
+# Stationen der Trends-Seite und das jeweils älteste vollständige Jahr für den historischen Vergleich
+LOCATIONS = {'arber': 'Arber', 'straubing': 'Straubing', 'schorndorf': 'Schorndorf'}
+HISTORY_YEARS = {'arber': 1983, 'straubing': 1951, 'schorndorf': 1997}
+STATISTICS_COLUMNS = ['NIEDERSCHLAGSHOEHE', 'LUFTTEMPERATUR', 'LUFTTEMPERATUR_MAXIMUM', 'LUFTTEMPERATUR_MINIMUM']
+
+TEMP_LABELS = {'DATE': 'Datum', 'LUFTTEMPERATUR': 'Temperatur (°C)'}
+RAIN_LABELS = {'DATE': 'Datum', 'NIEDERSCHLAGSHOEHE': 'Liter'}
+
+# Dictionary mit allen verfügbaren Spalten für Korrelationen
+CORRELATION_COLUMNS = {
+    'LUFTTEMPERATUR': 'Lufttemperatur',
+    'NIEDERSCHLAGSHOEHE': 'Niederschlagshöhe',
+    'LUFTTEMPERATUR_MAXIMUM': 'Lufttemperatur Maximum',
+    'LUFTTEMPERATUR_MINIMUM': 'Lufttemperatur Minimum',
+    'WINDSPITZE_MAXIMUM': 'Windspitze Maximum',
+    'SCHNEEHOEHE': 'Schneehöhe',
+    'DAMPFDRUCK': 'Dampfdruck',
+    'BEDECKUNGSGRAD': 'Bedeckungsgrad',
+    'WINDGESCHWINDIGKEIT': 'Windgeschwindigkeit',
+    'SONNENSCHEINDAUER': 'Sonnenscheindauer',
+    'LUFTDRUCK_STATIONSHOEHE': 'Luftdruck Stationshöhe',
+    'REL_FEUCHTE': 'Relative Feuchte',
+    'LUFTTEMP_AM_ERDB_MINIMUM': 'Lufttemperatur am Erdboden Minimum'
+}
+
+
+# == Trends ===============================================================================
+
+def describe(df):
+    """Deskriptive Statistik der Temperatur- und Niederschlagsspalten als Tabelle"""
+    df_desc = df[STATISTICS_COLUMNS].describe(include='all')
+    df_desc = df_desc.reset_index().rename(columns={'index': 'Statistik'})
+    return df_desc[['Statistik'] + STATISTICS_COLUMNS]
+
+
+def build_trends(location, min_quality=None):
+    """Builds all figures and statistics tables of one station (optionally only rows >= min_quality)"""
+    import plotly.express as px
+
+    name = LOCATIONS[location]
+    history_year = HISTORY_YEARS[location]
+    station = stations.get(name)
+
+    df = station.frame(min_quality=min_quality)
+    df_2015 = df[df['DATE'].dt.year == 2015]
+    df_history = df[df['DATE'].dt.year == history_year]
+
+    # Jahreswerte kommen inkrementell aus dem Stationsspeicher
+    yearly = station.yearly_stats(min_quality)
+    yearly_temp = yearly.mean('LUFTTEMPERATUR').rename_axis('YEAR').rename('LUFTTEMPERATUR').reset_index()
+    yearly_rain = yearly.sum('NIEDERSCHLAGSHOEHE').rename_axis('YEAR').rename('NIEDERSCHLAGSHOEHE').reset_index()
+
+    fig_yearly_temp = px.line(yearly_temp, x='YEAR', y='LUFTTEMPERATUR',
+                              title=f'Jährlicher Durchschnitt Temperatur {name}',
+                              labels={'YEAR': 'Jahr', 'LUFTTEMPERATUR': 'Temperatur (°C)'})
+
+    # Regressionsgerade mit OLS (pxs/trends.py)
+    slope, intercept, r2 = trends.fit(yearly_temp['YEAR'], yearly_temp['LUFTTEMPERATUR'])
+    line = intercept + slope * yearly_temp['YEAR']
+    fig_yearly_temp.add_scatter(x=yearly_temp['YEAR'], y=line, mode='lines',
+                                name=f'Trend (R²={r2:.3f})',
+                                line=dict(color='red', dash='dash'))
+
+    def daily(fig):
+        # Tageswerte: ab PXS_WEBGL_THRESHOLD Punkten WebGL, Daten kompakt kodiert
+        return compact_figure(webgl_figure(fig))
+
+    return {
+        'figures': {
+            'temp': daily(px.line(df, x='DATE', y='LUFTTEMPERATUR',
+                                  title=f'Temperaturverlauf {name}', labels=TEMP_LABELS)),
+            'rain': daily(px.line(df, x='DATE', y='NIEDERSCHLAGSHOEHE',
+                                  title=f'Niederschlagshöhe {name}', labels=RAIN_LABELS)),
+            'temp_2015': daily(px.line(df_2015, x='DATE', y='LUFTTEMPERATUR',
+                                       title=f'Temperaturverlauf {name} 2015', labels=TEMP_LABELS)),
+            'temp_history': daily(px.line(df_history, x='DATE', y='LUFTTEMPERATUR',
+                                          title=f'Temperaturverlauf {name} {history_year}', labels=TEMP_LABELS)),
+            'rain_2015': daily(px.line(df_2015, x='DATE', y='NIEDERSCHLAGSHOEHE',
+                                       title=f'Niederschlagshöhe {name} 2015', labels=RAIN_LABELS)),
+            'rain_history': daily(px.line(df_history, x='DATE', y='NIEDERSCHLAGSHOEHE',
+                                          title=f'Niederschlagshöhe {name} {history_year}', labels=RAIN_LABELS)),
+            'yearly_temp': fig_yearly_temp,
+            'yearly_rain': px.bar(yearly_rain, x='YEAR', y='NIEDERSCHLAGSHOEHE',
+                                  title=f'Jährliche Gesamtniederschlagshöhe {name}',
+                                  labels={'YEAR': 'Jahr', 'NIEDERSCHLAGSHOEHE': 'Niederschlag (mm)'}),
+        },
+        'statistics': {
+            'all': describe(df),
+            '2015': describe(df_2015),
+            'history': describe(df_history),
+        },
+    }
+
+
+def trends_view(location, min_quality=None):
+    """Figures and tables of a station per quality filter, rebuilt only after new rows were appended"""
+    location = location if location in LOCATIONS else 'arber'
+    min_quality = int(min_quality or 0)
+
+    def load():
+        # Vorberechnet ist nur die ungefilterte Ansicht
+        view = read_view(f'trends-{location}') if not min_quality else None
+        if view is None:
+            return build_trends(location, min_quality)
+        view['statistics'] = {period: pd.DataFrame(**table) for period, table in view['statistics'].items()}
+        return view
+
+    return stations.get(LOCATIONS[location]).cached(('trends', min_quality), load)
+
+
+# Figuren, die auf der Trends-Seite per Dropdown im Browser umgeschaltet werden,
+# und die Jahreswerte (eine Grafik je Station)
+TRENDS_SWITCHED = ['temp', 'rain', 'temp_2015', 'temp_history', 'rain_2015', 'rain_history']
+TRENDS_YEARLY = ['yearly_temp', 'yearly_rain']
+
+
+def trends_figures(min_quality=None):
+    """Location -> switchable and yearly figures of every station"""
+    return {location: {key: trends_view(location, min_quality)['figures'][key] for key in TRENDS_SWITCHED + TRENDS_YEARLY}
+            for location in LOCATIONS}
+
+
+# == Anomalien ============================================================================
+
+def build_anomalies(location, column, reference, year, min_quality=None):
+    """Warming stripes, yearly anomalies and the percentile band of one year against the reference period"""
+    import plotly.graph_objects as go
+
+    name = LOCATIONS[location]
+    station = stations.get(name)
+    label = CORRELATION_COLUMNS.get(column, column)
+    period = climatology.REFERENCE_PERIODS[reference][0]
+    yearly = climatology.yearly_anomalies(station, column, reference, min_quality)
+    normal = climatology.baseline(station, column, reference, min_quality)
+
+    # Warming Stripes: ein Streifen je Jahr, Farbe = Abweichung
+    stripes = go.Figure(go.Heatmap(
+        x=yearly.index, y=[0], z=[yearly.to_numpy()], colorscale='RdBu_r', zmid=0,
+        colorbar={'title': 'Abw.'}, hovertemplate='%{x}: %{z:.2f}<extra></extra>'))
+    stripes.update_layout(title=f'Warming Stripes {name}: {label} (Referenz {period})',
+                          yaxis={'visible': False}, xaxis={'title': 'Jahr'}, template='plotly_white')
+
+    colors = ['#b2182b' if value > 0 else '#2166ac' for value in yearly.fillna(0)]
+    bars = go.Figure(go.Bar(x=yearly.index, y=yearly.to_numpy(), marker_color=colors, name='Abweichung'))
+    bars.update_layout(title=f'Jährliche Abweichung vom Normalwert {name}: {label}',
+                       xaxis={'title': 'Jahr'}, yaxis={'title': 'Abweichung'}, template='plotly_white')
+
+    # Perzentilband des Kalendertags und die Tageswerte des gewählten Jahres
+    rows = station.rows(int(to_day(np.datetime64(f'{year}-01-01'))), int(to_day(np.datetime64(f'{year}-12-31'))))
+    days = station.day[rows]
+    doy = day_of_year(days)
+    dates = to_datetime(days)
+    low, median, high = (normal[p][doy] for p in climatology.PERCENTILES)
+    band = go.Figure([
+        go.Scatter(x=dates, y=high, mode='lines', line={'width': 0}, showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=dates, y=low, mode='lines', line={'width': 0}, fill='tonexty',
+                   fillcolor='rgba(128, 128, 128, 0.3)',
+                   name=f'{climatology.PERCENTILES[0]}. - {climatology.PERCENTILES[-1]}. Perzentil'),
+        go.Scatter(x=dates, y=median, mode='lines', line={'color': 'gray', 'dash': 'dash'}, name='Median'),
+        go.Scatter(x=dates, y=station.series(column, min_quality=min_quality)[rows], mode='lines',
+                   line={'color': 'black'}, name=str(year)),
+    ])
+    band.update_layout(title=f'{label} {name} {year} im Vergleich zur Referenz {period}',
+                       xaxis={'title': 'Datum', 'type': 'date'}, yaxis={'title': label}, template='plotly_white',
+                       legend={'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02})
+    return {'stripes': stripes, 'yearly': bars, 'band': band}
+
+
+def anomaly_year(station, year):
+    """`year` as int if it is a whole year within the station's data, else None"""
+    try:
+        year = float(year)
+    except (TypeError, ValueError):
+        return None
+    if not year.is_integer() or not len(station.day):
+        return None
+    first, last = day_years(station.day[[0, -1]])
+    return int(year) if first <= year <= last else None
+
+
+def anomaly_view(location, column, reference, year, min_quality=None):
+    """Anomaly figures per station, column, reference period and year, kept until the data changes.
+
+    None if `year` is not a year of the station (see `anomaly_year`), so free input cannot grow the cache.
+    """
+    location = location if location in LOCATIONS else 'arber'
+    station = stations.get(LOCATIONS[location])
+    year = anomaly_year(station, year)
+    if year is None:
+        return None
+    return station.cached(
+        ('anomaly-view', column, reference, year, int(min_quality or 0)),
+        lambda: build_anomalies(location, column, reference, year, min_quality))
+
+
+# == Korrelationsmatrix ===================================================================
+
+def load_station_1997_2015(name, min_quality=None):
+    """Dataframe über 18 Jahre"""
+    # Fehlende und verworfene Werte als NaN, damit sie nicht in .corr() eingehen
+    df = stations.get(name).frame(min_quality=min_quality)
+    return df[(df['DATE'].dt.year >= 1997) & (df['DATE'].dt.year <= 2015)]
+
+
+def fill_station_1997_2015(df, name, column, fill_method, min_quality=None):
+    """Replaces `column` with the gap-filled series; returns the number of filled days"""
+    from pxs import gapfill
+
+    station = stations.get(name)
+    values, filled = gapfill.fill(station, column, fill_method, min_quality)
+    rows = df.index.to_numpy()
+    df[column] = values[rows]
+    return int(filled[rows].sum())
+
+
+def build_heatmap(selected_column, min_quality=None, fill_method=None):
+    import plotly.express as px
+
+    df_A = load_station_1997_2015('Arber', min_quality)
+    df_St = load_station_1997_2015('Straubing', min_quality)
+    df_Sc = load_station_1997_2015('Schorndorf', min_quality)
+
+    title = f'Korrelationsmatrix {CORRELATION_COLUMNS[selected_column]}: 1997 - 2015'
+    if fill_method:
+        # Gefüllte Werte kennzeichnen: Anzahl je Station im Titel
+        counts = {name: fill_station_1997_2015(df, name, selected_column, fill_method, min_quality)
+                  for name, df in (('Arber', df_A), ('Straubing', df_St), ('Schorndorf', df_Sc))}
+        title += '<br><sup>gefüllt: ' + ', '.join(f'{name} {count} Tage' for name, count in counts.items()) + '</sup>'
+
+    # Merge dataframes
+    df_merged = df_A[['DATE', selected_column]] \
+        .merge(df_St[['DATE', selected_column]], on='DATE', how='inner', suffixes=('_arber', '_straubing')) \
+        .merge(df_Sc[['DATE', selected_column]], on='DATE', how='inner')
+
+    df_merged.rename(columns={selected_column: f'{selected_column}_schorndorf'}, inplace=True)
+
+    # Calculate correlation matrix
+    corr_matrix = df_merged[[f'{selected_column}_arber',
+                              f'{selected_column}_straubing',
+                              f'{selected_column}_schorndorf']].corr()
+
+    # Create heatmap
+    fig = px.imshow(
+        corr_matrix,
+        text_auto=True,
+        color_continuous_scale='RdBu_r',
+        zmin=-1,
+        zmax=1,
+        aspect="auto",
+        title=title
+    )
+
+    return fig
+
+
+def heatmap_view(selected_column, min_quality=None, fill_method=None):
+    """Correlation heatmap per quality filter and gap filling, kept until new rows are appended to any station"""
+    min_quality = int(min_quality or 0)
+    if min_quality or fill_method:
+        return stations.cached(('correlation-heatmap', selected_column, min_quality, fill_method),
+                               lambda: build_heatmap(selected_column, min_quality, fill_method))
+    return stations.cached(('correlation-heatmap', selected_column),
+                           lambda: read_view(f'correlation-{selected_column}') or build_heatmap(selected_column))
+
+
+# == Figurensätze ========================================================================
+# Hängen nur von der Datensatz-Version ab; app.py liefert sie als GET /figures/<name>
+# mit ETag aus, damit der Browser unveränderte Daten nicht erneut lädt (pxs.http)
+
+FIGURE_SETS = {'trends': trends_figures}
+
+
+def figure_set_json(name, min_quality=None):
+    """JSON body of a figure set, encoded once per dataset version and quality filter (KeyError if unknown)"""
+    from plotly.io.json import to_json_plotly
+
+    build = FIGURE_SETS[name]
+    min_quality = int(min_quality or 0)
+    return stations.cached(('figure-set', name, min_quality), lambda: to_json_plotly(build(min_quality)))
+
+
+# == Artefakte ============================================================================
+
+def default_views():
+    """Name -> builder of every view that `build-cache` precomputes"""
+    views = {f'trends-{location}': (lambda location=location: build_trends(location)) for location in LOCATIONS}
+    views.update({f'correlation-{column}': (lambda column=column: build_heatmap(column)) for column in CORRELATION_COLUMNS})
+    return views
+
+
+def write_views(path, views=None):
+    """Builds the views and writes them as JSON into `path`/views"""
+    from plotly.utils import PlotlyJSONEncoder
+
+    folder = path / 'views'
+    folder.mkdir(exist_ok=True)
+    for name, build in (views or default_views()).items():
+        view = build()
+        if isinstance(view, dict) and 'statistics' in view:
+            view = {**view, 'statistics': {period: df.to_dict('split') for period, df in view['statistics'].items()}}
+        (folder / f'{name}.json').write_text(json.dumps(view, cls=PlotlyJSONEncoder))
+
+
+def read_view(name):
+    """Precomputed view of the attached generation or None"""
+    path = stations.generation_path()
+    if path is None or not (path / 'views' / f'{name}.json').exists():
+        return None
+    return json.loads((path / 'views' / f'{name}.json').read_text())
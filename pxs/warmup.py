@@ -0,0 +1,98 @@
+"""Vorwärmen der Caches nach dem Start, damit der erste Besucher nicht wartet.
+
+Seiten melden ihre häufigsten Ansichten mit `register(name, task)` an; `start()`
+arbeitet die Aufgaben in einem Hintergrund-Thread ab. `status()` liefert den
+Fortschritt für die Route /ready (HTTP 503, bis alles fertig ist).
+
+    PXS_WARMUP=0                       kein Vorwärmen, sofort bereit
+    PXS_WARMUP_STATIONS=Arber,Straubing nur diese Stationen vorladen (Standard: alle)
+    PXS_WARMUP_OPTIONAL=forecast-fits  zusätzlich diese optionalen Aufgaben (teure
+                                       Imports wie statsmodels/sklearn, Standard: keine)
+"""
+import os
+import threading
+import time
+import traceback
+
+from pxs.store import stations
+
+ENABLED = os.environ.get("PXS_WARMUP", "1") != "0"
+OPTIONAL = {name.strip() for name in os.environ.get("PXS_WARMUP_OPTIONAL", "").split(",") if name.strip()}
+
+_tasks = []
+_lock = threading.Lock()
+_thread = None
+_state = {"done": 0, "current": None, "failed": [], "started": None, "finished": None}
+
+
+def warmup_stations():
+    """Configured stations, in the order of PXS_WARMUP_STATIONS."""
+    configured = os.environ.get("PXS_WARMUP_STATIONS", "")
+    names = stations.names()
+    if not configured.strip():
+        return names
+    return [name.strip() for name in configured.split(",") if name.strip() in names]
+
+
+def register(name, task, opt_in=False):
+    """Adds task() to the warm-up; tasks run in registration order. `opt_in` tasks only if named in PXS_WARMUP_OPTIONAL."""
+    if not opt_in or name in OPTIONAL:
+        _tasks.append((name, task))
+    return task
+
+
+def _preload_stations():
+    # Spalten einmal lesen, damit die Seiten der Memory-Maps im Speicher liegen
+    for name in warmup_stations():
+        station = stations.get(name)
+        for array in [*station.columns.values(), *station.masks.values()]:
+            array.sum()
+
+
+register("stations", _preload_stations)
+
+
+def _run():
+    for name, task in list(_tasks):
+        with _lock:
+            _state["current"] = name
+        try:
+            task()
+        except Exception:
+            traceback.print_exc()
+            with _lock:
+                _state["failed"].append(name)
+        with _lock:
+            _state["done"] += 1
+    with _lock:
+        _state["current"] = None
+        _state["finished"] = time.time()
+
+
+def start():
+    """Runs all registered tasks once in a daemon thread."""
+    global _thread
+    if _thread is not None or not ENABLED:
+        return
+    _state["started"] = time.time()
+    _thread = threading.Thread(target=_run, name="pxs-warmup", daemon=True)
+    _thread.start()
+
+
+def ready():
+    return not ENABLED or _state["finished"] is not None
+
+
+def status():
+    """Progress of the warm-up as a JSON-serialisable dict."""
+    with _lock:
+        started, finished = _state["started"], _state["finished"]
+        return {
+            "ready": ready(),
+            "done": _state["done"],
+            "total": len(_tasks),
+            "current": _state["current"],
+            "failed": list(_state["failed"]),
+            "seconds": round((finished or time.time()) - started, 2) if started else None,
+            "dataset_version": stations.version,
+        }
@@ -0,0 +1,54 @@
+"""REST-Schnittstelle (pxs/api.py) auf den mitgelieferten Stationsdaten."""
+import flask
+import pytest
+
+from pxs import api
+from pxs.store import stations
+
+
+@pytest.fixture
+def client():
+    server = flask.Flask(__name__)
+    api.install(server)
+    return server.test_client()
+
+
+@pytest.fixture
+def station():
+    name = stations.names()[0]
+    return name, len(stations.get(name).day)
+
+
+def test_offset_beyond_rows_is_rejected(client, station):
+    name, total = station
+    response = client.get(f"/api/v1/stations/{name}?offset={total}&format=npy")
+    assert response.status_code == 400
+    assert "beyond" in response.json["error"]
+
+
+def test_range_beyond_rows_is_not_satisfiable(client, station):
+    name, total = station
+    response = client.get(f"/api/v1/stations/{name}", headers={"Range": f"rows={total}-{total + 10}"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"rows */{total}"
+
+
+def test_last_row_is_served(client, station):
+    name, total = station
+    response = client.get(f"/api/v1/stations/{name}", headers={"Range": f"rows={total - 1}-{total + 10}"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"rows {total - 1}-{total - 1}/{total}"
+
+
+@pytest.mark.parametrize("quality", ["11", "abc", "-1", "5.5"])
+def test_unknown_quality_is_rejected(client, station, quality):
+    name, _ = station
+    response = client.get(f"/api/v1/stations/{name}?quality={quality}&limit=1")
+    assert response.status_code == 400
+    assert "quality" in response.json["error"]
+
+
+def test_quality_levels_are_accepted(client, station):
+    name, _ = station
+    assert client.get(f"/api/v1/stations/{name}?quality=5&limit=1").status_code == 200
+    assert client.get(f"/api/v1/stations/{name}?quality=&limit=1").status_code == 200
@@ -0,0 +1,29 @@
+"""Export der Dashboard-Auswahl (pxs/export.py)."""
+import flask
+import pytest
+
+from pxs import export
+from pxs.store import stations
+
+
+@pytest.fixture
+def client():
+    server = flask.Flask(__name__)
+    export.install(server)
+    return server.test_client()
+
+
+def url(**params):
+    query = {"stations": stations.names()[0], "columns": "LUFTTEMPERATUR", **params}
+    return "/export/selection.csv?" + "&".join(f"{key}={value}" for key, value in query.items())
+
+
+@pytest.mark.parametrize("window", ["inf", "nan", "abc"])
+def test_invalid_window_is_rejected(client, window):
+    assert client.get(url(window=window)).status_code == 400
+
+
+def test_huge_window_is_capped(client):
+    capped = client.get(url(window="1e300"))
+    assert capped.status_code == 200
+    assert capped.data == client.get(url(window=export.MAX_WINDOW_YEARS)).data
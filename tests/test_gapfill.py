@@ -0,0 +1,20 @@
+"""Kalendertage und Jahresgang (pxs/gapfill.py)."""
+import numpy as np
+
+from pxs.gapfill import day_of_year
+from pxs.store import to_day
+
+
+def slots(*dates):
+    return day_of_year(to_day(np.array(dates, dtype="datetime64[D]"))).tolist()
+
+
+def test_same_calendar_day_shares_a_slot():
+    assert slots("2001-03-01", "2004-03-01") == [60, 60]
+    assert slots("2001-12-31", "2004-12-31") == [365, 365]
+    assert slots("2001-02-28", "2004-02-28") == [58, 58]
+
+
+def test_29_february_has_its_own_slot():
+    assert slots("2004-02-29") == [59]
+    assert 59 not in day_of_year(to_day(np.arange(np.datetime64("2001-01-01"), np.datetime64("2004-01-01"))))
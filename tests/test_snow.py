@@ -0,0 +1,43 @@
+"""Schneewasseräquivalent (pxs/snow.py) auf einer künstlichen Station."""
+import numpy as np
+
+from pxs import snow
+from pxs.store import Station
+
+HEADER = ("DATE, MESS_DATUM, QUALITAETS_NIVEAU, LUFTTEMPERATUR, NIEDERSCHLAGSHOEHE,NIEDERSCHLAGSHOEHE_IND,"
+          " SCHNEEHOEHE\n")
+
+
+def write_station(path, dates, temperature, precipitation, depth):
+    rows = [f"{date:%d.%m.%Y},{date:%Y%m%d},  10, {t:.1f}, {p:.1f}, 7, {d}\n"
+            for date, t, p, d in zip(dates.astype(object), temperature, precipitation, depth)]
+    path.write_text(HEADER + "".join(rows))
+    station = Station(path.stem, path)
+    station.refresh()
+    return station
+
+
+def test_constant_depth_is_no_snowfall(tmp_path):
+    # Ein Schneefall am ersten Tag, danach setzt sich die Decke bei gleicher Höhe
+    dates = np.arange(np.datetime64("2000-12-01"), np.datetime64("2001-03-01"))
+    precipitation = np.r_[30.0, np.zeros(len(dates) - 1)]
+    station = write_station(tmp_path / "Test.csv", dates, np.full(len(dates), -5.0), precipitation,
+                            np.full(len(dates), 50))
+
+    values = snow.swe(station)
+    assert values[-1] > values[0]  # Setzung erhöht das SWE ...
+    table = snow.seasonal(station)
+    assert table.loc[2001, "total"] == 30.0  # ... aber nicht den Schneefall
+    assert table.loc[2001, "peak"] == values.max()
+
+
+def test_degree_day_model_without_depth(tmp_path):
+    dates = np.arange(np.datetime64("2000-12-01"), np.datetime64("2000-12-11"))
+    temperature = np.r_[np.full(5, -5.0), np.full(5, 5.0)]
+    precipitation = np.r_[np.full(5, 10.0), np.zeros(5)]
+    station = write_station(tmp_path / "Test.csv", dates, temperature, precipitation, np.full(len(dates), -999))
+
+    values = snow.swe(station)
+    # 5 x 10 mm Schneefall, dann 15 mm Schmelze pro Tag bis 0
+    np.testing.assert_allclose(values, [10, 20, 30, 40, 50, 35, 20, 5, 0, 0])
+    assert snow.seasonal(station).loc[2001, "total"] == 50.0